@@ -0,0 +1,110 @@
+"""Compare the game snapshot codec with pickle and JSON.
+
+Run from the ``friendexing`` directory::
+
+    PYTHONPATH=. python ../benchmarks/bench_codec.py
+"""
+import json
+import pickle  # nosec
+from timeit import Timer
+from typing import Any, Callable, Dict
+
+from games.codec import decode_game, decode_player, encode_game
+from games.models import Batch, Game, Image, Player, Record
+
+PLAYERS = 50
+IMAGES = 20
+RECORDS_PER_IMAGE = 40
+FIELDS = ('surname', 'given', 'age', 'sex', 'relation', 'birthplace',
+          'occupation', 'race', 'marital', 'notes')
+
+
+def make_game() -> Game:
+    game = Game.create(30, True, 'Admin')
+    for number in range(PLAYERS - 1):
+        game.players.append(
+            Player(f'Player {number}', score=number * 10, guess='Smith'),
+        )
+    game.batches.append(Batch(
+        {name: str for name in FIELDS},
+        [
+            Image(True, [
+                Record(FIELDS, [
+                    f'{name} {record_number}' for name in FIELDS
+                ])
+                for record_number in range(RECORDS_PER_IMAGE)
+            ])
+            for _ in range(IMAGES)
+        ],
+    ))
+    return game
+
+
+def to_json(game: Game) -> bytes:
+    def player_dict(player: Player) -> Dict[str, Any]:
+        return {
+            'id': str(player.id),
+            'name': player.name,
+            'score': player.score,
+            'guess_id': player.guess_id,
+            'guess': player.guess,
+            'guess_time': player.guess_time,
+        }
+
+    return json.dumps({
+        'id': str(game.id),
+        'state': game.state,
+        'settings': {
+            'total_time_to_guess': game.settings.total_time_to_guess,
+            'should_randomize_fields': game.settings.should_randomize_fields,
+        },
+        'players': [player_dict(player) for player in game.players],
+        'batches': [{
+            'schema': {name: kind.__name__ for name, kind in batch.schema.items()},
+            'images': [{
+                'indexable': image.indexable,
+                'records': [{
+                    name: {'value': field.value, 'is_checked': field.is_checked}
+                    for name, field in record.fields.items()
+                } for record in image.records],
+            } for image in batch.images],
+        } for batch in game.batches],
+    }).encode()
+
+
+def time_per_call(function: Callable[[], object]) -> float:
+    number, _ = Timer(function).autorange()
+    return min(Timer(function).repeat(repeat=5, number=number)) / number
+
+
+def main() -> None:
+    game = make_game()
+    player_id = game.players[-1].id
+    snapshot = encode_game(game)
+    pickled = pickle.dumps(game)
+    json_data = to_json(game)
+
+    rows = (
+        ('codec', len(snapshot),
+         time_per_call(lambda: encode_game(game)),
+         time_per_call(lambda: decode_game(snapshot))),
+        ('pickle', len(pickled),
+         time_per_call(lambda: pickle.dumps(game)),
+         time_per_call(lambda: pickle.loads(pickled))),  # nosec
+        ('json', len(json_data),
+         time_per_call(lambda: to_json(game)),
+         time_per_call(lambda: json.loads(json_data))),
+    )
+    print(f'{PLAYERS} players, {IMAGES * RECORDS_PER_IMAGE} records '
+          f'of {len(FIELDS)} fields')
+    print(f'{"format":<8}{"bytes":>10}{"encode ms":>12}{"decode ms":>12}')
+    for name, size, encode_time, decode_time in rows:
+        print(f'{name:<8}{size:>10}{encode_time * 1000:>12.3f}'
+              f'{decode_time * 1000:>12.3f}')
+    print('(json decode only builds dicts, not model objects)')
+    one_player = time_per_call(lambda: decode_player(snapshot, player_id))
+    print(f'codec single player decode: {one_player * 1000:.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Compare the image bytes of the play page before and after renditions.
+
+The page shows six images, each as a thumbnail and as a main image.
+Before, all twelve ``<img>`` loaded the full ``demo-1.jpg``; now the
+thumbnails load the thumbnail rendition and the main images the medium
+one, or the large one on high density screens.
+
+Run from the ``friendexing`` directory::
+
+    PYTHONPATH=. python ../benchmarks/bench_image_payload.py
+"""
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from games.images import LARGE, MEDIUM, THUMBNAIL, DerivativeCache
+
+SOURCE = Path('games/static/games/demo-1.jpg')
+IMAGES = 6
+
+
+def main() -> None:
+    with TemporaryDirectory() as root:
+        cache = DerivativeCache(root, 1024 ** 3)
+        start = perf_counter()
+        digest = cache.add(SOURCE)
+        render_time = perf_counter() - start
+        sizes = {}
+        for rendition in (THUMBNAIL, MEDIUM, LARGE):
+            path = cache.path(digest, rendition.name)
+            assert path
+            sizes[rendition.name] = path.stat().st_size
+        start = perf_counter()
+        cache.add(SOURCE)
+        cached_time = perf_counter() - start
+
+    original = SOURCE.stat().st_size
+    before = 2 * IMAGES * original
+    after = IMAGES * (sizes[THUMBNAIL.name] + sizes[MEDIUM.name])
+    after_high_density = IMAGES * (sizes[THUMBNAIL.name] + sizes[LARGE.name])
+    print(f'original: {original / 1024:.0f} KiB, renditions: ' + ', '.join(
+        f'{name} {size / 1024:.0f} KiB' for name, size in sizes.items()
+    ))
+    print(f'render all renditions: {render_time * 1000:.0f} ms, '
+          f'again from cache: {cached_time * 1000:.3f} ms')
+    print(f'page images before: {before / 1024:.0f} KiB')
+    print(f'page images after: {after / 1024:.0f} KiB '
+          f'({after / before:.1%}), '
+          f'{after_high_density / 1024:.0f} KiB on high density screens')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Rank a public game of 5000 players, reading and closing rounds.
+
+Compares the leaderboard with sorting ``game.players`` by score for each
+read, and the changed standings a round sends with all of them.
+Run from the ``friendexing`` directory::
+
+    PYTHONPATH=. python ../benchmarks/bench_leaderboard.py
+"""
+import asyncio
+import random
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from games.events import dump_event, make_event
+from games.leaderboard import InMemoryLeaderboard, Standing
+from games.models import Game, Player
+
+PLAYERS = 5000
+ROUNDS = 10
+READS = 5000
+TOP = 10
+# Share of players earning points in a round, and the most they earn.
+SCORING_SHARE = 0.3
+MAX_POINTS = 150
+
+
+def sorted_read(
+        game: Game,
+        player_id: UUID,
+) -> Tuple[List[Player], Optional[int]]:
+    players = sorted(game.players, key=lambda player: -player.score)
+    rank = next(
+        number for number, player in enumerate(players, 1)
+        if player.id == player_id
+    )
+    return players[:TOP], rank
+
+
+async def leaderboard_read(
+        leaderboard: InMemoryLeaderboard,
+        game_id: UUID,
+        player_id: UUID,
+) -> Tuple[List[Standing], Optional[Standing]]:
+    return (
+        await leaderboard.top(game_id, TOP),
+        await leaderboard.rank(game_id, player_id),
+    )
+
+
+def play_round(game: Game, rng: random.Random) -> Dict[UUID, int]:
+    for player in game.players:
+        if rng.random() < SCORING_SHARE:
+            player.score += rng.randrange(1, MAX_POINTS)
+    return {player.id: player.score for player in game.players}
+
+
+async def main() -> None:
+    rng = random.Random(0)
+    game = Game.create(30, False, 'Admin')
+    game.players.extend(Player(f'Player {number}') for number in range(
+        PLAYERS - 1,
+    ))
+    leaderboard = InMemoryLeaderboard()
+    await leaderboard.update(
+        game.id,
+        {player.id: 0 for player in game.players},
+    )
+
+    update_seconds = 0.0
+    delta_bytes = full_bytes = 0
+    for round_number in range(1, ROUNDS + 1):
+        scores = play_round(game, rng)
+        start = perf_counter()
+        changes = await leaderboard.update(game.id, scores)
+        update_seconds += perf_counter() - start
+        delta_bytes += len(dump_event(make_event(
+            'scores',
+            round_number=round_number,
+            ranks=[change._asdict() for change in changes],
+        )))
+        full_bytes += len(dump_event(make_event(
+            'scores',
+            round_number=round_number,
+            ranks=[
+                standing._asdict()
+                for standing in await leaderboard.top(game.id, PLAYERS)
+            ],
+        )))
+
+    readers = [rng.choice(game.players).id for _ in range(READS)]
+    start = perf_counter()
+    for player_id in readers:
+        sorted_read(game, player_id)
+    sorted_seconds = perf_counter() - start
+    start = perf_counter()
+    for player_id in readers:
+        await leaderboard_read(leaderboard, game.id, player_id)
+    leaderboard_seconds = perf_counter() - start
+
+    standing = await leaderboard.rank(game.id, readers[1])
+    assert standing
+    small_scores = {readers[1]: standing.score + 1}
+    start = perf_counter()
+    small_changes = await leaderboard.update(game.id, small_scores)
+    small_seconds = perf_counter() - start
+
+    single_scores = {readers[0]: 10 ** 6}
+    start = perf_counter()
+    single_changes = await leaderboard.update(game.id, single_scores)
+    single_seconds = perf_counter() - start
+
+    print(f'{PLAYERS} players, top {TOP} and own rank per read')
+    print(f'{"sort players":<18}{sorted_seconds / READS * 1e6:>10.1f} us/read')
+    print(
+        f'{"leaderboard":<18}'
+        f'{leaderboard_seconds / READS * 1e6:>10.1f} us/read',
+    )
+    print(
+        f'round close update {update_seconds / ROUNDS * 1e3:.2f} ms, '
+        f'one player to the top {single_seconds * 1e3:.2f} ms '
+        f'({len(single_changes)} standings changed)',
+    )
+    print(
+        f'one point to one player {small_seconds * 1e3:.2f} ms '
+        f'({len(small_changes)} standings changed)',
+    )
+    print(
+        f'scores event {delta_bytes // ROUNDS} bytes with changed '
+        f'standings, {full_bytes // ROUNDS} with all',
+    )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
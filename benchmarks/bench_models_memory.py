@@ -0,0 +1,81 @@
+"""Report the memory taken by 10k records with the slotted models.
+
+The old layout, a dict of ``Field`` objects with a ``__dict__`` each, is
+rebuilt here for comparison.  Run from the ``friendexing`` directory::
+
+    PYTHONPATH=. python ../benchmarks/bench_models_memory.py
+"""
+import tracemalloc
+from typing import Callable, Dict, List
+from uuid import uuid4
+
+from games.models import Player, Record
+
+RECORDS = 10_000
+FIELDS = ('surname', 'given', 'age', 'sex', 'relation', 'birthplace',
+          'occupation', 'race', 'marital', 'notes')
+
+
+class DictField:
+    def __init__(self, value: str, is_checked: bool):
+        self.value = value
+        self.is_checked = is_checked
+
+
+class DictRecord:
+    def __init__(self, fields: Dict[str, DictField]):
+        self.fields = fields
+
+
+class DictPlayer:
+    def __init__(self, name: str):
+        self.id = uuid4()
+        self.name = name
+        self.score = 0
+        self.guess_id = None
+        self.guess = None
+        self.guess_time = None
+
+
+# Values are shared by every record so only the containers are measured.
+VALUES = tuple(name.upper() for name in FIELDS)
+
+
+def dict_records() -> List[DictRecord]:
+    return [
+        DictRecord({
+            name: DictField(value, False)
+            for name, value in zip(FIELDS, VALUES)
+        })
+        for _ in range(RECORDS)
+    ]
+
+
+def slotted_records() -> List[Record]:
+    return [Record(FIELDS, VALUES) for _ in range(RECORDS)]
+
+
+def measure(build: Callable[[], object]) -> int:
+    tracemalloc.start()
+    built = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return size
+
+
+def main() -> None:
+    dict_size = measure(dict_records)
+    slotted_size = measure(slotted_records)
+    print(f'bytes per {RECORDS} records of {len(FIELDS)} fields')
+    print(f'{"dict fields":<14}{dict_size:>12}')
+    print(f'{"column record":<14}{slotted_size:>12}')
+    print(f'saved {1 - slotted_size / dict_size:.0%}')
+    dict_players = measure(lambda: [DictPlayer('name') for _ in range(RECORDS)])
+    players = measure(lambda: [Player('name') for _ in range(RECORDS)])
+    print(f'bytes per {RECORDS} players: {dict_players} with __dict__, '
+          f'{players} slotted')
+
+
+if __name__ == '__main__':
+    main()
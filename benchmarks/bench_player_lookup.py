@@ -0,0 +1,81 @@
+"""Measure resolving a request's player as games grow.
+
+Compares ``Players.get`` and ``Players.has_name`` with scanning the
+list, as views did, and what building the ID index costs next to
+decoding the game it is built for.  Run from the ``friendexing``
+directory::
+
+    PYTHONPATH=. python ../benchmarks/bench_player_lookup.py
+"""
+import random
+from timeit import Timer
+from typing import Callable, List, Optional
+from uuid import UUID
+
+from games.codec import decode_game, encode_game
+from games.models import Game, Player, Players, name_key
+
+PLAYER_COUNTS = (10, 100, 1000, 10_000)
+LOOKUPS = 1000
+
+
+def scan(players: List[Player], cookie: str) -> Optional[Player]:
+    return next(
+        (player for player in players if str(player.id) == cookie),
+        None,
+    )
+
+
+def scan_names(players: List[Player], name: str) -> bool:
+    key = name_key(name)
+    return any(name_key(player.name) == key for player in players)
+
+
+def per_call(function: Callable[[], object], calls: int) -> float:
+    timer = Timer(function)
+    return min(timer.repeat(repeat=5, number=1)) / calls * 1e6
+
+
+def main() -> None:
+    rng = random.Random(0)
+    print(f'{"players":>8}{"scan":>12}{"index":>10}{"name scan":>12}'
+          f'{"name index":>12}{"indexing":>10}{"decode":>10}')
+    for count in PLAYER_COUNTS:
+        game = Game.create(30, False, 'Admin')
+        game.players.extend(
+            Player(f'Player {number}') for number in range(count - 1)
+        )
+        players = list(game.players)
+        cookies = [str(rng.choice(players).id) for _ in range(LOOKUPS)]
+        names = [rng.choice(players).name.upper() for _ in range(LOOKUPS)]
+        data = encode_game(game)
+
+        def scan_all() -> None:
+            for cookie in cookies:
+                scan(players, cookie)
+
+        def index_all() -> None:
+            for cookie in cookies:
+                game.players.get(UUID(cookie))
+
+        def scan_all_names() -> None:
+            for name in names:
+                scan_names(players, name)
+
+        def index_all_names() -> None:
+            for name in names:
+                game.players.has_name(name)
+
+        print(
+            f'{count:>8}'
+            f'{per_call(scan_all, LOOKUPS):>10.2f}us'
+            f'{per_call(index_all, LOOKUPS):>8.2f}us'
+            f'{per_call(scan_all_names, LOOKUPS):>10.2f}us'
+            f'{per_call(index_all_names, LOOKUPS):>10.2f}us'
+            f'{per_call(lambda: Players(players), 1) / 1000:>8.2f}ms'
+            f'{per_call(lambda: decode_game(data), 1) / 1000:>8.2f}ms',
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Measure round scheduler overhead with 10k active games.
+
+Run from the ``friendexing`` directory::
+
+    PYTHONPATH=. python ../benchmarks/bench_round_scheduler.py
+"""
+import asyncio
+from statistics import quantiles
+from time import perf_counter, process_time, time
+from typing import Dict, List
+from uuid import UUID
+
+from games.models import Game
+from games.rounds import RoundScheduler, start_round
+from games.scoring import PlayerScore
+from games.stores import InMemoryGameStore
+
+GAMES = 10_000
+SPREAD_SECONDS = 2.0
+IDLE_SECONDS = 1.0
+
+
+async def main() -> None:
+    store = InMemoryGameStore()
+    lateness: List[float] = []
+    deadlines: Dict[UUID, float] = {}
+
+    async def on_round_closed(
+            game_id: UUID,
+            _: int,
+            __: List[PlayerScore],
+    ) -> None:
+        lateness.append(time() - deadlines[game_id])
+
+    scheduler = RoundScheduler(store, on_round_closed)
+    games = [Game.create(30, False, 'Admin') for _ in range(GAMES)]
+    for game in games:
+        start_round(game, time())
+        await store.put(game)
+
+    runner = asyncio.ensure_future(scheduler.run())
+    cpu_start = process_time()
+    start = perf_counter()
+    first_deadline = time() + 0.5
+    for number, game in enumerate(games):
+        deadline = first_deadline + SPREAD_SECONDS * number / GAMES
+        deadlines[game.id] = deadline
+        scheduler.schedule(game.id, game.round_number, deadline)
+    schedule_time = perf_counter() - start
+
+    while len(lateness) < GAMES:
+        await asyncio.sleep(0.1)
+    closing_cpu = process_time() - cpu_start
+
+    far_deadline = time() + 3600
+    for game in games:
+        scheduler.schedule(game.id, game.round_number + 1, far_deadline)
+    cpu_start = process_time()
+    await asyncio.sleep(IDLE_SECONDS)
+    idle_cpu = process_time() - cpu_start
+    runner.cancel()
+
+    percentiles = quantiles(lateness, n=100)
+    print(f'{GAMES} games, deadlines spread over {SPREAD_SECONDS}s')
+    print(f'schedule: {schedule_time / GAMES * 1e6:.2f} us per game')
+    print(f'closing CPU: {closing_cpu:.3f}s for {len(lateness)} rounds '
+          f'({closing_cpu / GAMES * 1e6:.1f} us per round, store included)')
+    print(f'lateness ms: p50 {percentiles[49] * 1000:.2f}, '
+          f'p99 {percentiles[98] * 1000:.2f}, max {max(lateness) * 1000:.2f}')
+    print(f'idle CPU with {len(scheduler)} pending timers: '
+          f'{idle_cpu * 1000:.2f} ms over {IDLE_SECONDS}s')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
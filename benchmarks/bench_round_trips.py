@@ -0,0 +1,159 @@
+"""Count the round trips to Redis, and connections opened, per page view.
+
+Views are called through Django's ASGI handler, so like a served worker
+every view of the process runs its Redis commands on one event loop.
+Redis is the stand-in from the tests, behind a proxy counting what the
+views send: clients wait for each reply before sending again, so each
+read the proxy makes is a round trip.  Run from the ``friendexing``
+directory::
+
+    PYTHONPATH=. python ../benchmarks/bench_round_trips.py
+
+and on an earlier tree to compare.
+"""
+import asyncio
+import os
+import re
+import subprocess  # nosec
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import TYPE_CHECKING, Awaitable, Dict, List
+from uuid import UUID
+
+if TYPE_CHECKING:  # pragma: no cover
+    from django.http.response import HttpResponseBase
+
+LOCAL_REDIS = Path(__file__).parent.parent / 'tests' / 'local_redis.py'
+GAMES = 20
+GAME_URL = re.compile(r'/games/([0-9a-f-]{36})/')
+
+
+class CountingProxy:
+    def __init__(self, target_port: int):
+        self.target_port = target_port
+        self.connections = 0
+        self.round_trips = 0
+        self.port = 0
+
+    async def start(self) -> None:
+        server = await asyncio.start_server(self._serve, '127.0.0.1', 0)
+        self.port = server.sockets[0].getsockname()[1]
+
+    async def _serve(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter,
+    ) -> None:
+        self.connections += 1
+        target_reader, target_writer = await asyncio.open_connection(
+            '127.0.0.1',
+            self.target_port,
+        )
+
+        async def forward(
+                source: asyncio.StreamReader,
+                sink: asyncio.StreamWriter,
+                count: bool,
+        ) -> None:
+            while True:
+                data = await source.read(65536)
+                if not data:
+                    break
+                if count:
+                    self.round_trips += 1
+                sink.write(data)
+                await sink.drain()
+            sink.close()
+
+        await asyncio.gather(
+            forward(reader, target_writer, True),
+            forward(target_reader, writer, False),
+            return_exceptions=True,
+        )
+
+
+async def measure(proxy: CountingProxy) -> Dict[str, List[int]]:
+    # pylint: disable=import-outside-toplevel
+    from django.test import AsyncClient
+
+    from games.leaderboard import get_leaderboard
+    from games.stores import get_game_store
+
+    counts: Dict[str, List[int]] = {}
+
+    async def view(
+            name: str,
+            request: Awaitable['HttpResponseBase'],
+    ) -> 'HttpResponseBase':
+        round_trips, connections = proxy.round_trips, proxy.connections
+        response = await request
+        totals = counts.setdefault(name, [0, 0, 0])
+        totals[0] += 1
+        totals[1] += proxy.round_trips - round_trips
+        totals[2] += proxy.connections - connections
+        return response
+
+    for _ in range(GAMES):
+        host, player = AsyncClient(), AsyncClient()
+        response = await view('create', host.post('/games/create/', {
+            'name': 'Host',
+            'total_time_to_guess': 30,
+        }))
+        match = GAME_URL.search(response['Location'])
+        assert match
+        game_id = UUID(match.group(1))
+        url = f'/games/{game_id}/'
+        await view('join', player.post(url + 'join/', {'name': 'Player'}))
+        await view('play page', host.get(url))
+        game = await get_game_store().get(game_id)
+        assert game
+        await get_leaderboard().update(game_id, {
+            game.players[0].id: 10,
+            game.players[1].id: 5,
+        })
+        await view('leaderboard', player.get(url + 'leaderboard/'))
+        await view('start round', host.post(url + 'rounds/'))
+    return counts
+
+
+def main() -> None:
+    redis = subprocess.Popen(  # nosec
+        [sys.executable, str(LOCAL_REDIS), '--port', '0'],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    assert redis.stdout
+    target_port = int(redis.stdout.readline().rsplit(':', 1)[1])
+    try:
+        with TemporaryDirectory() as image_cache_dir:
+            asyncio.run(run(target_port, image_cache_dir))
+    finally:
+        redis.kill()
+        redis.wait()
+
+
+async def run(target_port: int, image_cache_dir: str) -> None:
+    proxy = CountingProxy(target_port)
+    await proxy.start()
+    os.environ.update(
+        DJANGO_SETTINGS_MODULE='configuration.settings',
+        IMAGE_CACHE_DIR=image_cache_dir,
+        REDIS_URL=f'redis://127.0.0.1:{proxy.port}',
+    )
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    # pylint: disable=import-outside-toplevel
+    import django
+    django.setup()
+
+    counts = await measure(proxy)
+
+    print(f'{GAMES} games, per page view')
+    print(f'{"view":<14}{"round trips":>12}{"connections":>13}')
+    for name, (views, round_trips, connections) in counts.items():
+        print(f'{name:<14}{round_trips / views:>12.1f}'
+              f'{connections / views:>13.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Score a round of 500 players guessing 50 fields.
+
+Compares ``score_round`` with scoring every player on their own:
+normalizing the reference for each guess and computing the full edit
+distance.  Then scores the same guesses in a game whose batch has a
+census' worth of fields after those guessed.
+
+Run from the ``friendexing`` directory::
+
+    PYTHONPATH=. python ../benchmarks/bench_scoring.py
+"""
+import random
+from timeit import Timer
+from typing import Callable, List
+
+from games.models import Batch, Game, Image, Player, Record
+from games.scoring import (
+    FULL_POINTS,
+    MAX_EDIT_RATIO,
+    PARTIAL_POINTS,
+    normalize,
+    reference_values,
+    score_round,
+)
+
+PLAYERS = 500
+FIELDS = 50
+REPEAT = 20
+# Records of ten fields each in the large batch.
+LARGE_RECORDS = 40_000
+
+
+def make_large_game() -> Game:
+    game = make_game()
+    names = tuple(f'column {number}' for number in range(10))
+    game.batches.append(Batch({name: str for name in names}, [
+        Image(True, [
+            Record(names, [f'Value {number}'] * len(names))
+            for number in range(LARGE_RECORDS)
+        ]),
+    ]))
+    return game
+
+
+def make_game() -> Game:
+    rng = random.Random(0)
+    names = tuple(f'field {number}' for number in range(FIELDS))
+    values = [
+        f'Bartholomew-{number} de la Cruz' for number in range(FIELDS)
+    ]
+    game = Game.create(30, False, 'Admin')
+    game.batches.append(Batch({name: str for name in names}, [
+        Image(True, [Record(names, values)]),
+    ]))
+    for number in range(PLAYERS):
+        guess_id = rng.randrange(FIELDS)
+        guess = rng.choice([
+            values[guess_id],
+            values[guess_id].upper(),
+            values[guess_id].replace('o', 'a', 1),
+            f'Smith {number}',
+        ])
+        game.players.append(Player(
+            f'Player {number}',
+            guess_id=guess_id,
+            guess=guess,
+            guess_time=rng.randrange(30),
+        ))
+    return game
+
+
+def edit_distance(first: str, second: str) -> int:
+    previous = list(range(len(second) + 1))
+    for row, first_character in enumerate(first, 1):
+        current = [row]
+        for column, second_character in enumerate(second, 1):
+            current.append(min(
+                previous[column] + 1,
+                current[column - 1] + 1,
+                previous[column - 1] + (first_character != second_character),
+            ))
+        previous = current
+    return previous[-1]
+
+
+def score_each_player(game: Game) -> List[int]:
+    values = [
+        value
+        for batch in game.batches
+        for image in batch.images
+        for record in image.records
+        for value in record.values
+    ]
+    all_points = []
+    for player in game.players:
+        points = 0.0
+        if player.guess is not None and player.guess_id is not None:
+            reference = normalize(values[player.guess_id])
+            guess = normalize(player.guess)
+            distance = edit_distance(guess, reference)
+            if distance <= int(len(reference) * MAX_EDIT_RATIO):
+                match = 1 - distance / max(len(guess), len(reference))
+                points = FULL_POINTS if match == 1 else PARTIAL_POINTS * match
+        all_points.append(round(points))
+    return all_points
+
+
+def best_time(
+        function: Callable[[Game], object],
+        make: Callable[[], Game] = make_game,
+) -> float:
+    game = make()
+    return min(Timer(lambda: function(game)).repeat(REPEAT, number=1))
+
+
+def all_references(game: Game) -> object:
+    return reference_values(game, range(FIELDS))
+
+
+def main() -> None:
+    print(f'{PLAYERS} players, {FIELDS} fields')
+    print(f'normalize references: '
+          f'{best_time(all_references) * 1000:.3f} ms')
+    for name, function in (
+            ('score_round', score_round),
+            ('per player', score_each_player),
+    ):
+        print(f'{name:>12}: {best_time(function) * 1000:.3f} ms per round')
+    print(f'score_round, {LARGE_RECORDS * 10} more fields: '
+          f'{best_time(score_round, make_large_game) * 1000:.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""Compare the per request cost of the development and production settings.
+
+Each settings module is loaded in its own process, which calls the WSGI
+application directly, so only Django's own overhead is measured.  The
+forbidden image manifest does next to no work of its own, so it shows
+the overhead of the middleware.  Run from the ``friendexing``
+directory::
+
+    PYTHONPATH=. python ../benchmarks/bench_settings.py
+"""
+import json
+import os
+import subprocess  # nosec
+import sys
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from wsgiref.util import setup_testing_defaults
+
+SETTINGS = ('configuration.settings', 'configuration.settings_production')
+ENCODINGS = ('identity', 'gzip')
+REQUESTS = 500
+
+WSGIApplication = Callable[..., Iterable[bytes]]
+
+
+def call(
+        application: WSGIApplication,
+        path: str,
+        cookie: str,
+        encoding: str,
+) -> Tuple[str, bytes]:
+    environ: Dict[str, Any] = {
+        'PATH_INFO': path,
+        'HTTP_ACCEPT_ENCODING': encoding,
+        'HTTP_COOKIE': cookie,
+    }
+    setup_testing_defaults(environ)
+    statuses: List[str] = []
+    response = application(
+        environ,
+        lambda status, headers, exc_info=None: statuses.append(status),
+    )
+    try:
+        body = b''.join(response)
+    finally:
+        getattr(response, 'close', lambda: None)()
+    return statuses[0], body
+
+
+def measure() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Time each page with the settings in ``DJANGO_SETTINGS_MODULE``."""
+    # pylint: disable=import-outside-toplevel
+    from asgiref.sync import async_to_sync
+    from django.conf import settings
+    from django.contrib.staticfiles.handlers import StaticFilesHandler
+    from django.core.wsgi import get_wsgi_application
+
+    from games.models import Game
+    from games.stores import get_game_store
+    from games.tokens import get_player_tokens
+
+    handler = get_wsgi_application()
+    # As runserver does.
+    application: WSGIApplication = (
+        handler if settings.SERVE_STATIC else StaticFilesHandler(handler)
+    )
+    game = Game.create(30, False, 'Host')
+    async_to_sync(get_game_store().put)(game)
+    tokens = get_player_tokens()
+    host = game.players[0]
+    token = tokens.sign(tokens.issue(game.id, host.id, host.name))
+    cookie = f'{game.id}={token}'
+    pages = {
+        'forbidden': (f'/games/{game.id}/images/', '', '403'),
+        'create form': ('/games/create/', '', '200'),
+        'play': (f'/games/{game.id}/', cookie, '200'),
+        'play.css': ('/static/games/play.css', '', '200'),
+        'play.js': ('/static/games/play.js', '', '200'),
+        'demo-1.jpg': ('/static/games/demo-1.jpg', '', '200'),
+    }
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for page, (path, page_cookie, expected_status) in pages.items():
+        for encoding in ENCODINGS:
+            status, body = call(application, path, page_cookie, encoding)
+            if not status.startswith(expected_status):
+                raise RuntimeError(f'{path} responded {status}')
+            start = perf_counter()
+            for _ in range(REQUESTS):
+                call(application, path, page_cookie, encoding)
+            elapsed = perf_counter() - start
+            results.setdefault(page, {})[encoding] = {
+                'microseconds': elapsed / REQUESTS * 1e6,
+                'bytes': len(body),
+            }
+    return results
+
+
+def run(settings_module: str, image_cache_dir: str) -> Dict[str, Any]:
+    environment = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE=settings_module,
+        IMAGE_CACHE_DIR=image_cache_dir,
+    )
+    environment.setdefault('SECRET_KEY', 'benchmark')
+    environment.pop('REDIS_URL', None)
+    output = subprocess.run(  # nosec
+        [sys.executable, __file__, '--measure'],
+        env=environment,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    results: Dict[str, Any] = json.loads(output)
+    return results
+
+
+def main() -> None:
+    with TemporaryDirectory() as image_cache_dir:
+        results = {
+            settings_module: run(settings_module, image_cache_dir)
+            for settings_module in SETTINGS
+        }
+    before, after = (results[module] for module in SETTINGS)
+    print(f'{"page":<12} {"encoding":<9} {"before µs":>10} {"after µs":>10} '
+          f'{"before B":>9} {"after B":>9}')
+    for page, encodings in before.items():
+        for encoding, stats in encodings.items():
+            other = after[page][encoding]
+            print(f'{page:<12} {encoding:<9} '
+                  f'{stats["microseconds"]:>10.0f} '
+                  f'{other["microseconds"]:>10.0f} '
+                  f'{stats["bytes"]:>9} {other["bytes"]:>9}')
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--measure']:
+        # pylint: disable=import-outside-toplevel
+        import django
+        django.setup()
+        print(json.dumps(measure()))
+    else:
+        main()
@@ -0,0 +1,95 @@
+"""Bytes and pixels a phone fetches to show a zoomed in scan.
+
+Compares the tiles a viewport shows at each zoom with transforming the
+large rendition, as the play page did, and the original it would take
+for full detail.  Run from the ``friendexing`` directory::
+
+    PYTHONPATH=. python ../benchmarks/bench_tiles.py
+"""
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from PIL import Image as PillowImage
+
+from games.images import LARGE, DerivativeCache
+from games.tiles import TileCache
+
+SCAN_SIZE = (4000, 6000)
+# A phone viewport in device pixels, the image fit to its width.
+VIEWPORT = (1170, 2532)
+ZOOMS = (1, 2, 4, 8, 16, 26)
+
+
+def make_scan(path: Path) -> None:
+    noise = PillowImage.effect_noise(SCAN_SIZE, 40)
+    gradient = PillowImage.linear_gradient('L').resize(SCAN_SIZE)
+    PillowImage.merge('RGB', (noise, gradient, noise)).save(
+        path,
+        quality=90,
+    )
+
+
+def main() -> None:
+    with TemporaryDirectory() as directory:
+        root = Path(directory)
+        source = root / 'scan.jpg'
+        make_scan(source)
+        derivatives = DerivativeCache(root / 'cache', 1024 ** 3)
+        digest = derivatives.add(source)
+        large = derivatives.path(digest, LARGE.name)
+        assert large
+        tiles = TileCache(root / 'tiles', derivatives, 1024 ** 3)
+        start = perf_counter()
+        pyramid = tiles.pyramid(digest)
+        build_seconds = perf_counter() - start
+        assert pyramid
+
+        with PillowImage.open(large) as image:
+            large_width = image.width
+            large_pixels = image.width * image.height
+        scan_pixels = SCAN_SIZE[0] * SCAN_SIZE[1]
+        print(
+            f'{SCAN_SIZE[0]}x{SCAN_SIZE[1]} scan, '
+            f'{source.stat().st_size // 1024} KiB, '
+            f'pyramid built in {build_seconds:.2f} s, '
+            f'{tiles.size // 1024} KiB on disk',
+        )
+        print(
+            f'large rendition {large.stat().st_size // 1024} KiB, '
+            f'{large_pixels / 1e6:.1f} MP decoded at any zoom, '
+            f'the scan {scan_pixels / 1e6:.1f} MP',
+        )
+        print(f'{"zoom":>5}{"level":>7}{"tiles":>7}{"KiB":>8}{"MP":>7}')
+        for zoom in ZOOMS:
+            drawn_width = VIEWPORT[0] * zoom
+            drawn_height = drawn_width * pyramid.height / pyramid.width
+            level = pyramid.level_for(drawn_width)
+            if drawn_width <= large_width:
+                print(f'{zoom:>5}  large rendition suffices')
+                continue
+            # The middle of the image, as after zooming in on it.
+            width_share = min(1, 1 / zoom)
+            height_share = min(1, VIEWPORT[1] / drawn_height)
+            visible = pyramid.visible_tiles(
+                level,
+                (1 - width_share) / 2,
+                (1 - height_share) / 2,
+                (1 + width_share) / 2,
+                (1 + height_share) / 2,
+            )
+            size = pixels = 0
+            for column, row in visible:
+                path = tiles.path(digest, level, column, row)
+                assert path
+                size += path.stat().st_size
+                with PillowImage.open(path) as tile:
+                    pixels += tile.width * tile.height
+            print(
+                f'{zoom:>5}{level:>7}{len(visible):>7}'
+                f'{size // 1024:>8}{pixels / 1e6:>7.1f}',
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Time making tone presets of batch images, per megapixel.
+
+Compares applying a tone as one lookup table with a pass per step, and
+what a toned large rendition costs to make from the rendition in the
+original tone, decoding and encoding included.  Run from the
+``friendexing`` directory::
+
+    PYTHONPATH=. python ../benchmarks/bench_tones.py
+"""
+from functools import partial
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, Dict
+
+from PIL import Image as PillowImage
+from PIL import ImageOps
+
+from games.images import LARGE, DerivativeCache
+from games.tones import Tone, apply_tone
+
+SCAN_SIZE = (4000, 6000)
+REPEAT = 5
+PRESETS: Dict[str, Tone] = {
+    'inverted': Tone(invert=True),
+    'equalized': Tone(equalize=True),
+    'darker, more contrast': Tone(brightness=75, contrast=150),
+    'all of them': Tone(True, True, 125, 150),
+}
+
+
+def chained(image: PillowImage.Image, tone: Tone) -> PillowImage.Image:
+    """Apply each step of ``tone`` as its own pass over ``image``."""
+    if tone.equalize:
+        image = ImageOps.equalize(image)
+    if tone.invert:
+        image = ImageOps.invert(image)
+    contrast = tone.contrast / 100
+    brightness = tone.brightness / 100
+    image = image.point(lambda value: (value - 127.5) * contrast + 127.5)
+    return image.point(lambda value: value * brightness)
+
+
+def per_megapixel(
+        function: Callable[[], object],
+        pixels: int,
+) -> float:
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = perf_counter()
+        function()
+        best = min(best, perf_counter() - start)
+    return best / (pixels / 1e6) * 1e3
+
+
+def main() -> None:
+    image = PillowImage.merge('RGB', (
+        PillowImage.effect_noise(SCAN_SIZE, 40),
+        PillowImage.linear_gradient('L').resize(SCAN_SIZE),
+        PillowImage.effect_noise(SCAN_SIZE, 20),
+    ))
+    pixels = image.width * image.height
+    histogram = image.histogram()
+    with TemporaryDirectory() as directory:
+        root = Path(directory)
+        source = root / 'scan.jpg'
+        image.save(source, quality=90)
+        cache = DerivativeCache(root / 'cache', 1024 ** 3)
+        digest = cache.add(source)
+        cache.histogram(digest)
+        large = cache.path(digest, LARGE.name)
+        assert large
+        with PillowImage.open(large) as rendition:
+            large_pixels = rendition.width * rendition.height
+
+        print(f'{pixels / 1e6:.0f} MP scan, ms per megapixel')
+        print(f'{"preset":<24}{"table":>8}{"chained":>9}{"rendition":>11}')
+        for name, tone in PRESETS.items():
+            def make_rendition(tone: Tone = tone) -> None:
+                path = cache.path(digest, LARGE.name, tone)
+                assert path
+                # Made again on the next call.
+                path.unlink()
+
+            table = per_megapixel(
+                partial(apply_tone, image, tone, histogram),
+                pixels,
+            )
+            passes = per_megapixel(partial(chained, image, tone), pixels)
+            rendition = per_megapixel(make_rendition, large_pixels)
+            print(f'{name:<24}{table:>8.2f}{passes:>9.2f}{rendition:>11.2f}')
+
+
+if __name__ == '__main__':
+    main()
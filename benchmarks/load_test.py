@@ -0,0 +1,243 @@
+"""Load test the create, join and play flow over HTTP.
+
+Simulates concurrent games: a host creates each game, players join and
+open the play page, then the host starts a round and everybody guesses
+at once.  Reports latency
+percentiles and requests per second per endpoint.  Start a server
+first, for example from the ``friendexing`` directory::
+
+    python manage.py serve --workers 1
+
+then run::
+
+    python benchmarks/load_test.py --games 20 --players 5 \\
+        --output load.json --baseline previous-load.json
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from datetime import datetime, timezone
+from statistics import quantiles
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+CSRF_TOKEN = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+class Recorder:
+    """Collects the latency of every request, by endpoint."""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(
+            self,
+            session: aiohttp.ClientSession,
+            endpoint: str,
+            method: str,
+            url: str,
+            expected_status: int = 200,
+            **kwargs: Any,
+    ) -> str:
+        """Return the body of the response, or where it redirects to."""
+        start = perf_counter()
+        try:
+            async with session.request(
+                    method,
+                    url,
+                    allow_redirects=False,
+                    **kwargs,
+            ) as response:
+                body = await response.text()
+                if response.status != expected_status:
+                    raise aiohttp.ClientResponseError(
+                        response.request_info,
+                        (),
+                        status=response.status,
+                    )
+                location = response.headers.get('Location', '')
+        except aiohttp.ClientError:
+            self.errors[endpoint] += 1
+            raise
+        finally:
+            self.latencies[endpoint].append(perf_counter() - start)
+        return location or body
+
+    def summary(self, duration: float) -> Dict[str, Dict[str, float]]:
+        summary = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            percentiles = (
+                quantiles(latencies, n=100, method='inclusive')
+                if len(latencies) > 1 else latencies * 99
+            )
+            summary[endpoint] = {
+                'requests': len(latencies),
+                'errors': self.errors[endpoint],
+                'requests_per_second': len(latencies) / duration,
+                'p50_ms': percentiles[49] * 1000,
+                'p95_ms': percentiles[94] * 1000,
+                'p99_ms': percentiles[98] * 1000,
+            }
+        return summary
+
+
+def new_session() -> aiohttp.ClientSession:
+    # Unsafe lets the jar keep cookies for servers addressed by IP.
+    return aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True))
+
+
+def csrf_token(page: str) -> str:
+    match = CSRF_TOKEN.search(page)
+    if not match:
+        raise ValueError('No CSRF token on page')
+    return match[1]
+
+
+async def play_game(recorder: Recorder, url: str, players: int) -> None:
+    async with AsyncExitStack() as sessions:
+        host = await sessions.enter_async_context(new_session())
+        page = await recorder.request(
+            host, 'create form', 'GET', f'{url}/games/create/',
+        )
+        game_path = await recorder.request(
+            host, 'create', 'POST', f'{url}/games/create/',
+            expected_status=302,
+            data={
+                'csrfmiddlewaretoken': csrf_token(page),
+                'name': 'Host',
+                'total_time_to_guess': '30',
+            },
+        )
+        game_url = f'{url}{game_path}'
+        await recorder.request(host, 'play', 'GET', game_url)
+        joined = await asyncio.gather(*(
+            join_game(recorder, sessions, game_url, number)
+            for number in range(players - 1)
+        ))
+        started = json.loads(await recorder.request(
+            host, 'start round', 'POST', f'{game_url}rounds/',
+            headers={'X-CSRFToken': csrf_token(page)},
+        ))
+        await asyncio.gather(*(
+            recorder.request(
+                session, 'guess', 'POST', f'{game_url}guesses/',
+                headers={'X-CSRFToken': token},
+                data={
+                    'round_number': str(started['round_number']),
+                    'guess_id': str(number),
+                    'guess': f'Guess {number}',
+                },
+            )
+            for number, (session, token)
+            in enumerate([(host, csrf_token(page))] + joined)
+        ))
+
+
+async def join_game(
+        recorder: Recorder,
+        sessions: AsyncExitStack,
+        game_url: str,
+        number: int,
+) -> Tuple[aiohttp.ClientSession, str]:
+    """Join as a new player, returning its session and CSRF token."""
+    player = await sessions.enter_async_context(new_session())
+    page = await recorder.request(
+        player, 'join form', 'GET', f'{game_url}join/',
+    )
+    await recorder.request(
+        player, 'join', 'POST', f'{game_url}join/',
+        expected_status=302,
+        data={
+            'csrfmiddlewaretoken': csrf_token(page),
+            'name': f'Player {number}',
+        },
+    )
+    await recorder.request(player, 'play', 'GET', game_url)
+    return player, csrf_token(page)
+
+
+async def run(url: str, games: int, players: int) -> Dict[str, Any]:
+    recorder = Recorder()
+    start = perf_counter()
+    outcomes = await asyncio.gather(
+        *(play_game(recorder, url, players) for _ in range(games)),
+        return_exceptions=True,
+    )
+    duration = perf_counter() - start
+    failures = [
+        outcome for outcome in outcomes if isinstance(outcome, Exception)
+    ]
+    return {
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'url': url,
+        'games': games,
+        'players_per_game': players,
+        'failed_games': len(failures),
+        'duration_seconds': duration,
+        'requests_per_second': sum(
+            map(len, recorder.latencies.values()),
+        ) / duration,
+        'endpoints': recorder.summary(duration),
+    }
+
+
+def print_results(
+        results: Dict[str, Any],
+        baseline: Optional[Dict[str, Any]],
+) -> None:
+    print(f'{results["games"]} games of {results["players_per_game"]} '
+          f'players in {results["duration_seconds"]:.2f}s, '
+          f'{results["requests_per_second"]:.0f} requests/s, '
+          f'{results["failed_games"]} failed games')
+    print(f'{"endpoint":<12} {"requests":>8} {"errors":>6} {"req/s":>8} '
+          f'{"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}')
+    for endpoint, stats in results['endpoints'].items():
+        line = (
+            f'{endpoint:<12} {stats["requests"]:>8} {stats["errors"]:>6} '
+            f'{stats["requests_per_second"]:>8.1f} {stats["p50_ms"]:>8.1f} '
+            f'{stats["p95_ms"]:>8.1f} {stats["p99_ms"]:>8.1f}'
+        )
+        previous = (baseline or {}).get('endpoints', {}).get(endpoint)
+        if previous:
+            change = stats['p95_ms'] / previous['p95_ms'] - 1
+            line += f'  p95 {change:+.0%} vs baseline'
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--players', type=int, default=5,
+                        help='Players per game, including the host')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline',
+                        help='Compare with the results of an earlier run')
+    arguments = parser.parse_args()
+
+    baseline = None
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    results = asyncio.run(run(
+        arguments.url.rstrip('/'),
+        arguments.games,
+        arguments.players,
+    ))
+    print_results(results, baseline)
+    if arguments.output:
+        with open(arguments.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+    if results['failed_games']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
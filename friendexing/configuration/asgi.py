@@ -2,6 +2,8 @@
 ASGI config for configuration project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django, WebSocket connections to the games app's live channel.
+Each worker starts the games app's sweeper when the server starts it.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.1/howto/deployment/asgi/
@@ -13,4 +15,35 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'configuration.settings')
 
-application = get_asgi_application()  # noqa: F841
+django_application = get_asgi_application()
+
+# The games app needs Django set up first.
+# pylint: disable=wrong-import-position
+from games.events import get_event_hub  # noqa: E402
+from games.sockets import GameSocket, Receive, Scope, Send  # noqa: E402
+from games.sweeper import get_sweeper  # noqa: E402
+from games.tokens import get_player_tokens  # noqa: E402
+
+game_socket = GameSocket(get_event_hub(), get_player_tokens())
+
+
+async def lifespan(receive: Receive, send: Send) -> None:
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Here rather than on import, which a forking server does
+            # before forking, leaving the workers without the thread.
+            get_sweeper()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope: Scope, receive: Receive, send: Send) -> None:
+    if scope['type'] == 'websocket':
+        await game_socket(scope, receive, send)
+    elif scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -27,6 +27,36 @@ DEBUG = True
 
 ALLOWED_HOSTS = ['*']
 
+# Games are kept in Redis when this is set, otherwise in process memory.
+# Several comma separated URLs spread games over those nodes, see
+# games.sharding; add nodes with the rebalance_games command.
+REDIS_URL = os.getenv('REDIS_URL')
+REDIS_URLS = [
+    url.strip() for url in (REDIS_URL or '').split(',') if url.strip()
+]
+# Connections each worker keeps to each node at most.  Those idle for
+# REDIS_HEALTH_CHECK_SECONDS are checked with a PING before reuse.
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 20))
+REDIS_HEALTH_CHECK_SECONDS = int(
+    os.getenv('REDIS_HEALTH_CHECK_SECONDS', 30),
+)
+
+# Resized batch images, evicting the least recently used past the limit.
+IMAGE_CACHE_DIR = Path(os.getenv('IMAGE_CACHE_DIR', BASE_DIR / 'image-cache'))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_BYTES', 512 * 1024 ** 2))
+
+# Deep zoom tiles of batch images, a pyramid per image.
+IMAGE_TILE_DIR = Path(os.getenv('IMAGE_TILE_DIR', IMAGE_CACHE_DIR / 'tiles'))
+IMAGE_TILE_MAX_BYTES = int(os.getenv('IMAGE_TILE_MAX_BYTES', 1024 ** 3))
+
+# Every nth request is profiled, 0 to never profile.  Profiles of those
+# taking at least PROFILE_SLOW_REQUEST_SECONDS are saved to PROFILE_DIR.
+PROFILE_EVERY_N_REQUESTS = int(os.getenv('PROFILE_EVERY_N_REQUESTS', 0))
+PROFILE_SLOW_REQUEST_SECONDS = float(
+    os.getenv('PROFILE_SLOW_REQUEST_SECONDS', 0.5),
+)
+PROFILE_DIR = Path(os.getenv('PROFILE_DIR', BASE_DIR / 'profiles'))
+
 
 # Application definition
 
@@ -41,6 +71,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'games.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,7 +85,7 @@ ROOT_URLCONF = 'configuration.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'games.instrumentation.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -70,6 +101,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'configuration.wsgi.application'
 
+ASGI_APPLICATION = 'configuration.asgi.application'
+
 
 # Database
 # https://docs.djangoproject.com/en/3.1/ref/settings/#databases
@@ -119,3 +152,6 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/3.1/howto/static-files/
 
 STATIC_URL = '/static/'
+
+# runserver serves static files itself while DEBUG is on.
+SERVE_STATIC = False
@@ -0,0 +1,61 @@
+"""
+Django settings for serving games in production.
+
+Select with ``DJANGO_SETTINGS_MODULE=configuration.settings_production``.
+Players are identified by a cookie per game, so the admin, auth,
+sessions, messages and the database are left out, templates are
+compiled once and HTML, CSS and JavaScript are compressed.  Images are
+sent as they are, keeping their ETags and byte ranges.
+"""
+import os
+
+# pylint: disable=wildcard-import,unused-wildcard-import
+from configuration.settings import *  # noqa: F401,F403
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '*').split(',')
+
+# There is no separate web server in front of Django to serve these.
+SERVE_STATIC = True
+
+INSTALLED_APPS = [
+    'games',
+    'django.contrib.staticfiles',
+]
+
+MIDDLEWARE = [
+    'games.instrumentation.InstrumentationMiddleware',
+    'games.compression.TextGZipMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+TEMPLATES = [
+    {
+        'BACKEND': 'games.instrumentation.TimedDjangoTemplates',
+        'DIRS': [],
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+            ],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+DATABASES = {}
+
+# The games app keeps nothing in a database, so has no migrations to load
+# or check.
+MIGRATION_MODULES = {'games': None}
+
+AUTH_PASSWORD_VALIDATORS = []
+
+# Nothing uses sessions, but keep them out of the database if anything does.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
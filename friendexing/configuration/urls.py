@@ -18,15 +18,32 @@ Including another URLconf
 
 """
 import os
+from typing import List, Union
 
-from django.contrib import admin
-from django.urls import path, include
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles.views import serve
+from django.urls import URLPattern, URLResolver, path, include, re_path
 
-urlpatterns = [  # noqa: F841
+from games.compression import gzip_static
+
+urlpatterns: List[Union[URLPattern, URLResolver]] = [  # noqa: F841
     path('games/', include('games.urls')),
-    path('admin/', admin.site.urls),
 ]
 
+if apps.is_installed('django.contrib.admin'):
+    # Only imported when installed, as it pulls in auth and contenttypes.
+    # pylint: disable=import-outside-toplevel
+    from django.contrib import admin
+    urlpatterns.append(path('admin/', admin.site.urls))
+
+if settings.SERVE_STATIC:
+    urlpatterns.append(re_path(
+        rf'^{settings.STATIC_URL.lstrip("/")}(?P<path>.*)$',
+        gzip_static(serve),
+        {'insecure': True},
+    ))
+
 if os.getenv('ENABLE_EXTRA'):  # pragma: no cover
     urlpatterns.append(
         path('extra/', include('extra.urls'))
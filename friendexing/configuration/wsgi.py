@@ -2,6 +2,7 @@
 WSGI config for configuration project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+The games app's sweeper is started along with it.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.1/howto/deployment/wsgi/
@@ -14,3 +15,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'configuration.settings')
 
 application = get_wsgi_application()  # noqa: F841
+
+# WSGI has no startup event, so the sweeper starts when this is imported,
+# which servers do in each worker unless told to preload.
+# pylint: disable=wrong-import-position
+from games.sweeper import get_sweeper  # noqa: E402
+
+get_sweeper()
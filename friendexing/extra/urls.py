@@ -1,7 +1,8 @@
 from django.urls import path
 
-from extra.views import kill_server_view
+from extra.views import kill_server_view, metrics_view
 
 urlpatterns = [
     path('kill-server/', kill_server_view),
+    path('metrics/', metrics_view),
 ]
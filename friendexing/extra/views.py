@@ -1,19 +1,17 @@
-import os
-import signal
-from threading import Thread
-from time import sleep
-
 from django.core.handlers.wsgi import WSGIRequest
-from django.http.response import HttpResponseBase
+from django.http import HttpResponse
+
+from games.metrics import REGISTRY
+from games.serving import request_shutdown
 
 
-def kill_server_view(_: WSGIRequest) -> HttpResponseBase:
-    process_id = os.getpid()
-    thread = Thread(target=kill_soon, args=(process_id,))
-    thread.start()
-    return HttpResponseBase()
+def kill_server_view(_: WSGIRequest) -> HttpResponse:
+    request_shutdown()
+    return HttpResponse()
 
 
-def kill_soon(process_id: int) -> None:
-    sleep(5)
-    os.kill(process_id, signal.SIGINT)
+def metrics_view(_: WSGIRequest) -> HttpResponse:
+    return HttpResponse(
+        REGISTRY.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -0,0 +1,365 @@
+"""Versioned binary format for game snapshots kept in a shared store.
+
+A snapshot is laid out as::
+
+    header | game | players section | batches section
+
+The players and batches sections are length prefixed and every player
+is length prefixed inside its section, so readers that only need a
+player can skip over the batches, and over other players, without
+decoding them.  Readers of the game's state and round stop before the
+players.  UUIDs are stored as their 16 raw bytes.
+"""
+import struct
+from functools import partial
+from itertools import accumulate
+from typing import (
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
+from uuid import UUID
+
+from games.models import Batch, Game, Image, Player, Record, Settings
+
+MAGIC = b'FX'
+FORMAT_VERSION = 5
+
+SCHEMA_TYPES: Tuple[type, ...] = (str, int, float, bool)
+
+_UUID = struct.Struct('<16s')
+_HEADER = struct.Struct('<2sB')
+_UINT8 = struct.Struct('<B')
+_UINT16 = struct.Struct('<H')
+_UINT32 = struct.Struct('<I')
+_INT64 = struct.Struct('<q')
+_SETTINGS = struct.Struct('<H?')
+_ROUND = struct.Struct('<I?d')
+_PLAYER = struct.Struct('<16sqB')
+
+_HAS_GUESS_ID = 1
+_HAS_GUESS = 2
+_HAS_GUESS_TIME = 4
+
+T = TypeVar('T')
+
+# Field names of a record and the packer for their value lengths.
+_Layout = Tuple[Tuple[str, ...], struct.Struct]
+
+
+class CodecError(ValueError):
+    pass
+
+
+class _Writer:
+    def __init__(self) -> None:
+        self.buffer = bytearray()
+
+    def pack(self, packer: struct.Struct, *values: object) -> None:
+        self.buffer += packer.pack(*values)
+
+    def string(self, value: str) -> None:
+        encoded = value.encode()
+        self.pack(_UINT32, len(encoded))
+        self.buffer += encoded
+
+    def section(self, write: Callable[['_Writer'], None]) -> None:
+        section = _Writer()
+        write(section)
+        self.pack(_UINT32, len(section.buffer))
+        self.buffer += section.buffer
+
+
+class _Reader:
+    def __init__(self, data: Union[bytes, memoryview], offset: int = 0):
+        self.data = memoryview(data)
+        self.offset = offset
+
+    def unpack(self, packer: struct.Struct) -> Tuple[object, ...]:
+        try:
+            values = packer.unpack_from(self.data, self.offset)
+        except struct.error as error:
+            raise CodecError('Truncated game snapshot') from error
+        self.offset += packer.size
+        return values
+
+    def uint(self, packer: struct.Struct) -> int:
+        value, = self.unpack(packer)
+        assert isinstance(value, int)
+        return value
+
+    def string(self) -> str:
+        length = self.uint(_UINT32)
+        end = self.offset + length
+        if end > len(self.data):
+            raise CodecError('Truncated game snapshot')
+        value = str(self.data[self.offset:end], 'utf-8')
+        self.offset = end
+        return value
+
+    def section(self) -> '_Reader':
+        length = self.uint(_UINT32)
+        section = _Reader(self.data[self.offset:self.offset + length])
+        self.offset += length
+        return section
+
+    def skip(self) -> None:
+        length = self.uint(_UINT32)
+        self.offset += length
+
+    def repeat(self, read: Callable[['_Reader'], T]) -> List[T]:
+        return [read(self) for _ in range(self.uint(_UINT32))]
+
+
+def encode_game(game: Game) -> bytes:
+    writer = _Writer()
+    writer.pack(_HEADER, MAGIC, FORMAT_VERSION)
+    writer.pack(_UUID, game.id.bytes)
+    writer.string(game.state)
+    writer.pack(
+        _SETTINGS,
+        game.settings.total_time_to_guess,
+        game.settings.should_randomize_fields,
+    )
+    writer.pack(
+        _ROUND,
+        game.round_number,
+        game.round_deadline is not None,
+        game.round_deadline or 0.0,
+    )
+    writer.section(lambda section: _write_players(section, game.players))
+    writer.section(lambda section: _write_batches(section, game.batches))
+    return bytes(writer.buffer)
+
+
+class GameRound(NamedTuple):
+    """A game's state and round, without its players and batches."""
+
+    state: str
+    settings: Settings
+    round_number: int
+    round_deadline: Optional[float]
+
+
+def decode_game(data: bytes) -> Game:
+    reader = _read_header(data)
+    id_bytes, = reader.unpack(_UUID)
+    assert isinstance(id_bytes, bytes)
+    game_round = _read_round(reader)
+    return Game(
+        game_round.settings,
+        _read_players(reader.section()),
+        reader.section().repeat(_read_batch),
+        game_round.state,
+        UUID(bytes=id_bytes),
+        game_round.round_number,
+        game_round.round_deadline,
+    )
+
+
+def decode_round(data: bytes) -> GameRound:
+    """Decode a game's state and round, skipping everything after them."""
+    reader = _read_header(data)
+    reader.offset += _UUID.size
+    return _read_round(reader)
+
+
+def decode_player(data: bytes, player_id: UUID) -> Optional[Player]:
+    """Decode a single player, skipping every other player and the batches.
+
+    Returns ``None`` when the player is not part of the game.
+    """
+    reader = _players_section(data)
+    wanted_id = player_id.bytes
+    for _ in range(reader.uint(_UINT32)):
+        player = reader.section()
+        if player.data[:_UUID.size] == wanted_id:
+            return _read_player(player)
+    return None
+
+
+def _read_header(data: bytes) -> _Reader:
+    reader = _Reader(data)
+    magic, version = reader.unpack(_HEADER)
+    if magic != MAGIC:
+        raise CodecError('Not a game snapshot')
+    if version != FORMAT_VERSION:
+        raise CodecError(f'Unsupported game snapshot version {version}')
+    return reader
+
+
+def _read_round(reader: _Reader) -> GameRound:
+    state = reader.string()
+    total_time_to_guess, should_randomize_fields = reader.unpack(_SETTINGS)
+    assert isinstance(total_time_to_guess, int)
+    assert isinstance(should_randomize_fields, bool)
+    round_number, has_deadline, round_deadline = reader.unpack(_ROUND)
+    assert isinstance(round_number, int)
+    assert isinstance(round_deadline, float)
+    return GameRound(
+        state,
+        Settings(total_time_to_guess, should_randomize_fields),
+        round_number,
+        round_deadline if has_deadline else None,
+    )
+
+
+def _players_section(data: bytes) -> _Reader:
+    reader = _read_header(data)
+    reader.offset += _UUID.size
+    reader.skip()
+    reader.offset += _SETTINGS.size + _ROUND.size
+    return reader.section()
+
+
+def _write_players(writer: _Writer, players: Sequence[Player]) -> None:
+    writer.pack(_UINT32, len(players))
+    for player in players:
+        writer.section(partial(_write_player, player=player))
+
+
+def _write_player(writer: _Writer, player: Player) -> None:
+    flags = 0
+    if player.guess_id is not None:
+        flags |= _HAS_GUESS_ID
+    if player.guess is not None:
+        flags |= _HAS_GUESS
+    if player.guess_time is not None:
+        flags |= _HAS_GUESS_TIME
+    writer.pack(_PLAYER, player.id.bytes, player.score, flags)
+    writer.string(player.name)
+    if player.guess_id is not None:
+        writer.pack(_INT64, player.guess_id)
+    if player.guess is not None:
+        writer.string(player.guess)
+    if player.guess_time is not None:
+        writer.pack(_INT64, player.guess_time)
+
+
+def _read_players(reader: _Reader) -> List[Player]:
+    return reader.repeat(lambda players: _read_player(players.section()))
+
+
+def _read_player(reader: _Reader) -> Player:
+    id_bytes, score, flags = reader.unpack(_PLAYER)
+    assert isinstance(id_bytes, bytes)
+    assert isinstance(score, int)
+    assert isinstance(flags, int)
+    name = reader.string()
+    return Player(
+        name,
+        UUID(bytes=id_bytes),
+        score,
+        guess_id=reader.uint(_INT64) if flags & _HAS_GUESS_ID else None,
+        guess=reader.string() if flags & _HAS_GUESS else None,
+        guess_time=reader.uint(_INT64) if flags & _HAS_GUESS_TIME else None,
+    )
+
+
+def _write_batches(writer: _Writer, batches: List[Batch]) -> None:
+    writer.pack(_UINT32, len(batches))
+    for batch in batches:
+        _write_batch(writer, batch)
+
+
+def _write_batch(writer: _Writer, batch: Batch) -> None:
+    # Names are written once per batch, followed by the distinct name
+    # tuples records use, which is normally just the schema.  Records then
+    # only refer to their tuple by index.
+    name_indexes: Dict[str, int] = {}
+    layout_indexes: Dict[Tuple[str, ...], int] = {}
+    for name in batch.schema:
+        name_indexes.setdefault(name, len(name_indexes))
+    for image in batch.images:
+        for record in image.records:
+            if record.names not in layout_indexes:
+                layout_indexes[record.names] = len(layout_indexes)
+                for name in record.names:
+                    name_indexes.setdefault(name, len(name_indexes))
+
+    writer.pack(_UINT16, len(name_indexes))
+    for name in name_indexes:
+        writer.string(name)
+    writer.pack(_UINT16, len(batch.schema))
+    for field_type in batch.schema.values():
+        writer.pack(_UINT8, SCHEMA_TYPES.index(field_type))
+    writer.pack(_UINT16, len(layout_indexes))
+    for layout in layout_indexes:
+        writer.pack(_UINT16, len(layout))
+        for name in layout:
+            writer.pack(_UINT16, name_indexes[name])
+    writer.pack(_UINT32, len(batch.images))
+    for image in batch.images:
+        writer.pack(_UINT8, image.indexable)
+        writer.string(image.source or '')
+        writer.string(image.digest or '')
+        writer.pack(_UINT32, len(image.records))
+        for record in image.records:
+            _write_record(writer, record, layout_indexes[record.names])
+
+
+def _write_record(writer: _Writer, record: Record, layout_index: int) -> None:
+    # Values are written as one UTF-8 block after their lengths in
+    # characters, so reading a record is one decode and some slicing.
+    text = ''.join(record.values).encode()
+    writer.pack(_UINT16, layout_index)
+    writer.buffer += record.checked
+    writer.buffer += struct.pack(
+        f'<{len(record.values)}I',
+        *map(len, record.values),
+    )
+    writer.pack(_UINT32, len(text))
+    writer.buffer += text
+
+
+def _read_batch(reader: _Reader) -> Batch:
+    names = [reader.string() for _ in range(reader.uint(_UINT16))]
+    schema = {
+        names[index]: SCHEMA_TYPES[reader.uint(_UINT8)]
+        for index in range(reader.uint(_UINT16))
+    }
+    layouts = []
+    for _ in range(reader.uint(_UINT16)):
+        layout = tuple(
+            names[reader.uint(_UINT16)]
+            for _ in range(reader.uint(_UINT16))
+        )
+        layouts.append((layout, struct.Struct(f'<{len(layout)}I')))
+    return Batch(
+        schema,
+        reader.repeat(lambda images: _read_image(images, layouts)),
+    )
+
+
+def _read_image(reader: _Reader, layouts: List[_Layout]) -> Image:
+    indexable = bool(reader.uint(_UINT8))
+    source = reader.string()
+    digest = reader.string()
+    return Image(
+        indexable,
+        reader.repeat(lambda records: _read_record(records, layouts)),
+        source or None,
+        digest or None,
+    )
+
+
+def _read_record(reader: _Reader, layouts: List[_Layout]) -> Record:
+    names, lengths_packer = layouts[reader.uint(_UINT16)]
+    offset = reader.offset
+    checked = bytearray(reader.data[offset:offset + len(names)])
+    reader.offset += len(names)
+    lengths = cast(Tuple[int, ...], reader.unpack(lengths_packer))
+    ends = list(accumulate(lengths))
+    text = reader.string()
+    return Record(
+        names,
+        [text[start:end] for start, end in zip([0] + ends, ends)],
+        checked,
+    )
@@ -0,0 +1,70 @@
+"""Gzip for text responses only.
+
+Images are compressed already, and gzipping a file response would drop
+its length, weaken its ETag and stop it being sent with ``sendfile`` or
+in byte ranges, which renditions and tiles rely on.
+"""
+from functools import wraps
+from typing import Any, Callable
+
+from django.http import HttpRequest
+from django.http.response import HttpResponseBase
+from django.middleware.gzip import GZipMiddleware
+
+TEXT_TYPES = (
+    'text/',
+    'application/javascript',
+    'application/json',
+    'application/xml',
+)
+
+View = Callable[..., HttpResponseBase]
+
+
+def is_text(response: HttpResponseBase) -> bool:
+    return str(response.get('Content-Type', '')).startswith(TEXT_TYPES)
+
+
+class TextGZipMiddleware(GZipMiddleware):
+    """Compresses text responses that are neither files nor streamed."""
+
+    def process_response(
+            self,
+            request: HttpRequest,
+            response: HttpResponseBase,
+    ) -> HttpResponseBase:
+        if response.streaming or not is_text(response):
+            return response
+        return super().process_response(request, response)
+
+
+class StaticGZipMiddleware(GZipMiddleware):
+    """Compresses text files too, for static files which are all small.
+
+    They are never fetched in ranges, and are sent by Django as read.
+    """
+
+    def process_response(
+            self,
+            request: HttpRequest,
+            response: HttpResponseBase,
+    ) -> HttpResponseBase:
+        if not is_text(response):
+            return response
+        return super().process_response(request, response)
+
+
+def gzip_static(view: View) -> View:
+    """Wrap a view serving static files to compress the text ones."""
+    middleware = StaticGZipMiddleware(view)
+
+    @wraps(view)
+    def compressed(
+            request: HttpRequest,
+            *args: Any,
+            **kwargs: Any,
+    ) -> HttpResponseBase:
+        response = view(request, *args, **kwargs)
+        return middleware.process_response(request, response)
+
+    return compressed
@@ -0,0 +1,260 @@
+import asyncio
+import json
+import threading
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Optional,
+    Set,
+    Tuple,
+)
+from uuid import UUID, uuid4
+from weakref import WeakKeyDictionary
+
+from django.conf import settings
+
+from games.sharding import Shards, redis_shards
+
+if TYPE_CHECKING:  # pragma: no cover
+    # Imported when first used, so workers without Redis start sooner.
+    import aioredis
+
+    from games.redis_client import RedisClients
+
+# Events are plain JSON objects with a ``type`` of ``join``, ``guess``,
+# ``scores`` or ``state`` and whatever else that type needs.
+Event = Dict[str, Any]
+
+# A slow client drops events past this point rather than holding memory
+# for everybody else.
+MAX_QUEUED_EVENTS = 100
+
+_Subscriber = Tuple[asyncio.AbstractEventLoop, 'asyncio.Queue[Event]']
+
+
+def make_event(event_type: str, **data: Any) -> Event:
+    return {'type': event_type, **data}
+
+
+def dump_event(event: Event) -> str:
+    return json.dumps(event, default=str)
+
+
+class EventHub(ABC):
+    """Fans out game events to everyone watching a game.
+
+    Publishing is fire and forget: events are for live updates only and
+    the game store stays the source of truth.
+    """
+
+    @abstractmethod
+    async def publish(self, game_id: UUID, event: Event) -> None:
+        pass
+
+    @abstractmethod
+    def subscribe(
+            self,
+            game_id: UUID,
+    ) -> AsyncContextManager[AsyncIterator[Event]]:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class InProcessEventHub(EventHub):
+    """Delivers events to subscribers of this process only.
+
+    Subscribers may live on other threads' event loops, as sync views run
+    ``async_to_sync`` on loops of their own, so delivery always goes
+    through the subscriber's loop.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscribers: Dict[UUID, Set[_Subscriber]] = {}
+
+    async def publish(self, game_id: UUID, event: Event) -> None:
+        self._deliver(game_id, event)
+
+    @asynccontextmanager
+    async def subscribe(self, game_id: UUID) -> AsyncIterator[
+            AsyncIterator[Event]
+    ]:
+        queue: 'asyncio.Queue[Event]' = asyncio.Queue(MAX_QUEUED_EVENTS)
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            subscribers = self._subscribers.setdefault(game_id, set())
+            subscribers.add(subscriber)
+            is_first = len(subscribers) == 1
+        if is_first:
+            await self._watch(game_id)
+        try:
+            yield _drain(queue)
+        finally:
+            with self._lock:
+                subscribers.discard(subscriber)
+                is_last = not subscribers
+                if is_last:
+                    del self._subscribers[game_id]
+            if is_last:
+                await self._unwatch(game_id)
+
+    async def _watch(self, game_id: UUID) -> None:
+        pass
+
+    async def _unwatch(self, game_id: UUID) -> None:
+        pass
+
+    def _deliver(self, game_id: UUID, event: Event) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(game_id, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_offer, queue, event)
+
+
+class RedisEventHub(InProcessEventHub):
+    """Relays events between workers over Redis pub/sub.
+
+    Each worker keeps one pub/sub connection per event loop, subscribed
+    only to the games its own clients watch, and fans messages out
+    locally.  A private channel keeps that connection subscribed, so its
+    listener never stops while games come and go.
+    """
+
+    def __init__(self, client_factory: Callable[[], 'aioredis.Redis']):
+        super().__init__()
+        self._client_factory = client_factory
+        self._worker_channel = f'worker:{uuid4()}'
+        self._clients: 'WeakKeyDictionary[Any, aioredis.Redis]' = (
+            WeakKeyDictionary()
+        )
+        self._connections: 'WeakKeyDictionary[Any, _PubSubConnection]' = (
+            WeakKeyDictionary()
+        )
+
+    @classmethod
+    def from_url(
+            cls,
+            url: str,
+            clients: Optional['RedisClients'] = None,
+    ) -> 'RedisEventHub':
+        # pylint: disable=import-outside-toplevel
+        from games.redis_client import RedisClients
+        shared = clients or RedisClients()
+        return cls(lambda: shared.client(url))
+
+    async def publish(self, game_id: UUID, event: Event) -> None:
+        await self._client().publish(_channel(game_id), dump_event(event))
+
+    async def close(self) -> None:
+        loop = asyncio.get_running_loop()
+        connection = self._connections.pop(loop, None)
+        if connection is not None:
+            await connection.close()
+        client = self._clients.pop(loop, None)
+        if client is not None:
+            await client.close()
+
+    async def _watch(self, game_id: UUID) -> None:
+        await (await self._connection()).pubsub.subscribe(_channel(game_id))
+
+    async def _unwatch(self, game_id: UUID) -> None:
+        await (await self._connection()).pubsub.unsubscribe(_channel(game_id))
+
+    def _client(self) -> 'aioredis.Redis':
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = self._client_factory()
+        return client
+
+    async def _connection(self) -> '_PubSubConnection':
+        loop = asyncio.get_running_loop()
+        connection = self._connections.get(loop)
+        if connection is None:
+            connection = _PubSubConnection(self._client_factory())
+            self._connections[loop] = connection
+            await connection.start(self._worker_channel, self._on_message)
+        return connection
+
+    def _on_message(self, channel: bytes, data: bytes) -> None:
+        game_id = UUID(channel.decode().split(':')[1])
+        self._deliver(game_id, json.loads(data))
+
+
+class _PubSubConnection:
+    def __init__(self, client: 'aioredis.Redis'):
+        self.client = client
+        self.pubsub = client.pubsub(ignore_subscribe_messages=True)
+        self._listener: Optional['asyncio.Task[None]'] = None
+
+    async def start(
+            self,
+            worker_channel: str,
+            on_message: Callable[[bytes, bytes], None],
+    ) -> None:
+        await self.pubsub.subscribe(worker_channel)
+        self._listener = asyncio.ensure_future(self._listen(on_message))
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+        await self.pubsub.close()
+        await self.client.close()
+
+    async def _listen(self, on_message: Callable[[bytes, bytes], None]) -> None:
+        async for message in self.pubsub.listen():
+            if message['type'] == 'message':
+                on_message(message['channel'], message['data'])
+
+
+def _channel(game_id: UUID) -> str:
+    return f'game:{game_id}:events'
+
+
+def _offer(queue: 'asyncio.Queue[Event]', event: Event) -> None:
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        pass
+
+
+async def _drain(queue: 'asyncio.Queue[Event]') -> AsyncIterator[Event]:
+    while True:
+        yield await queue.get()
+
+
+class ShardedEventHub(EventHub):
+    """Relays a game's events over the node of ``shards`` for the game."""
+
+    def __init__(self, shards: 'Shards[EventHub]'):
+        self._shards = shards
+
+    async def publish(self, game_id: UUID, event: Event) -> None:
+        await self._shards[game_id].publish(game_id, event)
+
+    def subscribe(
+            self,
+            game_id: UUID,
+    ) -> AsyncContextManager[AsyncIterator[Event]]:
+        return self._shards[game_id].subscribe(game_id)
+
+    async def close(self) -> None:
+        for hub in self._shards:
+            await hub.close()
+
+
+@lru_cache(maxsize=None)
+def get_event_hub() -> EventHub:
+    """Return the hub for this process, picked by ``REDIS_URL``."""
+    if settings.REDIS_URL:
+        return ShardedEventHub(redis_shards(RedisEventHub.from_url))
+    return InProcessEventHub()
@@ -9,10 +9,13 @@ class PlayerForm(forms.Form):
     def create_player(self) -> Player:
         return Player(**self.cleaned_data)
 
+    def reject_taken_name(self) -> None:
+        self.add_error('name', 'Somebody in this game already has that name')
+
 
 class GameForm(PlayerForm):
     total_time_to_guess = forms.IntegerField(min_value=1, max_value=300)
     should_randomize_fields = forms.BooleanField(required=False)
 
     def create_game(self) -> Game:
-        return Game(**self.cleaned_data)
+        return Game.create(**self.cleaned_data)
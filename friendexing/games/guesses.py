@@ -0,0 +1,460 @@
+"""Collects the guesses of a round apart from the game they belong to.
+
+Each player's guess is its own field, a hash per round in Redis, so a
+whole room guessing at the last second never contends on the game.
+The round's guesses join the game once, when the round is scored,
+and the store refuses guesses to a round from the moment they are
+collected for scoring, so no guess is accepted only to be left out.
+Submissions to a game that arrive together are written together by
+``GuessBuffer``.
+"""
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import timedelta
+from functools import lru_cache
+from time import monotonic
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from uuid import UUID
+from weakref import WeakKeyDictionary
+
+from django.conf import settings
+
+from games.metrics import GUESS_BATCH_SIZE
+from games.models import Game
+from games.sharding import Shards, redis_shards
+from games.stores import GAME_LIFETIME
+
+if TYPE_CHECKING:  # pragma: no cover
+    from games.redis_client import PooledRedis, RedisClients
+
+# Longer guesses are refused; no field of a census record comes close.
+MAX_GUESS_LENGTH = 200
+
+
+class GuessesClosed(Exception):
+    """The round's guesses were collected, so it takes no more."""
+
+
+class Guess(NamedTuple):
+    player_id: UUID
+    guess_id: int
+    guess: str
+    # Whole seconds from the start of the round to the guess.
+    guess_time: int
+
+
+def apply_guesses(game: Game, guesses: Mapping[UUID, Guess]) -> None:
+    """Record each player's guess of the round on the player."""
+    for player in game.players:
+        guess = guesses.get(player.id)
+        if guess is not None:
+            player.guess_id = guess.guess_id
+            player.guess = guess.guess
+            player.guess_time = guess.guess_time
+
+
+class GuessStore(ABC):
+    """Holds each player's latest guess of a round, keyed by player."""
+
+    @abstractmethod
+    async def add_many(
+            self,
+            game_id: UUID,
+            round_number: int,
+            guesses: Sequence[Guess],
+    ) -> None:
+        """Store ``guesses``, replacing earlier guesses of their players.
+
+        Raises ``GuessesClosed``, storing none, once the round's guesses
+        were collected.
+        """
+
+    @abstractmethod
+    async def get_all(
+            self,
+            game_id: UUID,
+            round_number: int,
+    ) -> Dict[UUID, Guess]:
+        pass
+
+    @abstractmethod
+    async def collect(
+            self,
+            game_id: UUID,
+            round_number: int,
+    ) -> Dict[UUID, Guess]:
+        """Return the round's guesses and refuse any more from now on.
+
+        Collecting again returns the same guesses.
+        """
+
+    @abstractmethod
+    async def delete(self, game_id: UUID, round_number: int) -> None:
+        pass
+
+    async def forget(self, game_id: UUID) -> None:
+        """Drop the guesses and closed rounds of a game that has ended.
+
+        Stores whose keys expire by themselves have nothing to forget.
+        """
+
+    async def close(self) -> None:
+        pass
+
+
+class _GameGuesses:
+    __slots__ = ('rounds', 'collected')
+
+    def __init__(self) -> None:
+        self.rounds: Dict[int, Dict[UUID, Guess]] = {}
+        # Rounds are collected in order, so the last collected tells
+        # which are closed.
+        self.collected = 0
+
+
+class InMemoryGuessStore(GuessStore):
+    """Process local store, for development and single worker setups.
+
+    A game's guesses and closed rounds expire together, ``ttl`` after
+    they were last written, as their keys do in Redis.
+    """
+
+    def __init__(
+            self,
+            ttl: timedelta = GAME_LIFETIME,
+            clock: Callable[[], float] = monotonic,
+    ):
+        self._ttl = ttl.total_seconds()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._games: 'OrderedDict[UUID, Tuple[float, _GameGuesses]]' = (
+            OrderedDict()
+        )
+
+    async def add_many(
+            self,
+            game_id: UUID,
+            round_number: int,
+            guesses: Sequence[Guess],
+    ) -> None:
+        with self._lock:
+            game = self._get(game_id)
+            if game is not None and round_number <= game.collected:
+                raise GuessesClosed(game_id, round_number)
+            round_guesses = self._store(game_id).rounds.setdefault(
+                round_number,
+                {},
+            )
+            for guess in guesses:
+                round_guesses[guess.player_id] = guess
+
+    async def get_all(
+            self,
+            game_id: UUID,
+            round_number: int,
+    ) -> Dict[UUID, Guess]:
+        with self._lock:
+            game = self._get(game_id)
+            return dict(game.rounds.get(round_number, {})) if game else {}
+
+    async def collect(
+            self,
+            game_id: UUID,
+            round_number: int,
+    ) -> Dict[UUID, Guess]:
+        with self._lock:
+            game = self._store(game_id)
+            game.collected = max(round_number, game.collected)
+            return dict(game.rounds.get(round_number, {}))
+
+    async def delete(self, game_id: UUID, round_number: int) -> None:
+        with self._lock:
+            game = self._get(game_id)
+            if game is not None:
+                game.rounds.pop(round_number, None)
+
+    async def forget(self, game_id: UUID) -> None:
+        with self._lock:
+            self._games.pop(game_id, None)
+
+    def _get(self, game_id: UUID) -> Optional[_GameGuesses]:
+        self._evict_expired()
+        expires_and_game = self._games.get(game_id)
+        return expires_and_game[1] if expires_and_game else None
+
+    def _store(self, game_id: UUID) -> _GameGuesses:
+        """Return the guesses of a game, made to expire ``ttl`` from now."""
+        game = self._get(game_id) or _GameGuesses()
+        self._games[game_id] = (self._clock() + self._ttl, game)
+        self._games.move_to_end(game_id)
+        return game
+
+    def _evict_expired(self) -> None:
+        current_time = self._clock()
+        while self._games:
+            game_id, (expires, _) = next(iter(self._games.items()))
+            if expires > current_time:
+                break
+            del self._games[game_id]
+
+
+class RedisGuessStore(GuessStore):
+    """Keeps a round's guesses in a hash per game and round.
+
+    Fields are player IDs and values ``guess_id:guess_time:guess``.
+    Collecting sets a key marking the round closed, in the transaction
+    reading the guesses, and writers WATCH that key, so a write racing
+    the collection is retried and refused.  The mark outlives the
+    guesses, for as long as the game.
+    """
+
+    def __init__(
+            self,
+            client_factory: Callable[[], 'PooledRedis'],
+            ttl: timedelta = GAME_LIFETIME,
+    ):
+        self._client_factory = client_factory
+        self._ttl = int(ttl.total_seconds())
+        self._clients: 'WeakKeyDictionary[Any, PooledRedis]' = (
+            WeakKeyDictionary()
+        )
+
+    @classmethod
+    def from_url(
+            cls,
+            url: str,
+            clients: Optional['RedisClients'] = None,
+            **kwargs: Any,
+    ) -> 'RedisGuessStore':
+        # pylint: disable=import-outside-toplevel
+        from games.redis_client import RedisClients
+        shared = clients or RedisClients()
+        return cls(lambda: shared.client(url), **kwargs)
+
+    async def add_many(
+            self,
+            game_id: UUID,
+            round_number: int,
+            guesses: Sequence[Guess],
+    ) -> None:
+        # pylint: disable=import-outside-toplevel
+        from aioredis.exceptions import WatchError
+        if not guesses:
+            return
+        key = self._key(game_id, round_number)
+        closed_key = self._closed_key(game_id, round_number)
+        async with self._client().pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    if await pipe.watch_and_get(closed_key) is not None:
+                        raise GuessesClosed(game_id, round_number)
+                    pipe.multi()
+                    pipe.hset(key, mapping={
+                        str(guess.player_id):
+                            f'{guess.guess_id}:{guess.guess_time}:'
+                            f'{guess.guess}'
+                        for guess in guesses
+                    })
+                    pipe.expire(key, self._ttl)
+                    await pipe.execute()
+                    return
+                except WatchError:
+                    continue
+
+    async def get_all(
+            self,
+            game_id: UUID,
+            round_number: int,
+    ) -> Dict[UUID, Guess]:
+        return self._parse(await self._client().hgetall(
+            self._key(game_id, round_number),
+        ))
+
+    async def collect(
+            self,
+            game_id: UUID,
+            round_number: int,
+    ) -> Dict[UUID, Guess]:
+        async with self._client().pipeline(transaction=True) as pipe:
+            pipe.set(
+                self._closed_key(game_id, round_number),
+                b'',
+                ex=self._ttl,
+            )
+            pipe.hgetall(self._key(game_id, round_number))
+            _, fields = await pipe.execute()
+        return self._parse(fields)
+
+    @staticmethod
+    def _parse(fields: Dict[bytes, bytes]) -> Dict[UUID, Guess]:
+        guesses = {}
+        for field, value in fields.items():
+            player_id = UUID(field.decode())
+            guess_id, guess_time, guess = value.decode().split(':', 2)
+            guesses[player_id] = Guess(
+                player_id,
+                int(guess_id),
+                guess,
+                int(guess_time),
+            )
+        return guesses
+
+    async def delete(self, game_id: UUID, round_number: int) -> None:
+        await self._client().delete(self._key(game_id, round_number))
+
+    async def close(self) -> None:
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+    def _client(self) -> 'PooledRedis':
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = self._client_factory()
+        return client
+
+    @staticmethod
+    def _key(game_id: UUID, round_number: int) -> str:
+        return f'game:{game_id}:round:{round_number}:guesses'
+
+    @staticmethod
+    def _closed_key(game_id: UUID, round_number: int) -> str:
+        return f'game:{game_id}:round:{round_number}:closed'
+
+
+class _Batch:
+    __slots__ = ('guesses', 'written', 'full', 'flusher')
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        # By player, so a player guessing twice is written once.
+        self.guesses: Dict[UUID, Guess] = {}
+        self.written: 'asyncio.Future[None]' = loop.create_future()
+        self.full = asyncio.Event()
+        self.flusher: 'asyncio.Future[None]'
+
+
+class GuessBuffer:
+    """Writes the guesses submitted to a round together.
+
+    The first guess to a round waits up to ``delay`` seconds for others
+    to join it, or until ``max_batch`` have, then all are written with
+    one ``add_many``.  Every submitter waits for that write, so a guess
+    is stored once ``submit`` returns, and ``submit`` raises what the
+    write did, such as ``GuessesClosed``.  Batches are kept per event loop.
+    """
+
+    def __init__(
+            self,
+            store: GuessStore,
+            delay: float = 0.005,
+            max_batch: int = 500,
+    ):
+        self._store = store
+        self._delay = delay
+        self._max_batch = max_batch
+        self._batches: (
+            'WeakKeyDictionary[Any, Dict[Tuple[UUID, int], _Batch]]'
+        ) = WeakKeyDictionary()
+
+    async def submit(
+            self,
+            game_id: UUID,
+            round_number: int,
+            guess: Guess,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        batches = self._batches.setdefault(loop, {})
+        key = (game_id, round_number)
+        batch = batches.get(key)
+        if batch is None:
+            batch = batches[key] = _Batch(loop)
+            batch.flusher = asyncio.ensure_future(self._flush(key, batch))
+        batch.guesses[guess.player_id] = guess
+        if len(batch.guesses) >= self._max_batch:
+            batch.full.set()
+            del batches[key]
+        # Shielded, so one submitter giving up doesn't cancel the others.
+        await asyncio.shield(batch.written)
+
+    async def _flush(self, key: Tuple[UUID, int], batch: _Batch) -> None:
+        try:
+            await asyncio.wait_for(batch.full.wait(), self._delay)
+        except asyncio.TimeoutError:
+            pass
+        batches = self._batches.get(asyncio.get_running_loop(), {})
+        if batches.get(key) is batch:
+            del batches[key]
+        guesses: List[Guess] = list(batch.guesses.values())
+        GUESS_BATCH_SIZE.observe(len(guesses))
+        try:
+            await self._store.add_many(*key, guesses)
+        except Exception as error:  # pylint: disable=broad-except
+            batch.written.set_exception(error)
+        else:
+            batch.written.set_result(None)
+
+
+class ShardedGuessStore(GuessStore):
+    """Keeps guesses with their game, on the node of ``shards`` for it."""
+
+    def __init__(self, shards: 'Shards[GuessStore]'):
+        self._shards = shards
+
+    async def add_many(
+            self,
+            game_id: UUID,
+            round_number: int,
+            guesses: Sequence[Guess],
+    ) -> None:
+        await self._shards[game_id].add_many(game_id, round_number, guesses)
+
+    async def get_all(
+            self,
+            game_id: UUID,
+            round_number: int,
+    ) -> Dict[UUID, Guess]:
+        return await self._shards[game_id].get_all(game_id, round_number)
+
+    async def collect(
+            self,
+            game_id: UUID,
+            round_number: int,
+    ) -> Dict[UUID, Guess]:
+        return await self._shards[game_id].collect(game_id, round_number)
+
+    async def delete(self, game_id: UUID, round_number: int) -> None:
+        await self._shards[game_id].delete(game_id, round_number)
+
+    async def forget(self, game_id: UUID) -> None:
+        await self._shards[game_id].forget(game_id)
+
+    async def close(self) -> None:
+        for store in self._shards:
+            await store.close()
+
+
+@lru_cache(maxsize=None)
+def get_guess_store() -> GuessStore:
+    """Return the store for this process, picked by ``REDIS_URL``."""
+    if settings.REDIS_URL:
+        return ShardedGuessStore(redis_shards(RedisGuessStore.from_url))
+    return InMemoryGuessStore()
+
+
+@lru_cache(maxsize=None)
+def get_guess_buffer() -> GuessBuffer:
+    return GuessBuffer(get_guess_store())
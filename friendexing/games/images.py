@@ -0,0 +1,353 @@
+"""Smaller renditions of batch images, made once and cached on disk.
+
+Renditions are named after a hash of the original's content, so a scan
+imported twice is only resized once and a URL never changes meaning.
+The cache is bounded in bytes and evicts the least recently used
+renditions; evicted ones are made again on demand.  Each original is
+linked to its hash by a small file in the cache, so every process
+sharing the cache can make them, not only the one that hashed it.
+Renditions in other tones are made from the rendition in the original
+one, and cached alongside.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache, partial
+from pathlib import Path
+from time import monotonic
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from django.conf import settings
+from PIL import Image as PillowImage
+from PIL import ImageOps
+
+from games.tones import ORIGINAL, Tone, apply_tone
+
+CONTENT_TYPE = 'image/jpeg'
+EXTENSION = '.jpg'
+# Names the original of a hash, next to its renditions.
+LINK_EXTENSION = '.source'
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+StrPath = Union[str, 'os.PathLike[str]']
+
+# An original's path, modification time and size.
+_SourceKey = Tuple[str, int, int]
+
+
+class Rendition(NamedTuple):
+    name: str
+    max_size: int
+    quality: int
+
+
+THUMBNAIL = Rendition('thumbnail', 240, 70)
+MEDIUM = Rendition('medium', 1280, 80)
+LARGE = Rendition('large', 2560, 85)
+RENDITIONS = {
+    rendition.name: rendition for rendition in (THUMBNAIL, MEDIUM, LARGE)
+}
+
+
+def content_hash(source: StrPath) -> str:
+    digest = hashlib.sha256()
+    with open(source, 'rb') as original:
+        for chunk in iter(lambda: original.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def render(
+        source: StrPath,
+        rendition: Rendition,
+        destination: BinaryIO,
+) -> None:
+    """Write ``source`` shrunk to fit ``rendition`` as a progressive JPEG."""
+    size = (rendition.max_size, rendition.max_size)
+    with PillowImage.open(source) as original:
+        # Lets the JPEG decoder skip detail the rendition won't keep.
+        original.draft('RGB', size)
+        image = ImageOps.exif_transpose(original).convert('RGB')
+    image.thumbnail(size, PillowImage.Resampling.LANCZOS)
+    _save(image, rendition, destination)
+
+
+def render_tone(
+        base: StrPath,
+        rendition: Rendition,
+        tone: Tone,
+        histogram: Optional[List[int]],
+        destination: BinaryIO,
+) -> None:
+    """Write ``base``, a rendition in the original tone, in ``tone``."""
+    with PillowImage.open(base) as original:
+        image = apply_tone(original.convert('RGB'), tone, histogram)
+    _save(image, rendition, destination)
+
+
+def _save(
+        image: PillowImage.Image,
+        rendition: Rendition,
+        destination: BinaryIO,
+) -> None:
+    image.save(
+        destination,
+        'JPEG',
+        quality=rendition.quality,
+        optimize=True,
+        progressive=True,
+    )
+
+
+class _Source(NamedTuple):
+    path: Path
+    key: _SourceKey
+    # When the original was last hashed or read from its link.
+    used: float
+
+
+class DerivativeCache:
+    """Content addressed renditions under ``root``, at most ``max_bytes``."""
+
+    def __init__(
+            self,
+            root: StrPath,
+            max_bytes: int,
+            clock: Callable[[], float] = monotonic,
+    ):
+        self._root = Path(root)
+        self._max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        # File name to size, least recently used first.
+        self._entries: 'OrderedDict[str, int]' = OrderedDict()
+        self._size = 0
+        # Digest to original, least recently used first.
+        self._sources: 'OrderedDict[str, _Source]' = OrderedDict()
+        self._digests: Dict[_SourceKey, str] = {}
+        self._histograms: Dict[str, List[int]] = {}
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def add(self, source: StrPath) -> str:
+        """Make every rendition of ``source`` and return its content hash."""
+        digest = self.digest(source)
+        for rendition in RENDITIONS:
+            self.path(digest, rendition)
+        return digest
+
+    def digest(self, source: StrPath) -> str:
+        source_path = Path(source).resolve()
+        stat = source_path.stat()
+        key = (str(source_path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None:
+            digest = content_hash(source_path)
+        with self._lock:
+            previous = self._sources.get(digest)
+        if previous is None or previous.key != key:
+            self._write_link(digest, key)
+        self._add_source(digest, key)
+        return digest
+
+    def source(self, digest: str) -> Optional[Path]:
+        """Return the original hashing to ``digest``, if one was seen.
+
+        Originals another process hashed are found through their link,
+        as long as they haven't changed since.
+        """
+        with self._lock:
+            source = self._sources.get(digest)
+        if source is not None:
+            return source.path
+        key = self._read_link(digest)
+        if key is None:
+            return None
+        self._add_source(digest, key)
+        return Path(key[0])
+
+    def forget_unused(self, idle_seconds: float, limit: int) -> int:
+        """Forget at most ``limit`` originals unused for ``idle_seconds``.
+
+        Only this process' memory of them goes; their renditions and
+        links stay on disk, so they are read again when next needed.
+        Returns how many were forgotten.
+        """
+        cutoff = self._clock() - idle_seconds
+        forgotten = 0
+        with self._lock:
+            while self._sources and forgotten < limit:
+                digest, source = next(iter(self._sources.items()))
+                if source.used > cutoff:
+                    break
+                del self._sources[digest]
+                self._digests.pop(source.key, None)
+                self._histograms.pop(digest, None)
+                forgotten += 1
+        return forgotten
+
+    def path(
+            self,
+            digest: str,
+            rendition: str,
+            tone: Tone = ORIGINAL,
+    ) -> Optional[Path]:
+        """Return the file of a rendition, making it if it is missing.
+
+        Returns ``None`` for renditions of originals no process sharing
+        the cache has seen.  Raises ``KeyError`` for unknown renditions.
+        """
+        toned = '' if tone == ORIGINAL else f'-{tone.name}'
+        name = f'{digest}-{RENDITIONS[rendition].name}{toned}{EXTENSION}'
+        path = self._root / name
+        with self._lock:
+            is_cached = name in self._entries
+            if is_cached:
+                self._entries.move_to_end(name)
+        if path.exists():
+            if not is_cached:
+                # Made by another process, such as an import.
+                self._remember(name, path.stat().st_size)
+            return path
+        if tone != ORIGINAL:
+            return self._render_tone(digest, RENDITIONS[rendition], tone, path)
+        source = self.source(digest)
+        if source is None:
+            return None
+        self._render(path, partial(render, source, RENDITIONS[rendition]))
+        return path
+
+    def histogram(self, digest: str) -> Optional[List[int]]:
+        """Return the histogram of an image's medium rendition.
+
+        Every rendition and tile of an image is equalized with it, so
+        they all look alike.
+        """
+        with self._lock:
+            cached = self._histograms.get(digest)
+        if cached is not None:
+            return cached
+        path = self.path(digest, MEDIUM.name)
+        if path is None:
+            return None
+        with PillowImage.open(path) as image:
+            histogram: List[int] = image.convert('RGB').histogram()
+        with self._lock:
+            self._histograms[digest] = histogram
+        return histogram
+
+    def _render_tone(
+            self,
+            digest: str,
+            rendition: Rendition,
+            tone: Tone,
+            path: Path,
+    ) -> Optional[Path]:
+        base = self.path(digest, rendition.name)
+        histogram = self.histogram(digest) if tone.equalize else None
+        if base is None or (tone.equalize and histogram is None):
+            return None
+        self._render(
+            path,
+            partial(render_tone, base, rendition, tone, histogram),
+        )
+        return path
+
+    def _render(self, path: Path, write: Callable[[BinaryIO], None]) -> None:
+        self._write(path, write)
+        self._remember(path.name, path.stat().st_size)
+
+    def _write(self, path: Path, write: Callable[[BinaryIO], None]) -> None:
+        # Written next to its final name and moved into place, so readers
+        # never see a partial file, even with several workers.
+        descriptor, temporary_name = tempfile.mkstemp(
+            dir=self._root,
+            suffix='.tmp',
+        )
+        try:
+            with os.fdopen(descriptor, 'wb') as temporary:
+                write(temporary)
+            os.replace(temporary_name, path)
+        except BaseException:
+            os.unlink(temporary_name)
+            raise
+
+    def _add_source(self, digest: str, key: _SourceKey) -> None:
+        with self._lock:
+            self._digests[key] = digest
+            previous = self._sources.pop(digest, None)
+            if previous is not None and previous.key != key:
+                # A copy, or the original changed; one path is kept.
+                self._digests.pop(previous.key, None)
+            self._sources[digest] = _Source(Path(key[0]), key, self._clock())
+
+    def _write_link(self, digest: str, key: _SourceKey) -> None:
+        def write(link: BinaryIO) -> None:
+            link.write(json.dumps(key).encode())
+
+        self._write(self._root / f'{digest}{LINK_EXTENSION}', write)
+
+    def _read_link(self, digest: str) -> Optional[_SourceKey]:
+        """Return the original linked to ``digest`` if it is unchanged."""
+        try:
+            path, mtime_ns, size = json.loads(
+                (self._root / f'{digest}{LINK_EXTENSION}').read_text(),
+            )
+            stat = Path(path).stat()
+        except (OSError, ValueError):
+            return None
+        if (stat.st_mtime_ns, stat.st_size) != (mtime_ns, size):
+            return None
+        return path, mtime_ns, size
+
+    def _remember(self, name: str, size: int) -> None:
+        with self._lock:
+            self._size += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+            evicted = []
+            while self._size > self._max_bytes and len(self._entries) > 1:
+                evicted_name, evicted_size = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                evicted.append(evicted_name)
+        for evicted_name in evicted:
+            try:
+                (self._root / evicted_name).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _load(self) -> None:
+        # Access order is not kept across restarts, so the oldest files
+        # are taken to be the least recently used.
+        files = sorted(
+            (path.stat().st_mtime, path.name, path.stat().st_size)
+            for path in self._root.glob(f'*{EXTENSION}')
+        )
+        for _, name, size in files:
+            self._entries[name] = size
+            self._size += size
+
+
+@lru_cache(maxsize=None)
+def get_derivative_cache() -> DerivativeCache:
+    return DerivativeCache(
+        settings.IMAGE_CACHE_DIR,
+        settings.IMAGE_CACHE_MAX_BYTES,
+    )
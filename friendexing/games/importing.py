@@ -0,0 +1,186 @@
+"""Builds batches from a file of records and a directory of their images.
+
+Records come from CSV, with a header row, or JSON Lines.  Each row names
+the image it was indexed from in an ``image`` column, relative to the
+image directory.  Rows are read and checked one at a time, so the file
+is never held whole, but every record is kept in the batch until it is
+stored: an import needs memory for the records themselves, with values
+repeated down a column shared, though not for the file's text.
+"""
+import csv
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from games.codec import SCHEMA_TYPES
+from games.models import Batch, Image, Record
+
+IMAGE_COLUMN = 'image'
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.tif', '.tiff', '.webp')
+
+TYPES = {field_type.__name__: field_type for field_type in SCHEMA_TYPES}
+BOOLEANS = ('', 'true', 'false', 'yes', 'no', '1', '0')
+
+# A row of a records file and the line it starts on.
+Row = Tuple[int, Dict[str, str]]
+
+
+class BatchImportError(ValueError):
+    pass
+
+
+def parse_schema(spec: str) -> Dict[str, type]:
+    """Parse ``name:type,name:type``, where types default to ``str``."""
+    schema: Dict[str, type] = {}
+    for field in spec.split(','):
+        name, _, type_name = field.strip().partition(':')
+        if not name or name == IMAGE_COLUMN or name in schema:
+            raise BatchImportError(f'Bad field name {name!r}')
+        try:
+            schema[name] = TYPES[type_name or 'str']
+        except KeyError as error:
+            raise BatchImportError(
+                f'Unknown type {type_name!r} for {name}, '
+                f'expected one of {", ".join(TYPES)}',
+            ) from error
+    return schema
+
+
+def read_rows(path: Path) -> Iterator[Row]:
+    if path.suffix == '.csv':
+        return _read_csv(path)
+    if path.suffix == '.jsonl':
+        return _read_json_lines(path)
+    raise BatchImportError(f'Expected a .csv or .jsonl file, got {path.name}')
+
+
+def _read_csv(path: Path) -> Iterator[Row]:
+    with path.open(newline='', encoding='utf-8') as records_file:
+        reader = csv.DictReader(records_file)
+        line_number = reader.line_num + 1
+        for row in reader:
+            if None in row:
+                raise BatchImportError(
+                    f'Line {line_number}: more values than columns',
+                )
+            yield line_number, row
+            line_number = reader.line_num + 1
+
+
+def _read_json_lines(path: Path) -> Iterator[Row]:
+    with path.open(encoding='utf-8') as records_file:
+        for line_number, line in enumerate(records_file, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                raise BatchImportError(
+                    f'Line {line_number}: {error}',
+                ) from error
+            if not isinstance(row, dict):
+                raise BatchImportError(f'Line {line_number}: not an object')
+            yield line_number, {
+                name: '' if value is None else str(value)
+                for name, value in row.items()
+            }
+
+
+def _is_int(value: str) -> bool:
+    try:
+        int(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _is_float(value: str) -> bool:
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+_VALIDATORS: Dict[type, Callable[[str], bool]] = {
+    str: lambda value: True,
+    int: _is_int,
+    float: _is_float,
+    bool: lambda value: value.lower() in BOOLEANS,
+}
+
+
+def validate_rows(
+        rows: Iterator[Row],
+        schema: Dict[str, type],
+) -> Iterator[Tuple[int, str, List[str]]]:
+    """Yield each row's line, image and values in schema order.
+
+    Blank values are allowed for every type, as fields on a page are
+    often left empty.
+    """
+    columns = set(schema) | {IMAGE_COLUMN}
+    validators = [
+        (name, _VALIDATORS[field_type]) for name, field_type in schema.items()
+    ]
+    for line_number, row in rows:
+        if row.keys() != columns:
+            missing = ', '.join(sorted(columns - row.keys()))
+            extra = ', '.join(sorted(row.keys() - columns))
+            raise BatchImportError(
+                f'Line {line_number}: missing columns [{missing}], '
+                f'unexpected columns [{extra}]',
+            )
+        values = []
+        for name, is_valid in validators:
+            value = row[name].strip()
+            if value and not is_valid(value):
+                raise BatchImportError(
+                    f'Line {line_number}: {value!r} is not a valid '
+                    f'{schema[name].__name__} for {name}',
+                )
+            values.append(value)
+        yield line_number, row[IMAGE_COLUMN], values
+
+
+def scan_images(directory: Path) -> Dict[str, Image]:
+    """Return an image per file of ``directory``, in name order."""
+    names = sorted(
+        entry.name
+        for entry in os.scandir(directory)
+        if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    return {
+        name: Image(False, source=str((directory / name).resolve()))
+        for name in names
+    }
+
+
+def import_batch(
+        records_path: Path,
+        images_directory: Path,
+        schema: Dict[str, type],
+) -> Tuple[Batch, int]:
+    """Build a batch and return it with the number of records read.
+
+    Images without records are kept as not indexable.
+    """
+    images = scan_images(images_directory)
+    names = tuple(schema)
+    count = 0
+    rows = validate_rows(read_rows(records_path), schema)
+    for line_number, image_name, values in rows:
+        image = images.get(image_name)
+        if image is None:
+            raise BatchImportError(
+                f'Line {line_number}: no image {image_name!r} '
+                f'in {images_directory}',
+            )
+        image.indexable = True
+        # Values repeat a lot down a column, such as places and given
+        # names, and interning lets records share them.
+        image.records.append(Record(names, list(map(sys.intern, values))))
+        count += 1
+    return Batch(schema, list(images.values())), count
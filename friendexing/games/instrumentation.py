@@ -0,0 +1,180 @@
+"""Hooks feeding ``games.metrics`` from Django."""
+import cProfile
+import io
+import logging
+import pstats
+from itertools import count
+from time import perf_counter, strftime
+from typing import Any, Awaitable, Callable, Dict, Optional, Union, cast
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest
+from django.http.response import HttpResponseBase
+from django.template.backends.django import DjangoTemplates, Template
+from django.utils.safestring import SafeString
+
+from games.metrics import (
+    PROFILED_REQUESTS,
+    REQUEST_SECONDS,
+    RESPONSE_BYTES,
+    TEMPLATE_SECONDS,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+# Functions listed when logging the profile of a slow request.
+PROFILE_LOG_FUNCTIONS = 15
+
+GetResponse = Callable[
+    [HttpRequest],
+    Union[HttpResponseBase, Awaitable[HttpResponseBase]],
+]
+
+
+def view_name(request: HttpRequest) -> str:
+    """Name the view that handled ``request``, such as ``GameCreate``."""
+    match = request.resolver_match
+    if match is None:
+        return 'unmatched'
+    view = getattr(match.func, 'view_class', match.func)
+    return str(view.__name__)
+
+
+def body_size(response: HttpResponseBase) -> Optional[int]:
+    if not response.streaming:
+        return len(response.content)  # type: ignore
+    length = response.get('Content-Length')
+    return int(length) if length else None
+
+
+class InstrumentationMiddleware:
+    """Times every request by view and profiles a sample of slow ones.
+
+    With ``PROFILE_EVERY_N_REQUESTS`` set, every nth request runs under
+    ``cProfile`` and, when it takes ``PROFILE_SLOW_REQUEST_SECONDS`` or
+    more, its profile is logged and saved to ``PROFILE_DIR``.  Under
+    ASGI the profile also holds whatever else the event loop ran while
+    the request awaited.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: GetResponse):
+        self.get_response = get_response
+        self._profile_every = settings.PROFILE_EVERY_N_REQUESTS
+        self._requests = count(1)
+        # Django passes an async get_response under ASGI, and then
+        # awaits this middleware too.
+        self._is_async = iscoroutinefunction(get_response)
+        if self._is_async:
+            markcoroutinefunction(self)
+
+    def __call__(
+            self,
+            request: HttpRequest,
+    ) -> Union[HttpResponseBase, Awaitable[HttpResponseBase]]:
+        if self._is_async:
+            return self._acall(request)
+        profiler = self._profiler()
+        start = perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            response = cast(HttpResponseBase, self.get_response(request))
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            elapsed = perf_counter() - start
+        self._record(request, response, profiler, elapsed)
+        return response
+
+    async def _acall(self, request: HttpRequest) -> HttpResponseBase:
+        profiler = self._profiler()
+        start = perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            response = await cast(
+                Awaitable[HttpResponseBase],
+                self.get_response(request),
+            )
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            elapsed = perf_counter() - start
+        self._record(request, response, profiler, elapsed)
+        return response
+
+    def _profiler(self) -> Optional[cProfile.Profile]:
+        if (
+                self._profile_every
+                and not next(self._requests) % self._profile_every
+        ):
+            return cProfile.Profile()
+        return None
+
+    def _record(
+            self,
+            request: HttpRequest,
+            response: HttpResponseBase,
+            profiler: Optional[cProfile.Profile],
+            elapsed: float,
+    ) -> None:
+        view = view_name(request)
+        REQUEST_SECONDS.observe(elapsed, view, request.method or '')
+        size = body_size(response)
+        if size is not None:
+            RESPONSE_BYTES.inc(view, amount=size)
+        if (
+                profiler is not None
+                and elapsed >= settings.PROFILE_SLOW_REQUEST_SECONDS
+        ):
+            self._save_profile(profiler, view, elapsed)
+
+    @staticmethod
+    def _save_profile(
+            profiler: cProfile.Profile,
+            view: str,
+            elapsed: float,
+    ) -> None:
+        PROFILED_REQUESTS.inc(view)
+        stats = io.StringIO()
+        pstats.Stats(profiler, stream=stats).sort_stats(
+            'cumulative',
+        ).print_stats(PROFILE_LOG_FUNCTIONS)
+        settings.PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        path = settings.PROFILE_DIR / (
+            f'{strftime("%Y%m%d-%H%M%S")}-{view}-{elapsed * 1000:.0f}ms.prof'
+        )
+        profiler.dump_stats(path)
+        LOGGER.warning(
+            'Slow request to %s took %.3fs, profile saved to %s\n%s',
+            view,
+            elapsed,
+            path,
+            stats.getvalue(),
+        )
+
+
+class TimedTemplate(Template):
+    def render(
+            self,
+            context: Optional[Dict[str, Any]] = None,
+            request: Optional[HttpRequest] = None,
+    ) -> SafeString:
+        name = str(self.origin.template_name or 'string')
+        with TEMPLATE_SECONDS.time(name):
+            return super().render(context, request)  # type: ignore
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, recording render times by template."""
+
+    def from_string(self, template_code: str) -> TimedTemplate:
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name: str) -> TimedTemplate:
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
@@ -0,0 +1,547 @@
+"""Ranks the players of every game, updated as rounds are scored.
+
+Equal scores share a rank, so the many players still on the same score
+never reorder among themselves.  Reading a rank or the top of a board
+sorts nothing, and an update reports only the players whose rank or
+score changed, which is what the ``scores`` event carries.
+
+A player's rank is one more than the number of players scoring higher,
+so a player going from one score to another moves only the ranks of
+players scoring between the two.  An update reads just those players
+of the board, never the whole of it.
+"""
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from datetime import timedelta
+from functools import lru_cache
+from time import monotonic
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+from uuid import UUID
+from weakref import WeakKeyDictionary
+
+from django.conf import settings
+
+from games.sharding import Shards, redis_shards
+from games.stores import GAME_LIFETIME
+
+if TYPE_CHECKING:  # pragma: no cover
+    from games.redis_client import PooledRedis, RedisClients
+
+# Sorts before every player of the same score.
+_FIRST_ID = UUID(int=0)
+
+# Updates changing more than this share of a board sort it again
+# instead of moving every entry, as after a round most scores change.
+RESORT_SHARE = 0.125
+
+
+class Standing(NamedTuple):
+    player_id: UUID
+    rank: int
+    score: int
+
+
+def rank_players(scores: Iterable[Tuple[UUID, int]]) -> Iterator[Standing]:
+    """Rank ``scores``, given highest first, from 1."""
+    rank = 0
+    previous_score = None
+    for position, (player_id, score) in enumerate(scores, 1):
+        if score != previous_score:
+            rank = position
+            previous_score = score
+        yield Standing(player_id, rank, score)
+
+
+# A player's score before an update, None if unranked, and after it.
+ScoreChange = Tuple[UUID, Optional[int], int]
+
+
+def shifted_ranges(
+        changes: Iterable[ScoreChange],
+) -> List[Tuple[Optional[int], int]]:
+    """Return the ranges of scores whose ranks ``changes`` may shift.
+
+    Each range is ``(low, high)``, from ``low`` up to but not including
+    ``high``, and open below when ``low`` is None.  Overlapping ranges
+    are merged, so no score is in two of them.
+    """
+    ranges = sorted(
+        (
+            (None, new) if old is None else (min(old, new), max(old, new))
+            for _, old, new in changes
+        ),
+        key=lambda score_range: (
+            score_range[0] is not None,
+            score_range[0] or 0,
+        ),
+    )
+    merged: List[Tuple[Optional[int], int]] = []
+    for low, high in ranges:
+        if merged and (low is None or low <= merged[-1][1]):
+            merged[-1] = (merged[-1][0], max(high, merged[-1][1]))
+        else:
+            merged.append((low, high))
+    return merged
+
+
+def rank_shifts(changes: Iterable[ScoreChange]) -> Callable[[int], int]:
+    """Return how far ``changes`` move the rank of a player on a score.
+
+    That is the players they take above the score less those they take
+    below it.  Positive shifts are towards the bottom of the board.
+    """
+    new_scores = sorted(new for _, _, new in changes)
+    old_scores = sorted(old for _, old, _ in changes if old is not None)
+
+    def shift(score: int) -> int:
+        now_above = len(new_scores) - bisect_right(new_scores, score)
+        was_above = len(old_scores) - bisect_right(old_scores, score)
+        return now_above - was_above
+
+    return shift
+
+
+def changed_standings(
+        changes: List[ScoreChange],
+        new_ranks: Iterable[int],
+        others: Iterable[Tuple[UUID, int, int]],
+) -> List[Standing]:
+    """Return the standings of changed players and those they overtook.
+
+    ``new_ranks`` are the ranks of ``changes`` after the update, and
+    ``others`` the players of ``shifted_ranges`` with their score and
+    rank before it.  Standings come best first, as on the board.
+    """
+    standings = [
+        Standing(player_id, rank, new)
+        for (player_id, _, new), rank in zip(changes, new_ranks)
+    ]
+    changed = {player_id for player_id, _, _ in changes}
+    rank_shift = rank_shifts(changes)
+    for player_id, score, rank in others:
+        shift = rank_shift(score)
+        if shift and player_id not in changed:
+            standings.append(Standing(player_id, rank + shift, score))
+    # By the integer of the ID, which compares much faster than a UUID.
+    standings.sort(
+        key=lambda standing: (-standing.score, standing.player_id.int),
+    )
+    return standings
+
+
+class Leaderboard(ABC):
+    """Holds the score of every ranked player of a game."""
+
+    @abstractmethod
+    async def update(
+            self,
+            game_id: UUID,
+            scores: Mapping[UUID, int],
+    ) -> List[Standing]:
+        """Set the score of each player in ``scores``, ranking new ones."""
+
+    @abstractmethod
+    async def rank(
+            self,
+            game_id: UUID,
+            player_id: UUID,
+    ) -> Optional[Standing]:
+        pass
+
+    @abstractmethod
+    async def top(self, game_id: UUID, count: int) -> List[Standing]:
+        pass
+
+    async def standings(
+            self,
+            game_id: UUID,
+            player_id: UUID,
+            count: int,
+    ) -> Tuple[List[Standing], Optional[Standing]]:
+        """Return both the ``top`` standings and the player's ``rank``."""
+        return (
+            await self.top(game_id, count),
+            await self.rank(game_id, player_id),
+        )
+
+    async def close(self) -> None:
+        pass
+
+
+class _Board:
+    __slots__ = ('scores', 'entries')
+
+    def __init__(self) -> None:
+        self.scores: Dict[UUID, int] = {}
+        # ``(-score, player_id)`` in ascending order, best first.
+        self.entries: List[Tuple[int, UUID]] = []
+
+    def standings(
+            self,
+            start: int = 0,
+            end: Optional[int] = None,
+    ) -> Iterator[Standing]:
+        """Rank ``entries[start:end]``, from 1 at ``start``.
+
+        ``start`` must be the first entry of its score.
+        """
+        return rank_players(
+            (player_id, -negated_score)
+            for negated_score, player_id in self.entries[start:end]
+        )
+
+    def slices(
+            self,
+            score_ranges: Iterable[Tuple[Optional[int], int]],
+    ) -> Iterator[Tuple[int, Optional[int]]]:
+        """Yield where the scores of ``shifted_ranges`` are in ``entries``."""
+        for low, high in score_ranges:
+            yield (
+                self.position_of(high - 1),
+                None if low is None else self.position_of(low - 1),
+            )
+
+    def position_of(self, score: int) -> int:
+        """Return how many entries score more than ``score``."""
+        return bisect_left(self.entries, (-score, _FIRST_ID))
+
+    def rank_of(self, score: int) -> int:
+        return self.position_of(score) + 1
+
+
+class InMemoryLeaderboard(Leaderboard):
+    """Process local boards, kept sorted, for single worker setups.
+
+    Boards expire like the games of ``InMemoryGameStore``.
+    """
+
+    def __init__(
+            self,
+            ttl: timedelta = GAME_LIFETIME,
+            clock: Callable[[], float] = monotonic,
+    ):
+        self._ttl = ttl.total_seconds()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._boards: 'OrderedDict[UUID, Tuple[float, _Board]]' = (
+            OrderedDict()
+        )
+
+    async def update(
+            self,
+            game_id: UUID,
+            scores: Mapping[UUID, int],
+    ) -> List[Standing]:
+        with self._lock:
+            self._evict_expired()
+            expires_and_board = self._boards.get(game_id)
+            board = expires_and_board[1] if expires_and_board else _Board()
+            self._store(game_id, board)
+            changes = [
+                (player_id, board.scores.get(player_id), score)
+                for player_id, score in scores.items()
+                if board.scores.get(player_id) != score
+            ]
+            if not changes:
+                return []
+            others = [
+                (standing.player_id, standing.score, start + standing.rank)
+                for start, end in board.slices(shifted_ranges(changes))
+                for standing in board.standings(start, end)
+            ]
+            if len(changes) > len(board.entries) * RESORT_SHARE:
+                board.scores.update(
+                    (player_id, score) for player_id, _, score in changes
+                )
+                board.entries = sorted(
+                    (-score, player_id)
+                    for player_id, score in board.scores.items()
+                )
+            else:
+                for player_id, old_score, score in changes:
+                    if old_score is not None:
+                        del board.entries[bisect_left(
+                            board.entries,
+                            (-old_score, player_id),
+                        )]
+                    insort(board.entries, (-score, player_id))
+                    board.scores[player_id] = score
+            return changed_standings(
+                changes,
+                (board.rank_of(score) for _, _, score in changes),
+                others,
+            )
+
+    async def rank(
+            self,
+            game_id: UUID,
+            player_id: UUID,
+    ) -> Optional[Standing]:
+        with self._lock:
+            board = self._get(game_id)
+            score = board.scores.get(player_id) if board else None
+            if board is None or score is None:
+                return None
+            return Standing(player_id, board.rank_of(score), score)
+
+    async def top(self, game_id: UUID, count: int) -> List[Standing]:
+        if count < 1:
+            return []
+        with self._lock:
+            board = self._get(game_id)
+            return list(board.standings(0, count)) if board else []
+
+    def _get(self, game_id: UUID) -> Optional[_Board]:
+        self._evict_expired()
+        expires_and_board = self._boards.get(game_id)
+        if expires_and_board is None:
+            return None
+        self._store(game_id, expires_and_board[1])
+        return expires_and_board[1]
+
+    def _store(self, game_id: UUID, board: _Board) -> None:
+        self._boards[game_id] = (self._clock() + self._ttl, board)
+        self._boards.move_to_end(game_id)
+
+    def _evict_expired(self) -> None:
+        current_time = self._clock()
+        while self._boards:
+            game_id, (expires, _) = next(iter(self._boards.items()))
+            if expires > current_time:
+                break
+            del self._boards[game_id]
+
+
+class RedisLeaderboard(Leaderboard):
+    """Keeps a board as a sorted set under ``game:<id>:leaderboard``.
+
+    Ranks are counted with ZCOUNT rather than read with ZREVRANK, which
+    would order equal scores by player ID.
+    """
+
+    def __init__(
+            self,
+            client_factory: Callable[[], 'PooledRedis'],
+            ttl: timedelta = GAME_LIFETIME,
+    ):
+        self._client_factory = client_factory
+        self._ttl = int(ttl.total_seconds())
+        self._clients: 'WeakKeyDictionary[Any, PooledRedis]' = (
+            WeakKeyDictionary()
+        )
+
+    @classmethod
+    def from_url(
+            cls,
+            url: str,
+            clients: Optional['RedisClients'] = None,
+            **kwargs: Any,
+    ) -> 'RedisLeaderboard':
+        # pylint: disable=import-outside-toplevel
+        from games.redis_client import RedisClients
+        shared = clients or RedisClients()
+        return cls(lambda: shared.client(url), **kwargs)
+
+    async def update(
+            self,
+            game_id: UUID,
+            scores: Mapping[UUID, int],
+    ) -> List[Standing]:
+        # pylint: disable=import-outside-toplevel
+        from aioredis.exceptions import WatchError
+        if not scores:
+            return []
+        key = self._key(game_id)
+        async with self._client().pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    # Watched, so the board read is the one updated.
+                    old_scores = await pipe.watch_and_read(key, *(
+                        ('ZSCORE', key, str(player_id))
+                        for player_id in scores
+                    ))
+                    changes = [
+                        (player_id, _score_or_none(old), score)
+                        for (player_id, score), old
+                        in zip(scores.items(), old_scores)
+                        if _score_or_none(old) != score
+                    ]
+                    if not changes:
+                        return []
+                    ranges = shifted_ranges(changes)
+                    pipe.multi()
+                    for low, high in ranges:
+                        pipe.zrangebyscore(
+                            key,
+                            '-inf' if low is None else low,
+                            f'({high}',
+                            withscores=True,
+                            score_cast_func=int,
+                        )
+                        pipe.zcount(key, high, '+inf')
+                    pipe.zadd(key, {
+                        str(player_id): score
+                        for player_id, _, score in changes
+                    })
+                    for _, _, score in changes:
+                        pipe.zcount(key, f'({score}', '+inf')
+                    pipe.expire(key, self._ttl)
+                    replies = await pipe.execute()
+                    break
+                except WatchError:
+                    continue
+        others = []
+        for number in range(len(ranges)):
+            entries, higher = replies[2 * number:2 * number + 2]
+            entry_scores = [score for _, score in entries]
+            for member, score in entries:
+                above = len(entries) - bisect_right(entry_scores, score)
+                others.append(
+                    (UUID(member.decode()), score, higher + above + 1),
+                )
+        new_higher = replies[2 * len(ranges) + 1:-1]
+        return changed_standings(
+            changes,
+            (higher + 1 for higher in new_higher),
+            others,
+        )
+
+    async def rank(
+            self,
+            game_id: UUID,
+            player_id: UUID,
+    ) -> Optional[Standing]:
+        client = self._client()
+        key = self._key(game_id)
+        score = await client.zscore(key, str(player_id))
+        if score is None:
+            return None
+        higher = await client.zcount(key, f'({score}', '+inf')
+        return Standing(player_id, higher + 1, int(score))
+
+    async def top(self, game_id: UUID, count: int) -> List[Standing]:
+        if count < 1:
+            return []
+        return list(_standings(await self._client().zrevrange(
+            self._key(game_id),
+            0,
+            count - 1,
+            withscores=True,
+            score_cast_func=int,
+        )))
+
+    async def standings(
+            self,
+            game_id: UUID,
+            player_id: UUID,
+            count: int,
+    ) -> Tuple[List[Standing], Optional[Standing]]:
+        # One round trip, and another only for players below the top.
+        key = self._key(game_id)
+        async with self._client().pipeline(transaction=False) as pipe:
+            pipe.zrevrange(
+                key,
+                0,
+                max(count, 1) - 1,
+                withscores=True,
+                score_cast_func=int,
+            )
+            pipe.zscore(key, str(player_id))
+            entries, score = await pipe.execute()
+        top = list(_standings(entries)) if count >= 1 else []
+        if score is None:
+            return top, None
+        for standing in _standings(entries):
+            if standing.player_id == player_id:
+                return top, standing
+        higher = await self._client().zcount(key, f'({score}', '+inf')
+        return top, Standing(player_id, higher + 1, int(score))
+
+    async def close(self) -> None:
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+    def _client(self) -> 'PooledRedis':
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = self._client_factory()
+        return client
+
+    @staticmethod
+    def _key(game_id: UUID) -> str:
+        return f'game:{game_id}:leaderboard'
+
+
+def _score_or_none(score: Optional[float]) -> Optional[int]:
+    return None if score is None else int(score)
+
+
+def _standings(entries: List[Tuple[bytes, int]]) -> Iterator[Standing]:
+    return rank_players(
+        (UUID(member.decode()), score) for member, score in entries
+    )
+
+
+class ShardedLeaderboard(Leaderboard):
+    """Keeps each board with its game, on the node of ``shards`` for it."""
+
+    def __init__(self, shards: 'Shards[Leaderboard]'):
+        self._shards = shards
+
+    async def update(
+            self,
+            game_id: UUID,
+            scores: Mapping[UUID, int],
+    ) -> List[Standing]:
+        return await self._shards[game_id].update(game_id, scores)
+
+    async def rank(
+            self,
+            game_id: UUID,
+            player_id: UUID,
+    ) -> Optional[Standing]:
+        return await self._shards[game_id].rank(game_id, player_id)
+
+    async def top(self, game_id: UUID, count: int) -> List[Standing]:
+        return await self._shards[game_id].top(game_id, count)
+
+    async def standings(
+            self,
+            game_id: UUID,
+            player_id: UUID,
+            count: int,
+    ) -> Tuple[List[Standing], Optional[Standing]]:
+        return await self._shards[game_id].standings(
+            game_id,
+            player_id,
+            count,
+        )
+
+    async def close(self) -> None:
+        for leaderboard in self._shards:
+            await leaderboard.close()
+
+
+@lru_cache(maxsize=None)
+def get_leaderboard() -> Leaderboard:
+    """Return the leaderboard for this process, picked by ``REDIS_URL``."""
+    if settings.REDIS_URL:
+        return ShardedLeaderboard(redis_shards(RedisLeaderboard.from_url))
+    return InMemoryLeaderboard()
@@ -0,0 +1,85 @@
+import resource
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+from uuid import UUID
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+
+from games.images import get_derivative_cache
+from games.importing import BatchImportError, import_batch, parse_schema
+from games.stores import GameNotFound, get_game_store
+
+
+class Command(BaseCommand):
+    help = 'Import a batch of records and their images into a game.'  # noqa: F841
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('game_id', type=UUID)
+        parser.add_argument(
+            'records',
+            type=Path,
+            help='A .csv file with a header row or a .jsonl file',
+        )
+        parser.add_argument('images', type=Path)
+        parser.add_argument(
+            '--schema',
+            required=True,
+            help='The fields of a record, as name:type,name:type',
+        )
+        parser.add_argument(
+            '--skip-renditions',
+            action='store_true',
+            help="Resize images when they're first viewed instead",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if not settings.REDIS_URL:
+            raise CommandError(
+                'Set REDIS_URL, games kept in process memory are lost '
+                'when this command exits',
+            )
+        start = perf_counter()
+        try:
+            batch, count = import_batch(
+                options['records'],
+                options['images'],
+                parse_schema(options['schema']),
+            )
+        except (BatchImportError, OSError) as error:
+            raise CommandError(error) from error
+        elapsed = perf_counter() - start
+
+        # Views name renditions by the digests kept in the game, so they
+        # never hash originals themselves.
+        cache = get_derivative_cache()
+        for image in batch.images:
+            assert image.source
+            image.digest = cache.digest(image.source)
+
+        try:
+            async_to_sync(get_game_store().update)(
+                options['game_id'],
+                lambda game: game.batches.append(batch),
+            )
+        except GameNotFound as error:
+            raise CommandError(f'No game {options["game_id"]}') from error
+
+        if not options['skip_renditions']:
+            for image in batch.images:
+                assert image.source
+                cache.add(image.source)
+
+        # ru_maxrss is in KiB on Linux.
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(
+            f'Imported {count} records on {len(batch.images)} images '
+            f'in {elapsed:.2f}s ({count / max(elapsed, 1e-9):.0f} rows/s), '
+            f'peak RSS {peak_rss:.1f} MiB',
+        )
@@ -0,0 +1,45 @@
+from typing import Any
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+
+from games.sharding import HashRing, rebalance
+
+
+class Command(BaseCommand):
+    help = (  # noqa: F841
+        'Move games to the Redis nodes added to REDIS_URL.  Run it before '
+        'workers serve with the added nodes, while none is serving.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            'added',
+            nargs='+',
+            metavar='url',
+            help='A Redis URL to add to those in REDIS_URL',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        # pylint: disable=import-outside-toplevel
+        import aioredis
+        if not settings.REDIS_URLS:
+            raise CommandError('Set REDIS_URL to the nodes games are on now')
+        try:
+            old = HashRing(settings.REDIS_URLS)
+            new = HashRing([*settings.REDIS_URLS, *options['added']])
+        except ValueError as error:
+            raise CommandError(error) from error
+
+        moved = async_to_sync(rebalance)(old, new, aioredis.from_url)
+
+        for node, count in moved.items():
+            self.stdout.write(f'{count} games moved to {node}')
+        self.stdout.write(
+            f'Set REDIS_URL={",".join(new.nodes)} and restart the workers',
+        )
@@ -0,0 +1,84 @@
+import os
+import sys
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+
+from games.serving import Supervisor, bind, warm_up
+
+# Players keep fetching images and manifests while a round runs, so
+# connections are kept open for longer than between most page views.
+DEFAULT_KEEPALIVE_SECONDS = 20
+
+
+class Command(BaseCommand):
+    help = (  # noqa: F841
+        'Serve the ASGI application from several worker processes, '
+        'stopping gracefully on SIGTERM or SIGINT.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--host', default='0.0.0.0')  # nosec
+        parser.add_argument('--port', type=int, default=8000)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Worker processes, one per core by default',
+        )
+        parser.add_argument(
+            '--keepalive',
+            type=int,
+            default=DEFAULT_KEEPALIVE_SECONDS,
+            help='Seconds to keep an idle connection open',
+        )
+        parser.add_argument(
+            '--graceful-timeout',
+            type=int,
+            default=30,
+            help='Seconds open requests get to finish when stopping',
+        )
+        parser.add_argument('--backlog', type=int, default=2048)
+        parser.add_argument(
+            '--application',
+            default=settings.ASGI_APPLICATION,
+            help='Dotted path of the application to serve',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options['workers'] < 1:
+            raise CommandError('Serve with at least one worker')
+        if options['workers'] > 1 and not settings.REDIS_URL:
+            raise CommandError(
+                'Set REDIS_URL to share games between workers, or serve '
+                'with --workers 1',
+            )
+        application = warm_up(options['application'])
+        try:
+            listener = bind(
+                options['host'],
+                options['port'],
+                options['backlog'],
+            )
+        except OSError as error:
+            raise CommandError(error) from error
+        self.stdout.write(
+            f'Serving {options["application"]} on '
+            f'{options["host"]}:{options["port"]} with '
+            f'{options["workers"]} workers',
+        )
+        self.stdout.flush()
+        with listener:
+            status = Supervisor(
+                application,
+                listener,
+                options['workers'],
+                options['keepalive'],
+                options['graceful_timeout'],
+            ).run()
+        sys.exit(status)
@@ -0,0 +1,91 @@
+import subprocess  # nosec
+from statistics import median
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+
+from games.startup import boot, by_package
+
+# Workers should be ready this soon after starting, so scaling out keeps
+# up with a rush of players.
+DEFAULT_TARGET_SECONDS = 0.5
+
+
+class Command(BaseCommand):
+    help = (  # noqa: F841
+        'Time how long a worker takes to be ready and which imports cost '
+        'the most, failing when it is slower than the target.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=5,
+            help='Workers to start, the median is compared to the target',
+        )
+        parser.add_argument(
+            '--target',
+            type=float,
+            default=DEFAULT_TARGET_SECONDS,
+            help='Seconds a worker may take to be ready',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=15,
+            help='Packages and modules to list',
+        )
+        parser.add_argument(
+            '--application',
+            default=settings.ASGI_APPLICATION,
+            help='Dotted path of the application workers serve',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            elapsed = [
+                boot(options['application'], settings.BASE_DIR)[0]
+                for _ in range(options['runs'])
+            ]
+            _, times = boot(
+                options['application'],
+                settings.BASE_DIR,
+                import_times=True,
+            )
+        except subprocess.CalledProcessError as error:
+            raise CommandError(
+                f'Worker failed to start:\n{error.stderr}',
+            ) from error
+
+        top = options['top']
+        self.stdout.write(f'{"package":<40} {"self ms":>9}')
+        for package, seconds in by_package(times)[:top]:
+            self.stdout.write(f'{package:<40} {seconds * 1000:>9.1f}')
+        self.stdout.write(f'\n{"module":<40} {"self ms":>9} {"total ms":>9}')
+        for import_time in sorted(
+                times,
+                key=lambda import_time: import_time.self_seconds,
+                reverse=True,
+        )[:top]:
+            self.stdout.write(
+                f'{import_time.module:<40} '
+                f'{import_time.self_seconds * 1000:>9.1f} '
+                f'{import_time.cumulative_seconds * 1000:>9.1f}',
+            )
+
+        ready = median(elapsed)
+        self.stdout.write(
+            f'\nReady in {ready:.3f}s, the median of {len(elapsed)} workers '
+            f'(fastest {min(elapsed):.3f}s), target {options["target"]:.3f}s',
+        )
+        if ready > options['target']:
+            raise CommandError(
+                f'Workers take {ready:.3f}s to be ready, over the '
+                f'{options["target"]:.3f}s target',
+            )
@@ -0,0 +1,235 @@
+"""Process wide metrics, exposed in the Prometheus text format.
+
+Each process keeps its own numbers, and ``/metrics/`` shows those of
+the process that answers it.  Workers of ``manage.py serve`` share one
+socket, so a scrape reaches any one of them and sees only its share of
+the traffic: scrape a server run with ``--workers 1`` for numbers of
+the whole server.
+"""
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Seconds, as used by Prometheus clients by default.
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+Labels = Tuple[str, ...]
+
+
+class Metric(ABC):
+    kind = ''
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            label_names: Sequence[str] = (),
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]:
+        pass
+
+    def render(self) -> str:
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        lines.extend(self.samples())
+        return '\n'.join(lines) + '\n'
+
+    def _labels(self, values: Labels, **extra: str) -> str:
+        pairs = list(zip(self.label_names, values)) + list(extra.items())
+        if not pairs:
+            return ''
+        return '{' + ','.join(
+            f'{name}="{_escape(value)}"' for name, value in pairs
+        ) + '}'
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            label_names: Sequence[str] = (),
+    ):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = (
+                self._values.get(label_values, 0) + amount
+            )
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            yield f'{self.name}{self._labels(label_values)} {value:g}'
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            label_names: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+        # Per labels: the count in each bucket, +Inf last, and the sum.
+        self._counts: Dict[Labels, List[int]] = {}
+        self._sums: Dict[Labels, float] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(label_values)
+            if counts is None:
+                counts = self._counts[label_values] = [0] * (
+                    len(self.buckets) + 1
+                )
+            counts[index] += 1
+            self._sums[label_values] = (
+                self._sums.get(label_values, 0.0) + value
+            )
+
+    @contextmanager
+    def time(self, *label_values: str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, *label_values)
+
+    def count(self, *label_values: str) -> int:
+        return sum(self._counts.get(label_values, ()))
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            series = sorted(
+                (label_values, list(counts), self._sums[label_values])
+                for label_values, counts in self._counts.items()
+            )
+        for label_values, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                labels = self._labels(label_values, le=le)
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = self._labels(label_values)
+            yield f'{self.name}_sum{labels} {total:g}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f'Metric {metric.name} already registered')
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        return ''.join(metric.render() for metric in self._metrics.values())
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+    )
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = Histogram(
+    'friendexing_request_seconds',
+    'Time taken to respond to requests, by view.',
+    ('view', 'method'),
+)
+RESPONSE_BYTES = Counter(
+    'friendexing_response_bytes_total',
+    'Bytes of response bodies sent, by view.',
+    ('view',),
+)
+STORE_SECONDS = Histogram(
+    'friendexing_store_seconds',
+    'Time taken by game store operations.',
+    ('operation',),
+    buckets=(0.0005, 0.001, 0.0025) + DEFAULT_BUCKETS,
+)
+TEMPLATE_SECONDS = Histogram(
+    'friendexing_template_render_seconds',
+    'Time taken to render templates.',
+    ('template',),
+)
+PROFILED_REQUESTS = Counter(
+    'friendexing_profiled_requests_total',
+    'Slow requests whose profile was saved, by view.',
+    ('view',),
+)
+GUESS_BATCH_SIZE = Histogram(
+    'friendexing_guess_batch_size',
+    'Guesses written to the guess store together.',
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+SWEPT_GAMES = Counter(
+    'friendexing_swept_games_total',
+    'Expired games evicted by the sweeper, by whether they had finished.',
+    ('reason',),
+)
+SWEPT_GAME_BYTES = Counter(
+    'friendexing_swept_game_bytes_total',
+    'Stored size of the games evicted by the sweeper.',
+)
+FORGOTTEN_IMAGES = Counter(
+    'friendexing_forgotten_images_total',
+    'Originals the image cache stopped referring to, unused for a game '
+    'lifetime.',
+)
+SWEEP_SECONDS = Histogram(
+    'friendexing_sweep_seconds',
+    'Time taken by each batch of the sweeper.',
+    buckets=(0.0005, 0.001, 0.0025) + DEFAULT_BUCKETS,
+)
+REDIS_SECONDS = Histogram(
+    'friendexing_redis_seconds',
+    'Time taken by each round trip to Redis, by command or pipeline.',
+    ('command',),
+    buckets=(0.0005, 0.001, 0.0025) + DEFAULT_BUCKETS,
+)
+for _metric in (
+        REQUEST_SECONDS,
+        RESPONSE_BYTES,
+        STORE_SECONDS,
+        TEMPLATE_SECONDS,
+        PROFILED_REQUESTS,
+        GUESS_BATCH_SIZE,
+        SWEPT_GAMES,
+        SWEPT_GAME_BYTES,
+        FORGOTTEN_IMAGES,
+        SWEEP_SECONDS,
+        REDIS_SECONDS,
+):
+    REGISTRY.register(_metric)
@@ -1,30 +1,102 @@
-from typing import List, Dict, Optional
+from collections import Counter
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableSequence,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    overload,
+)
 from uuid import UUID, uuid4
 
+# The states of a game.  Rounds take it from waiting for players to
+# playing and then to reviewing the round's answers, back and forth.
+WAITING = 'wait'
+PLAYING = 'playing'
+REVIEWING = 'reviewing'
+FINISHED = 'finished'
+
+# The states a game may move to from each state.  A game can be
+# finished from any state but finished, which it never leaves.
+TRANSITIONS: Mapping[str, FrozenSet[str]] = {
+    WAITING: frozenset({PLAYING, FINISHED}),
+    PLAYING: frozenset({REVIEWING, FINISHED}),
+    REVIEWING: frozenset({PLAYING, FINISHED}),
+    FINISHED: frozenset(),
+}
+
+
+class InvalidTransition(ValueError):
+    pass
+
 
 class Game:
+    __slots__ = (
+        'id',
+        'settings',
+        'players',
+        'batches',
+        'state',
+        'round_number',
+        'round_deadline',
+    )
 
     def __init__(
             self,
+            settings: 'Settings',
+            players: Iterable['Player'],
+            batches: Optional[List['Batch']] = None,
+            state: str = WAITING,
+            game_id: Optional[UUID] = None,
+            round_number: int = 0,
+            round_deadline: Optional[float] = None,
+    ):
+        self.id = game_id or uuid4()
+        self.settings = settings
+        self.players = Players(players)
+        self.batches = batches if batches is not None else []
+        self.state = state
+        self.round_number = round_number
+        # Unix time the open round closes at, None while no round is open.
+        self.round_deadline = round_deadline
+
+    def move_to(self, state: str) -> None:
+        """Move to ``state``, raising ``InvalidTransition`` if not allowed."""
+        if state not in TRANSITIONS.get(self.state, ()):
+            raise InvalidTransition(
+                f'Cannot move game {self.id} from {self.state} to {state}',
+            )
+        self.state = state
+
+    @classmethod
+    def create(
+            cls,
             total_time_to_guess: int,
             should_randomize_fields: bool,
             name: str,
-    ):
-        self.id = uuid4()
-        self.settings = Settings(
-            total_time_to_guess,
-            should_randomize_fields,
-        )
-        self.players: List['Player'] = [
-            Player(
-                name,
+    ) -> 'Game':
+        return cls(
+            Settings(
+                total_time_to_guess,
+                should_randomize_fields,
             ),
-        ]
-        self.batches: List['Batch'] = []
-        self.state = 'wait'
+            [
+                Player(
+                    name,
+                ),
+            ],
+        )
 
 
 class Settings:
+    __slots__ = ('total_time_to_guess', 'should_randomize_fields')
+
     def __init__(
             self,
             total_time_to_guess: int,
@@ -35,32 +107,229 @@ class Settings:
 
 
 class Player:
+    __slots__ = ('id', 'name', 'score', 'guess_id', 'guess', 'guess_time')
+
     def __init__(
             self,
             name: str,
+            player_id: Optional[UUID] = None,
+            score: int = 0,
+            guess_id: Optional[int] = None,
+            guess: Optional[str] = None,
+            guess_time: Optional[int] = None,
     ):
-        self.id = uuid4()
+        self.id = player_id or uuid4()
         self.name: str = name
-        self.score = 0
-        self.guess_id: Optional[int] = None
-        self.guess: Optional[str] = None
-        self.guess_time: Optional[int] = None
+        self.score = score
+        self.guess_id = guess_id
+        self.guess = guess
+        self.guess_time = guess_time
+
+
+def name_key(name: str) -> str:
+    """Fold case and spacing, so names differing only in those clash."""
+    return ' '.join(name.casefold().split())
+
+
+class Players(MutableSequence[Player]):
+    """The players of a game in join order, indexed by ID and by name.
+
+    Views resolve the player of a request by the ID in its cookie, and
+    joining checks the name is free, without scanning the list.  The
+    indexes follow every change made through the sequence, and aren't
+    stored; decoding a game builds the ID index again, and the name
+    index waits for the first join.
+    """
+
+    __slots__ = ('_players', '_by_id', '_names')
+
+    def __init__(self, players: Iterable[Player] = ()):
+        self._players: List[Player] = []
+        self._by_id: Dict[UUID, Player] = {}
+        self._names: 'Optional[Counter[str]]' = None
+        self._replace(list(players))
+
+    def get(self, player_id: UUID) -> Optional[Player]:
+        return self._by_id.get(player_id)
+
+    def has_name(self, name: str) -> bool:
+        if self._names is None:
+            self._names = Counter(
+                name_key(player.name) for player in self._players
+            )
+        return self._names[name_key(name)] > 0
+
+    @overload
+    def __getitem__(self, index: int) -> Player:
+        pass
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Player]:
+        pass
+
+    def __getitem__(
+            self,
+            index: Union[int, slice],
+    ) -> Union[Player, List[Player]]:
+        return self._players[index]
+
+    @overload
+    def __setitem__(self, index: int, player: Player) -> None:
+        pass
+
+    @overload
+    def __setitem__(self, index: slice, player: Iterable[Player]) -> None:
+        pass
+
+    def __setitem__(
+            self,
+            index: Union[int, slice],
+            player: Union[Player, Iterable[Player]],
+    ) -> None:
+        players = list(self._players)
+        players[index] = player  # type: ignore
+        self._replace(players)
+
+    def __delitem__(self, index: Union[int, slice]) -> None:
+        players = list(self._players)
+        del players[index]
+        self._replace(players)
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def __iter__(self) -> Iterator[Player]:
+        return iter(self._players)
+
+    def __contains__(self, player: object) -> bool:
+        return (
+            isinstance(player, Player)
+            and self._by_id.get(player.id) is player
+        )
+
+    def insert(self, index: int, player: Player) -> None:
+        if player.id in self._by_id:
+            raise ValueError(f'Player {player.id} is already in the game')
+        self._players.insert(index, player)
+        self._by_id[player.id] = player
+        if self._names is not None:
+            self._names[name_key(player.name)] += 1
+
+    def _replace(self, players: List[Player]) -> None:
+        """Swap in a changed list, indexing it from scratch."""
+        by_id = {player.id: player for player in players}
+        if len(by_id) != len(players):
+            raise ValueError('Players must not repeat')
+        self._players = players
+        self._by_id = by_id
+        self._names = None
 
 
 class Batch:
-    images: List['Image']
-    schema: Dict[str, type]
+    __slots__ = ('schema', 'images')
+
+    def __init__(
+            self,
+            schema: Dict[str, type],
+            images: Optional[List['Image']] = None,
+    ):
+        self.schema = schema
+        self.images = images if images is not None else []
 
 
 class Image:
-    indexable: bool
-    records: List['Record']
+    """A scanned page; ``source`` is the path of its original file.
+
+    ``digest`` is the content hash of the original, which names its
+    renditions, taken once when the image is imported.
+    """
+
+    __slots__ = ('indexable', 'records', 'source', 'digest')
+
+    def __init__(
+            self,
+            indexable: bool,
+            records: Optional[List['Record']] = None,
+            source: Optional[str] = None,
+            digest: Optional[str] = None,
+    ):
+        self.indexable = indexable
+        self.records = records if records is not None else []
+        self.source = source
+        self.digest = digest
 
 
 class Record:
-    fields: Dict[str, 'Field']
+    """A row of field values, stored column wise.
+
+    Records of a batch share one ``names`` tuple, values are a plain list
+    and the checked flags are one byte each in a ``bytearray``, so a record
+    costs three objects however many fields it has.  ``Field`` objects
+    are only made on demand, as views onto these columns.
+    """
+
+    __slots__ = ('names', 'values', 'checked')
+
+    def __init__(
+            self,
+            names: Tuple[str, ...],
+            values: Sequence[str],
+            checked: Optional[bytearray] = None,
+    ):
+        if len(names) != len(values):
+            raise ValueError('Each field name needs exactly one value')
+        self.names = names
+        self.values = list(values)
+        self.checked = (
+            checked if checked is not None else bytearray(len(names))
+        )
+
+    @property
+    def fields(self) -> 'RecordFields':
+        return RecordFields(self)
+
+    def field(self, name: str) -> 'Field':
+        try:
+            return Field(self, self.names.index(name))
+        except ValueError as error:
+            raise KeyError(name) from error
+
+
+class RecordFields(Mapping[str, 'Field']):
+    __slots__ = ('_record',)
+
+    def __init__(self, record: Record):
+        self._record = record
+
+    def __getitem__(self, name: str) -> 'Field':
+        return self._record.field(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._record.names)
+
+    def __len__(self) -> int:
+        return len(self._record.names)
 
 
 class Field:
-    value: str
-    is_checked: bool
+    __slots__ = ('_record', '_index')
+
+    def __init__(self, record: Record, index: int):
+        self._record = record
+        self._index = index
+
+    @property
+    def value(self) -> str:
+        return self._record.values[self._index]
+
+    @value.setter
+    def value(self, value: str) -> None:
+        self._record.values[self._index] = value
+
+    @property
+    def is_checked(self) -> bool:
+        return bool(self._record.checked[self._index])
+
+    @is_checked.setter
+    def is_checked(self, is_checked: bool) -> None:
+        self._record.checked[self._index] = is_checked
@@ -0,0 +1,78 @@
+"""Orders the fields of a game for each player, if the game shuffles them.
+
+A player's order is derived from ``(game.id, player.id, round)`` each
+time it is asked for instead of being stored, so a game carries no
+shuffled copies of its records however many players join.  Only arrays
+of indexes are permuted; records are never copied.
+
+Each page keeps its records, in a shuffled order, and every record of a
+batch shows its fields in the same shuffled order, so a page still reads
+like a form.
+"""
+from array import array
+from hashlib import blake2b
+from random import Random
+from typing import Callable, Dict, Iterator, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from games.models import Game
+
+
+class FieldPosition(NamedTuple):
+    guess_id: int
+    # Images are numbered from 1 in batch order, as on the play page.
+    image_number: int
+    name: str
+
+
+def order_seed(game_id: UUID, player_id: UUID, round_number: int) -> int:
+    """Return the seed of a player's order in a round.
+
+    ``hash`` is salted per process, and every worker has to agree.
+    """
+    digest = blake2b(
+        game_id.bytes + player_id.bytes + round_number.to_bytes(4, 'big'),
+        digest_size=8,
+    ).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def ordered_fields(game: Game, player_id: UUID) -> Iterator[FieldPosition]:
+    """Yield every field of ``game`` in the order the player sees it.
+
+    Without ``should_randomize_fields`` that is the ``guess_id`` order.
+    """
+    shuffle: Optional[Callable[['array[int]'], None]] = None
+    if game.settings.should_randomize_fields:
+        shuffle = Random(order_seed(
+            game.id,
+            player_id,
+            game.round_number,
+        )).shuffle
+    guess_id = 0
+    image_number = 0
+    for batch in game.batches:
+        columns: Dict[Tuple[str, ...], 'array[int]'] = {}
+        for image in batch.images:
+            image_number += 1
+            first_ids = array('L')
+            for record in image.records:
+                first_ids.append(guess_id)
+                guess_id += len(record.names)
+            rows = array('L', range(len(image.records)))
+            if shuffle:
+                shuffle(rows)
+            for row in rows:
+                names = image.records[row].names
+                order = columns.get(names)
+                if order is None:
+                    order = columns[names] = array('L', range(len(names)))
+                    if shuffle:
+                        shuffle(order)
+                for column in order:
+                    yield FieldPosition(
+                        first_ids[row] + column,
+                        image_number,
+                        names[column],
+                    )
+
@@ -0,0 +1,225 @@
+"""The Redis clients a worker's stores share.
+
+All stores on a node use the same client, so a worker keeps one bounded
+pool of connections per node and event loop, and under ASGI a worker
+runs a single loop.  Connections idle for a while are checked with a
+PING before they are used again.
+
+Each command, and each pipeline as a whole, is a round trip to Redis.
+Every round trip is reported to the timing hooks, which by default feed
+``REDIS_SECONDS``.  Imported only once Redis is used, like ``aioredis``.
+"""
+import asyncio
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from time import perf_counter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+)
+from weakref import WeakKeyDictionary
+
+import aioredis
+from aioredis.client import Pipeline
+from django.conf import settings
+
+from games.metrics import REDIS_SECONDS
+
+# Defaults of REDIS_MAX_CONNECTIONS and REDIS_HEALTH_CHECK_SECONDS.
+MAX_CONNECTIONS = 20
+HEALTH_CHECK_SECONDS = 30
+# How long a command waits for a connection when all are in use.
+POOL_TIMEOUT_SECONDS = 5
+
+# Called with the command, or MULTI or PIPELINE, and its seconds.
+TimingHook = Callable[[str, float], None]
+
+
+def record_seconds(command: str, seconds: float) -> None:
+    REDIS_SECONDS.observe(seconds, command)
+
+
+@contextmanager
+def _timed(hooks: Sequence[TimingHook], command: Any) -> Iterator[None]:
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        seconds = perf_counter() - start
+        name = command.decode() if isinstance(command, bytes) else command
+        for hook in hooks:
+            hook(name.upper(), seconds)
+
+
+class PooledRedis(aioredis.Redis):
+    """A client that times its commands and pipelines."""
+
+    def __init__(
+            self,
+            connection_pool: aioredis.ConnectionPool,
+            hooks: Sequence[TimingHook],
+    ):
+        super().__init__(connection_pool=connection_pool)
+        self.hooks = hooks
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        with _timed(self.hooks, args[0]):
+            # Named rather than reached through super(), which hides
+            # from mypy that this untyped method is aioredis'.
+            return await aioredis.Redis.execute_command(
+                self,
+                *args,
+                **options,
+            )
+
+    def pipeline(
+            self,
+            transaction: bool = True,
+            shard_hint: Optional[str] = None,
+    ) -> 'PooledPipeline':
+        return PooledPipeline(
+            self.connection_pool,
+            self.response_callbacks,
+            transaction,
+            shard_hint,
+            self.hooks,
+        )
+
+
+class PooledPipeline(Pipeline):
+    def __init__(
+            self,
+            connection_pool: aioredis.ConnectionPool,
+            response_callbacks: Any,
+            transaction: bool,
+            shard_hint: Optional[str],
+            hooks: Sequence[TimingHook],
+    ):
+        super().__init__(
+            connection_pool,
+            response_callbacks,
+            transaction,
+            shard_hint,
+        )
+        self.hooks = hooks
+
+    async def immediate_execute_command(
+            self,
+            *args: Any,
+            **options: Any,
+    ) -> Any:
+        with _timed(self.hooks, args[0]):
+            return await Pipeline.immediate_execute_command(
+                self,
+                *args,
+                **options,
+            )
+
+    async def execute(self, raise_on_error: bool = True) -> List[Any]:
+        transaction = self.is_transaction or self.explicit_transaction
+        with _timed(self.hooks, 'MULTI' if transaction else 'PIPELINE'):
+            replies: List[Any] = await super().execute(raise_on_error)
+        return replies
+
+    async def watch_and_get(self, name: str) -> Optional[bytes]:
+        """WATCH ``name`` and GET it, in one round trip.
+
+        Like ``watch``, this runs at once and holds the connection until
+        the pipeline executes or resets.
+        """
+        data: Optional[bytes]
+        data, = await self.watch_and_read(name, ('GET', name))
+        return data
+
+    async def watch_and_read(
+            self,
+            name: str,
+            *commands: Sequence[Any],
+    ) -> List[Any]:
+        """WATCH ``name`` and run ``commands``, in one round trip.
+
+        Returns the reply of each command, as ``watch_and_get`` does.
+        """
+        if self.explicit_transaction:
+            raise aioredis.RedisError('Cannot issue a WATCH after a MULTI')
+        with _timed(self.hooks, f'WATCH {commands[0][0]}'):
+            connection = self.connection
+            if connection is None:
+                connection = self.connection = (
+                    await self.connection_pool.get_connection(
+                        'WATCH',
+                        self.shard_hint,
+                    )
+                )
+            try:
+                await connection.send_packed_command(connection.pack_commands(
+                    [('WATCH', name), *commands],
+                ))
+                await self.parse_response(connection, 'WATCH')
+                return [
+                    await self.parse_response(connection, command[0])
+                    for command in commands
+                ]
+            except (aioredis.ConnectionError, aioredis.TimeoutError):
+                await connection.disconnect()
+                await self.reset()
+                raise
+
+
+class RedisClients:
+    """Hands out one client per node URL and event loop."""
+
+    def __init__(
+            self,
+            max_connections: int = MAX_CONNECTIONS,
+            health_check_interval: int = HEALTH_CHECK_SECONDS,
+            hooks: Sequence[TimingHook] = (record_seconds,),
+    ):
+        self._max_connections = max_connections
+        self._health_check_interval = health_check_interval
+        # Add to these for every round trip of every client.
+        self.hooks = list(hooks)
+        self._lock = threading.Lock()
+        self._clients: 'WeakKeyDictionary[Any, Dict[str, PooledRedis]]' = (
+            WeakKeyDictionary()
+        )
+
+    def client(self, url: str) -> PooledRedis:
+        """Return the client of ``url`` for the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._clients.setdefault(loop, {})
+            client = clients.get(url)
+            if client is None:
+                client = clients[url] = PooledRedis(
+                    aioredis.BlockingConnectionPool.from_url(
+                        url,
+                        max_connections=self._max_connections,
+                        timeout=POOL_TIMEOUT_SECONDS,
+                        health_check_interval=self._health_check_interval,
+                    ),
+                    self.hooks,
+                )
+        return client
+
+    async def close(self) -> None:
+        """Disconnect every client of the running event loop."""
+        with self._lock:
+            clients = self._clients.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            await client.connection_pool.disconnect()
+
+
+@lru_cache(maxsize=None)
+def get_redis_clients() -> RedisClients:
+    """Return the clients every store of this process shares."""
+    return RedisClients(
+        settings.REDIS_MAX_CONNECTIONS,
+        settings.REDIS_HEALTH_CHECK_SECONDS,
+    )
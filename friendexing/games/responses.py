@@ -0,0 +1,129 @@
+"""Responses for files whose URL changes whenever their content does.
+
+Such files can be cached by browsers for good, revalidated by ETag and
+fetched in byte ranges, which is what zooming into large scans does.
+"""
+import os
+import re
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple
+
+from django.http import FileResponse, HttpRequest, HttpResponse
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+# Browsers treat a year as forever.
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+_BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class UnsatisfiableRange(ValueError):
+    pass
+
+
+class FileRange:
+    """Reads ``length`` bytes of ``file`` from ``start``, then stops.
+
+    It has no ``fileno``, so servers read it instead of sending the
+    whole file with ``sendfile``.
+    """
+
+    def __init__(self, file: BinaryIO, start: int, length: int):
+        file.seek(start)
+        self._file = file
+        self._remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def parse_byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Return the first and last byte of a ``Range`` header's range.
+
+    Returns ``None`` for headers to ignore, such as several ranges, which
+    means sending the whole file.  Raises ``UnsatisfiableRange`` for a
+    range outside the file.
+    """
+    match = _BYTE_RANGE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        start = max(0, size - int(last))
+        end = size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise UnsatisfiableRange(header)
+    return start, end
+
+
+def immutable_file_response(
+        request: HttpRequest,
+        path: Path,
+        etag: str,
+        content_type: str,
+) -> HttpResponseBase:
+    """Serve ``path`` for a content addressed URL.
+
+    Whole files go out as a plain ``FileResponse``, so WSGI servers can
+    use ``sendfile`` and nothing is read into memory here.
+    """
+    etag = quote_etag(etag)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return _cache_forever(not_modified, etag)
+
+    response: HttpResponseBase
+    file = path.open('rb')
+    size = os.fstat(file.fileno()).st_size
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and (if_range is None or if_range == etag):
+        try:
+            byte_range = parse_byte_range(range_header, size)
+        except UnsatisfiableRange:
+            file.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            FileRange(file, start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return _cache_forever(response, etag)
+
+
+def _cache_forever(
+        response: HttpResponseBase,
+        etag: str,
+) -> HttpResponseBase:
+    response['ETag'] = etag
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=IMMUTABLE_MAX_AGE,
+        immutable=True,
+    )
+    return response
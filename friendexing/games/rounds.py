@@ -0,0 +1,310 @@
+import asyncio
+import heapq
+import logging
+import threading
+from functools import lru_cache
+from time import time
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+from uuid import UUID
+
+from games.codec import GameRound
+from games.events import get_event_hub, make_event
+from games.guesses import Guess, GuessStore, apply_guesses, get_guess_store
+from games.leaderboard import get_leaderboard
+from games.models import FINISHED, PLAYING, REVIEWING, Game
+from games.scoring import PlayerScore, score_round
+from games.stores import GameNotFound, GameStore, get_game_store
+
+LOGGER = logging.getLogger(__name__)
+
+RoundClosed = Callable[[UUID, int, List[PlayerScore]], Awaitable[None]]
+
+# Rounds due at the same moment are closed this many at a time, so a
+# burst of deadlines doesn't open thousands of store connections at once.
+MAX_CONCURRENT_CLOSES = 100
+
+# Rounds are closed this long after their deadline, so that guesses
+# accepted just before it have been written by then.
+CLOSE_DELAY_SECONDS = 0.5
+
+# A round that could not be closed, as when Redis timed out, is tried
+# again after this long, doubled on every attempt, up to this many
+# attempts.  A round given up on is closed by the next round's start.
+CLOSE_RETRY_SECONDS = 1.0
+MAX_CLOSE_ATTEMPTS = 8
+
+# Due time, game, round, and how many attempts to close it failed.
+_Timer = Tuple[float, UUID, int, int]
+
+
+def start_round(game: Game, now: float) -> int:
+    """Open the next round of ``game`` and return its number.
+
+    Meant to be passed to ``GameStore.update``.  Raises
+    ``InvalidTransition`` for finished games.
+    """
+    if game.state == PLAYING:
+        # The last round ran out without being closed, as when the worker
+        # timing it stopped.
+        game.move_to(REVIEWING)
+    game.move_to(PLAYING)
+    game.round_number += 1
+    game.round_deadline = now + game.settings.total_time_to_guess
+    for player in game.players:
+        player.guess_id = None
+        player.guess = None
+        player.guess_time = None
+    return game.round_number
+
+
+def close_round(game: Game, round_number: int) -> bool:
+    """Close ``round_number`` if it is still open.
+
+    Returns whether this call closed it.  Run through ``GameStore.update``
+    this makes closing a round a claim that only one caller, in any
+    worker, can win.  Rounds of finished games are left unscored.
+    """
+    if (
+            game.round_number != round_number
+            or game.round_deadline is None
+            or game.state != PLAYING
+    ):
+        return False
+    game.round_deadline = None
+    game.move_to(REVIEWING)
+    return True
+
+
+def finish_game(game: Game) -> None:
+    """Finish ``game``, dropping its open round if it has one.
+
+    Meant to be passed to ``GameStore.update``.  Raises
+    ``InvalidTransition`` for games already finished.
+    """
+    game.move_to(FINISHED)
+    game.round_deadline = None
+
+
+def is_round_open(game: Union[Game, GameRound], now: float) -> bool:
+    return game.round_deadline is not None and now < game.round_deadline
+
+
+def finish_round(
+        game: Game,
+        round_number: int,
+        guesses: Optional[Mapping[UUID, Guess]] = None,
+) -> Optional[List[PlayerScore]]:
+    """Close ``round_number`` and score it, or return None if already closed.
+
+    ``guesses`` kept apart from the game are recorded on its players
+    first.  Scoring in the same update as the claim keeps it exactly-once
+    too.
+    """
+    if not close_round(game, round_number):
+        return None
+    if guesses:
+        apply_guesses(game, guesses)
+    return score_round(game)
+
+
+class RoundScheduler:
+    """Closes rounds when their time to guess runs out.
+
+    All timers live in one heap served by a single task, however many
+    games are running.  ``schedule`` may be called from any thread.
+    Closing goes through ``finish_round`` on the store, so when several
+    workers schedule the same round, it is scored and ``on_round_closed``
+    runs once.  The round's guesses in ``guesses``, if given, are scored
+    with it.  A round the store fails to close is tried again later.
+    """
+
+    def __init__(
+            self,
+            store: GameStore,
+            on_round_closed: RoundClosed,
+            clock: Callable[[], float] = time,
+            guesses: Optional[GuessStore] = None,
+            retry_seconds: float = CLOSE_RETRY_SECONDS,
+    ):
+        self._store = store
+        self._on_round_closed = on_round_closed
+        self._clock = clock
+        self._guesses = guesses
+        self._retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._timers: List[_Timer] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def schedule(
+            self,
+            game_id: UUID,
+            round_number: int,
+            deadline: float,
+    ) -> None:
+        with self._lock:
+            is_earliest = not self._timers or deadline < self._timers[0][0]
+            heapq.heappush(self._timers, (deadline, game_id, round_number, 0))
+            loop = self._loop
+            wakeup = self._wakeup
+        if is_earliest and loop is not None and wakeup is not None:
+            loop.call_soon_threadsafe(wakeup.set)
+
+    async def run(self) -> None:
+        wakeup = asyncio.Event()
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = wakeup
+        while True:
+            due_timers = self._pop_due_timers()
+            if due_timers:
+                await self._close_rounds(due_timers)
+                continue
+            with self._lock:
+                delay = (
+                    self._timers[0][0] - self._clock()
+                    if self._timers else None
+                )
+            try:
+                await asyncio.wait_for(wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+
+    def run_in_thread(self) -> threading.Thread:
+        """Serve the timers from a daemon thread with its own event loop.
+
+        Sync views have no loop that outlives the request, so this is how
+        the timers are served under WSGI.
+        """
+        thread = threading.Thread(
+            target=asyncio.run,
+            args=(self.run(),),
+            name='round-scheduler',
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def _pop_due_timers(self) -> List[_Timer]:
+        now = self._clock()
+        due_timers = []
+        with self._lock:
+            while self._timers and self._timers[0][0] <= now:
+                due_timers.append(heapq.heappop(self._timers))
+        return due_timers
+
+    async def _close_rounds(self, timers: List[_Timer]) -> None:
+        for start in range(0, len(timers), MAX_CONCURRENT_CLOSES):
+            # Failures are handled by each close; none may stop the loop.
+            await asyncio.gather(*(
+                self._close_round(game_id, round_number, attempts)
+                for _, game_id, round_number, attempts
+                in timers[start:start + MAX_CONCURRENT_CLOSES]
+            ), return_exceptions=True)
+
+    async def _close_round(
+            self,
+            game_id: UUID,
+            round_number: int,
+            attempts: int,
+    ) -> None:
+        try:
+            scores = await self._finish_round(game_id, round_number)
+        except GameNotFound:
+            return
+        except Exception:  # pylint: disable=broad-except
+            attempts += 1
+            if attempts >= MAX_CLOSE_ATTEMPTS:
+                LOGGER.exception(
+                    'Gave up closing round %s of game %s',
+                    round_number,
+                    game_id,
+                )
+                return
+            delay = self._retry_seconds * 2 ** (attempts - 1)
+            LOGGER.exception(
+                'Could not close round %s of game %s, retrying in %ss',
+                round_number,
+                game_id,
+                delay,
+            )
+            with self._lock:
+                heapq.heappush(self._timers, (
+                    self._clock() + delay,
+                    game_id,
+                    round_number,
+                    attempts,
+                ))
+            return
+        if scores is None:
+            return
+        try:
+            if self._guesses is not None:
+                await self._guesses.delete(game_id, round_number)
+            await self._on_round_closed(game_id, round_number, scores)
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception(
+                'Could not finish round %s of game %s',
+                round_number,
+                game_id,
+            )
+
+    async def _finish_round(
+            self,
+            game_id: UUID,
+            round_number: int,
+    ) -> Optional[List[PlayerScore]]:
+        guesses: Dict[UUID, Guess] = {}
+        if self._guesses is not None:
+            guesses = await self._guesses.collect(game_id, round_number)
+        return await self._store.update(
+            game_id,
+            lambda game: finish_round(game, round_number, guesses),
+        )
+
+
+async def announce_round_closed(
+        game_id: UUID,
+        round_number: int,
+        scores: List[PlayerScore],
+) -> None:
+    """Publish the close, then the players whose rank or score changed."""
+    changes = await get_leaderboard().update(
+        game_id,
+        {score.player_id: score.score for score in scores},
+    )
+    hub = get_event_hub()
+    await hub.publish(
+        game_id,
+        make_event('state', state='round_closed', round_number=round_number),
+    )
+    await hub.publish(game_id, make_event(
+        'scores',
+        round_number=round_number,
+        ranks=[change._asdict() for change in changes],
+    ))
+
+
+@lru_cache(maxsize=None)
+def get_round_scheduler() -> RoundScheduler:
+    """Return this process' scheduler, serving its timers in a thread."""
+    scheduler = RoundScheduler(
+        get_game_store(),
+        announce_round_closed,
+        guesses=get_guess_store(),
+    )
+    scheduler.run_in_thread()
+    return scheduler
@@ -0,0 +1,172 @@
+"""Scores a round's guesses in one pass when the round closes.
+
+A player's ``guess_id`` is the position of the guessed field when the
+game's batches are read in order, image by image and record by record.
+"""
+import re
+import unicodedata
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from games.models import Game
+
+FULL_POINTS = 100
+# Near misses earn up to this much, scaled by how close they are.
+PARTIAL_POINTS = 50
+# Earned on top for answering instantly, shrinking to 0 at the deadline.
+TIME_BONUS_POINTS = 50
+# Edits allowed per character of the reference value for a near miss.
+MAX_EDIT_RATIO = 0.25
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+_SPACES = re.compile(r'\s+')
+
+
+class PlayerScore(NamedTuple):
+    player_id: UUID
+    points: int
+    score: int
+
+
+def normalize(value: str) -> str:
+    """Fold case, accents, punctuation and spacing out of a value."""
+    decomposed = unicodedata.normalize('NFKD', value.casefold())
+    without_accents = ''.join(
+        character for character in decomposed
+        if not unicodedata.combining(character)
+    )
+    return _SPACES.sub(' ', _PUNCTUATION.sub('', without_accents)).strip()
+
+
+def bounded_edit_distance(
+        first: str,
+        second: str,
+        bound: int,
+) -> Optional[int]:
+    """Return the Levenshtein distance, or None once it exceeds ``bound``.
+
+    Only a band of ``2 * bound + 1`` cells per row is computed, so the cost
+    is linear in the length of the values rather than quadratic.
+    """
+    if abs(len(first) - len(second)) > bound:
+        return None
+    if len(first) > len(second):
+        first, second = second, first
+    too_far = bound + 1
+    previous = [
+        column if column <= bound else too_far
+        for column in range(len(second) + 1)
+    ]
+    for row, first_character in enumerate(first, 1):
+        current = [too_far] * (len(second) + 1)
+        if row <= bound:
+            current[0] = row
+        low = max(1, row - bound)
+        high = min(len(second), row + bound)
+        for column in range(low, high + 1):
+            current[column] = min(
+                previous[column] + 1,
+                current[column - 1] + 1,
+                previous[column - 1] + (
+                    first_character != second[column - 1]
+                ),
+                too_far,
+            )
+        if min(current[low - 1:high + 1]) > bound:
+            return None
+        previous = current
+    distance = previous[len(second)]
+    return distance if distance <= bound else None
+
+
+def similarity(guess: str, reference: str) -> float:
+    """Compare normalized values, from 0 for unrelated to 1 for equal."""
+    if guess == reference:
+        return 1.0
+    bound = int(len(reference) * MAX_EDIT_RATIO)
+    distance = bounded_edit_distance(guess, reference, bound)
+    if distance is None:
+        return 0.0
+    return 1 - distance / max(len(guess), len(reference))
+
+
+def reference_values(game: Game, guess_ids: Iterable[int]) -> Dict[int, str]:
+    """Return the normalized value of the fields ``guess_ids`` point at.
+
+    Only those fields are normalized, and records are read up to the last
+    of them, so scoring stays cheap inside ``GameStore.update`` however
+    large the batches are.  IDs of fields the game doesn't have are left
+    out.
+    """
+    wanted = sorted({guess_id for guess_id in guess_ids if guess_id >= 0})
+    references: Dict[int, str] = {}
+    if not wanted:
+        return references
+    start = 0
+    for batch in game.batches:
+        for image in batch.images:
+            for record in image.records:
+                end = start + len(record.values)
+                while wanted[len(references)] < end:
+                    guess_id = wanted[len(references)]
+                    references[guess_id] = normalize(
+                        record.values[guess_id - start],
+                    )
+                    if len(references) == len(wanted):
+                        return references
+                start = end
+    return references
+
+
+def score_round(game: Game) -> List[PlayerScore]:
+    """Add this round's points to every player's score.
+
+    Only the guessed fields are normalized, once each, and every distinct
+    normalized guess is compared once per field, however many players
+    made it.
+    """
+    references = reference_values(game, (
+        player.guess_id for player in game.players
+        if player.guess is not None and player.guess_id is not None
+    ))
+    normalized_guesses: Dict[str, str] = {}
+    similarities: Dict[Tuple[int, str], float] = {}
+    time_to_guess = game.settings.total_time_to_guess
+    scores = []
+    for player in game.players:
+        points = 0
+        guess_id = player.guess_id
+        if (
+                player.guess is not None
+                and guess_id is not None
+                and guess_id in references
+        ):
+            guess = normalized_guesses.get(player.guess)
+            if guess is None:
+                guess = normalized_guesses[player.guess] = normalize(
+                    player.guess,
+                )
+            match = similarities.get((guess_id, guess))
+            if match is None:
+                match = similarities[guess_id, guess] = similarity(
+                    guess,
+                    references[guess_id],
+                )
+            points = _points(match, player.guess_time, time_to_guess)
+        player.score += points
+        scores.append(PlayerScore(player.id, points, player.score))
+    return scores
+
+
+def _points(
+        match: float,
+        guess_time: Optional[int],
+        time_to_guess: int,
+) -> int:
+    if not match:
+        return 0
+    points = FULL_POINTS if match == 1 else PARTIAL_POINTS * match
+    if guess_time is not None:
+        time_left = max(0.0, 1 - guess_time / time_to_guess)
+        points += TIME_BONUS_POINTS * time_left * match
+    return round(points)
@@ -0,0 +1,201 @@
+"""Serves the ASGI application from several worker processes.
+
+The supervisor warms up once, importing the application, its URLs and
+its templates, then forks workers that inherit all of that along with
+its listening socket.  SIGTERM or SIGINT shut the workers down
+gracefully, letting open requests finish, and a worker that dies on its
+own is replaced.
+
+Workers share nothing but the socket, so games must be kept in Redis
+for players to see the same game whichever worker answers them.
+"""
+import logging
+import os
+import signal
+import socket
+import sys
+from pathlib import Path
+from time import monotonic
+from types import FrameType
+from typing import Any, Callable, Dict, Optional, cast
+
+import uvicorn
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+from django.core.handlers.asgi import ASGIHandler
+from django.template import engines
+from django.template.utils import get_app_template_dirs
+from django.urls import get_resolver
+from django.utils.module_loading import import_string
+
+from games.forms import GameForm, PlayerForm
+
+LOGGER = logging.getLogger(__name__)
+
+# Set in workers to the process that supervises them.
+SUPERVISOR_PID = 'FRIENDEXING_SUPERVISOR_PID'
+
+# A worker dying sooner than this after starting is taken to be broken
+# rather than unlucky, so the server stops instead of forking forever.
+MIN_WORKER_SECONDS = 1.0
+
+# Workers still running this long after the graceful shutdown timeout
+# are killed.
+KILL_DELAY_SECONDS = 5
+
+ASGIApplication = Callable[..., Any]
+
+
+def warm_up(application_path: str) -> ASGIApplication:
+    """Import and return the application, with everything it serves."""
+    application: ASGIApplication = import_string(application_path)
+    get_resolver().url_patterns  # pylint: disable=expression-not-assigned
+    for engine in engines.all():
+        directories = list(engine.dirs) + list(
+            get_app_template_dirs(engine.app_dirname),
+        )
+        for directory in directories:
+            for path in Path(directory).rglob('*.html'):
+                engine.get_template(str(path.relative_to(directory)))
+    # Forms render their widgets from templates of their own.
+    for form_class in (GameForm, PlayerForm):
+        str(form_class())
+    if (
+            settings.DEBUG
+            and not settings.SERVE_STATIC
+            and apps.is_installed('django.contrib.staticfiles')
+    ):
+        # As runserver does.  It only calls the application it wraps,
+        # which needn't be Django's own handler.
+        application = ASGIStaticFilesHandler(
+            cast(ASGIHandler, application),
+        )
+    return application
+
+
+def bind(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    listener = socket.socket(family, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(backlog)
+    listener.set_inheritable(True)
+    return listener
+
+
+def request_shutdown() -> None:
+    """Shut the server down gracefully, as if stopped from outside.
+
+    Under ``manage.py serve`` every worker stops once its open requests
+    are answered, including the one asking.  Other servers are sent
+    SIGINT, which ``runserver`` takes as Ctrl+C.
+    """
+    supervisor = os.environ.get(SUPERVISOR_PID)
+    if supervisor:
+        os.kill(int(supervisor), signal.SIGTERM)
+    else:
+        os.kill(os.getpid(), signal.SIGINT)
+
+
+class Supervisor:
+    """Forks workers serving ``application`` and keeps them running."""
+
+    def __init__(
+            self,
+            application: ASGIApplication,
+            listener: socket.socket,
+            workers: int,
+            keepalive_seconds: int,
+            graceful_timeout_seconds: int,
+    ):
+        self.application = application
+        self.listener = listener
+        self.workers = workers
+        self.keepalive_seconds = keepalive_seconds
+        self.graceful_timeout_seconds = graceful_timeout_seconds
+        self.stopping = False
+        # Worker process IDs and when they started.
+        self._started: Dict[int, float] = {}
+
+    def run(self) -> int:
+        """Serve until stopped, returning the exit status of the server."""
+        os.environ[SUPERVISOR_PID] = str(os.getpid())
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGALRM, self._kill)
+        status = 0
+        for _ in range(self.workers):
+            self._spawn()
+        while self._started:
+            try:
+                pid, wait_status = os.wait()
+            except ChildProcessError:
+                break
+            started = self._started.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            LOGGER.warning(
+                'Worker %s exited with status %s',
+                pid,
+                os.waitstatus_to_exitcode(wait_status),
+            )
+            if monotonic() - started < MIN_WORKER_SECONDS:
+                LOGGER.error('Worker %s died on starting, stopping', pid)
+                status = 1
+                self._stop(signal.SIGTERM, None)
+            else:
+                self._spawn()
+        signal.alarm(0)
+        return status
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid:
+            self._started[pid] = monotonic()
+            return
+        # In the worker, which leaves through SystemExit so that atexit
+        # handlers, such as coverage's, still run.
+        signal.signal(signal.SIGTERM, _exit)
+        signal.signal(signal.SIGINT, _exit)
+        signal.signal(signal.SIGALRM, signal.SIG_DFL)
+        server = uvicorn.Server(uvicorn.Config(
+            self.application,
+            # Applications start their background tasks on startup, in
+            # each worker, if they handle lifespan events.
+            lifespan='auto',
+            timeout_keep_alive=self.keepalive_seconds,
+            timeout_graceful_shutdown=self.graceful_timeout_seconds,
+            access_log=False,
+        ))
+        server.run(sockets=[self.listener])
+        sys.exit(0)
+
+    def _stop(self, signum: int, _: Optional[FrameType]) -> None:
+        if self.stopping:
+            return
+        LOGGER.info(
+            'Stopping %s workers on %s',
+            len(self._started),
+            signal.Signals(signum).name,
+        )
+        self.stopping = True
+        for pid in self._started:
+            _signal_worker(pid, signal.SIGTERM)
+        signal.alarm(self.graceful_timeout_seconds + KILL_DELAY_SECONDS)
+
+    def _kill(self, _: int, __: Optional[FrameType]) -> None:
+        for pid in self._started:
+            LOGGER.error('Killing worker %s, which did not stop', pid)
+            _signal_worker(pid, signal.SIGKILL)
+
+
+def _signal_worker(pid: int, signum: int) -> None:
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
+
+
+def _exit(_: int, __: Optional[FrameType]) -> None:
+    sys.exit(0)
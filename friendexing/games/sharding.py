@@ -0,0 +1,165 @@
+"""Spreads games over several Redis nodes by consistent hashing.
+
+Every key of a game starts with ``game:<id>`` and is placed by that ID
+alone, so all of a game's keys are on one node and its transactions
+never span nodes.  Each node stands at many points of a hash ring, so a
+node added to the ring takes about its share of games, all of them from
+the other nodes, and every other game stays where it is.
+
+Nodes are known by their URL, so changing a node's URL moves its games.
+"""
+import asyncio
+from bisect import bisect
+from functools import lru_cache
+from hashlib import blake2b
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+from uuid import UUID
+
+from django.conf import settings
+
+if TYPE_CHECKING:  # pragma: no cover
+    import aioredis
+
+# Points per node, enough for each to get within about a tenth of its
+# even share of games.
+VIRTUAL_NODES = 256
+GAME_KEYS = 'game:*'
+# Keys asked for per SCAN while rebalancing.
+SCAN_COUNT = 500
+
+S = TypeVar('S')
+
+
+def _hash(data: bytes) -> int:
+    return int.from_bytes(blake2b(data, digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    def __init__(
+            self,
+            nodes: Sequence[str],
+            virtual_nodes: int = VIRTUAL_NODES,
+    ):
+        if not nodes:
+            raise ValueError('A hash ring needs at least one node')
+        if len(set(nodes)) != len(nodes):
+            raise ValueError(f'Nodes are listed more than once: {nodes}')
+        self.nodes = tuple(nodes)
+        points = sorted(
+            (_hash(f'{node}#{point}'.encode()), node)
+            for node in nodes
+            for point in range(virtual_nodes)
+        )
+        self._hashes = [hash_ for hash_, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, game_id: UUID) -> str:
+        """Return the node of the first point past the game's on the ring."""
+        index = bisect(self._hashes, _hash(game_id.bytes))
+        return self._owners[index % len(self._owners)]
+
+
+class Shards(Generic[S]):
+    """One ``S`` per node of ``ring``, picked by the game it holds."""
+
+    def __init__(self, ring: HashRing, make: Callable[[str], S]):
+        self.ring = ring
+        self._shards: Dict[str, S] = {node: make(node) for node in ring.nodes}
+
+    def __getitem__(self, game_id: UUID) -> S:
+        return self._shards[self.ring.node_for(game_id)]
+
+    def __iter__(self) -> Iterator[S]:
+        return iter(self._shards.values())
+
+
+def game_id_of(key: bytes) -> Optional[UUID]:
+    """Return the ID of the game ``key`` belongs to, if any."""
+    prefix, _, rest = key.decode().partition(':')
+    if prefix != 'game':
+        return None
+    try:
+        return UUID(rest.partition(':')[0])
+    except ValueError:
+        return None
+
+
+async def _move_game(
+        source: 'aioredis.Redis',
+        target: 'aioredis.Redis',
+        keys: Sequence[bytes],
+) -> None:
+    async with source.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.dump(key)
+            pipe.pttl(key)
+        replies = await pipe.execute()
+    async with target.pipeline(transaction=False) as pipe:
+        for key, data, ttl in zip(keys, replies[::2], replies[1::2]):
+            if data is not None:
+                # RESTORE takes 0 for keys that never expire.
+                pipe.restore(key, max(ttl, 0), data, replace=True)
+        await pipe.execute()
+    await source.delete(*keys)
+
+
+async def rebalance(
+        old: HashRing,
+        new: HashRing,
+        client_for: Callable[[str], 'aioredis.Redis'],
+) -> Dict[str, int]:
+    """Move the keys of games ``new`` places elsewhere than ``old`` does.
+
+    Every key of a game moves with it, keeping its time to live.  Games
+    must not change while they move, so rebalance before workers start
+    serving with the new ring.  Returns how many games each node got.
+    """
+    clients = {node: client_for(node) for node in {*old.nodes, *new.nodes}}
+    moved = {node: 0 for node in new.nodes}
+    try:
+        for node in old.nodes:
+            source = clients[node]
+            games: Dict[UUID, List[bytes]] = {}
+            async for key in source.scan_iter(GAME_KEYS, SCAN_COUNT):
+                game_id = game_id_of(key)
+                if game_id is not None:
+                    games.setdefault(game_id, []).append(key)
+            for game_id, keys in games.items():
+                target = new.node_for(game_id)
+                if target != node:
+                    await _move_game(source, clients[target], keys)
+                    moved[target] += 1
+    finally:
+        await asyncio.gather(*(client.close() for client in clients.values()))
+    return moved
+
+
+@lru_cache(maxsize=None)
+def get_ring() -> HashRing:
+    """Return the ring of the nodes in ``REDIS_URL``."""
+    return HashRing(settings.REDIS_URLS)
+
+
+def redis_shards(from_url: Callable[..., S]) -> Shards[S]:
+    """Return a store per node, made by ``from_url``.
+
+    The stores of every node share this process' Redis clients.
+    """
+    # pylint: disable=import-outside-toplevel
+    from games.redis_client import get_redis_clients
+    clients = get_redis_clients()
+
+    def make(url: str) -> S:
+        return from_url(url, clients=clients)
+
+    return Shards(get_ring(), make)
@@ -0,0 +1,73 @@
+import asyncio
+import re
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Mapping
+from uuid import UUID
+
+from django.http.cookie import parse_cookie
+
+from games.events import Event, EventHub, dump_event
+from games.tokens import PlayerTokens
+
+Scope = Dict[str, Any]
+Message = Dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+# Sent messages are typed as Django's ASGI handler takes them.
+Send = Callable[[Mapping[str, Any]], Awaitable[None]]
+
+# Game IDs as Django's ``uuid`` path converter matches them.
+GAME_SOCKET_PATH = re.compile(
+    r'^/games/(?P<game_id>'
+    r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
+    r')/socket/$',
+)
+
+# Close codes from the private range, so clients can tell them apart.
+CLOSE_NOT_FOUND = 4404
+CLOSE_NOT_JOINED = 4403
+
+
+class GameSocket:
+    """ASGI WebSocket endpoint pushing a game's events to its players.
+
+    Connections go to ``/games/<game_id>/socket/`` and need the same
+    player token as the play page, checked without loading the game.
+    The socket only sends; players still act through the regular views.
+    """
+
+    def __init__(self, hub: EventHub, tokens: PlayerTokens):
+        self._hub = hub
+        self._tokens = tokens
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (await receive())['type'] != 'websocket.connect':
+            return
+        match = GAME_SOCKET_PATH.match(scope['path'])
+        if not match:
+            await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+            return
+        game_id = UUID(match['game_id'])
+        cookie = parse_cookie(_header(scope, b'cookie')).get(str(game_id))
+        if not cookie or self._tokens.read(cookie, game_id) is None:
+            await send({'type': 'websocket.close', 'code': CLOSE_NOT_JOINED})
+            return
+
+        async with self._hub.subscribe(game_id) as events:
+            await send({'type': 'websocket.accept'})
+            forwarder = asyncio.ensure_future(_forward(events, send))
+            try:
+                while (await receive())['type'] != 'websocket.disconnect':
+                    pass
+            finally:
+                forwarder.cancel()
+
+
+async def _forward(events: AsyncIterator[Event], send: Send) -> None:
+    async for event in events:
+        await send({'type': 'websocket.send', 'text': dump_event(event)})
+
+
+def _header(scope: Scope, name: bytes) -> str:
+    for header_name, value in scope['headers']:
+        if header_name == name:
+            return str(value.decode('latin-1'))
+    return ''
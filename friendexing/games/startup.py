@@ -0,0 +1,85 @@
+"""Measures how long a worker takes to start and what its imports cost.
+
+A worker is ready once it has imported its application and the URL
+configuration, which Django would otherwise load on the first request.
+Each boot runs in a fresh interpreter, as a restarted worker would.
+"""
+import os
+import re
+import subprocess  # nosec
+import sys
+from collections import defaultdict
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+BOOT_SCRIPT = '''
+import sys
+from django.urls import get_resolver
+from django.utils.module_loading import import_string
+import_string(sys.argv[1])
+get_resolver().url_patterns
+'''
+
+# A line of python -X importtime output, in microseconds.
+IMPORT_TIME = re.compile(
+    r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$',
+)
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_seconds: float
+    cumulative_seconds: float
+
+
+def parse_import_times(lines: Iterable[str]) -> List[ImportTime]:
+    """Parse the report ``python -X importtime`` writes to stderr."""
+    times = []
+    for line in lines:
+        match = IMPORT_TIME.match(line)
+        if match:
+            times.append(ImportTime(
+                match[4],
+                int(match[1]) / 1e6,
+                int(match[2]) / 1e6,
+            ))
+    return times
+
+
+def by_package(times: Iterable[ImportTime]) -> List[Tuple[str, float]]:
+    """Total the time spent importing each top level package, most first."""
+    totals: Dict[str, float] = defaultdict(float)
+    for import_time in times:
+        totals[import_time.module.partition('.')[0]] += import_time.self_seconds
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def boot(
+        application: str,
+        base_dir: Path,
+        import_times: bool = False,
+) -> Tuple[float, List[ImportTime]]:
+    """Start a worker for ``application`` and time it until it is ready.
+
+    Raises ``subprocess.CalledProcessError`` when the worker fails.
+    """
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = os.pathsep.join(
+        filter(None, (str(base_dir), environment.get('PYTHONPATH'))),
+    )
+    command = [sys.executable]
+    if import_times:
+        command += ['-X', 'importtime']
+    command += ['-c', BOOT_SCRIPT, application]
+    start = perf_counter()
+    process = subprocess.run(  # nosec
+        command,
+        cwd=base_dir,
+        env=environment,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = perf_counter() - start
+    return elapsed, parse_import_times(process.stderr.splitlines())
@@ -10,23 +10,120 @@ thumbnails.forEach(function(thumbnail) {
     const imageId = this.dataset.imageId;
     const actualImageElement = document.getElementById(imageId);
     actualImageElement.hidden = false;
+    scheduleTileUpdate();
+    whenIdle(prefetchImagesAfter.bind(null, this.dataset.imageNumber));
   };
 });
 
+function whenIdle(callback) {
+  if (window.requestIdleCallback) {
+    window.requestIdleCallback(callback);
+  } else {
+    setTimeout(callback, 1);
+  }
+}
+
+// Hidden images are lazy loaded, so fetch the next few ahead of time to
+// have them in the cache when their thumbnail is clicked.
+const prefetchedImages = new Set();
+function prefetchImagesAfter(imageNumber) {
+  fetch(window.location.pathname + 'images/?after=' + imageNumber)
+      .then(function(response) {
+        return response.json();
+      })
+      .then(function(manifest) {
+        manifest.images.forEach(function(image) {
+          const medium = tonedUrl(image.medium);
+          if (prefetchedImages.has(medium)) {
+            return;
+          }
+          prefetchedImages.add(medium);
+          const link = document.createElement('link');
+          link.rel = 'prefetch';
+          link.as = 'image';
+          link.href = medium;
+          document.head.append(link);
+        });
+      });
+}
+window.addEventListener('load', function() {
+  whenIdle(prefetchImagesAfter.bind(null, 1));
+});
+
 let invert = 0;
+let equalize = 0;
 let contrast = 1;
 let tempContrast = contrast;
 let brightness = 1;
 let tempBrightness = brightness;
+let isEditingTone = false;
+
+// Tones are rendered by the server, as filtering a zoomed in image on
+// every frame is slow on small devices.  Only the brightness and
+// contrast being tried out in the tone editor are CSS filters.
+function toneName(tone) {
+  const percent = function(value) {
+    return String(Math.round(value * 100)).padStart(3, '0');
+  };
+  return 'i' + tone.invert + 'e' + tone.equalize +
+      'b' + percent(tone.brightness) + 'c' + percent(tone.contrast);
+}
+
+const originalTone = toneName({
+  invert: 0,
+  equalize: 0,
+  brightness: 1,
+  contrast: 1,
+});
+let imageTone = originalTone;
+function tonedUrl(url) {
+  if (imageTone == originalTone) {
+    return url;
+  }
+  return url.replace(/\/([^/]+)$/, '/' + imageTone + '/$1');
+}
+
+function setImageTone(tone) {
+  const name = toneName(tone);
+  if (name == imageTone) {
+    return;
+  }
+  imageTone = name;
+  imageHolder.querySelectorAll(':scope > .col > img').forEach(function(image) {
+    const medium = tonedUrl(image.dataset.medium);
+    image.srcset =
+        medium + ' 1280w, ' + tonedUrl(image.dataset.large) + ' 2560w';
+    image.src = medium;
+  });
+  imageHolder.querySelectorAll('.tiles').forEach(function(overlay) {
+    overlay.replaceChildren();
+  });
+  scheduleTileUpdate();
+}
 
 const imageViewPort = document.getElementById('id_image_view_port');
 function setFilterStyle() {
-  imageViewPort.style.setProperty(
-      'filter',
-      'invert(' + invert + ') ' +
-      'contrast(' + tempContrast + ') ' +
-      'brightness(' + tempBrightness + ')',
-  );
+  if (isEditingTone) {
+    setImageTone({
+      invert: invert,
+      equalize: equalize,
+      brightness: 1,
+      contrast: 1,
+    });
+    imageViewPort.style.setProperty(
+        'filter',
+        'contrast(' + tempContrast + ') ' +
+        'brightness(' + tempBrightness + ')',
+    );
+  } else {
+    setImageTone({
+      invert: invert,
+      equalize: equalize,
+      brightness: brightness,
+      contrast: contrast,
+    });
+    imageViewPort.style.removeProperty('filter');
+  }
 }
 
 document.getElementById('id_invert_button').onclick = function() {
@@ -34,6 +131,11 @@ document.getElementById('id_invert_button').onclick = function() {
   setFilterStyle();
 };
 
+document.getElementById('id_equalize_button').onclick = function() {
+  equalize = 1 ^ equalize;
+  setFilterStyle();
+};
+
 const brightnessSliderElement = document.getElementById('id_brightness_slider');
 brightnessSliderElement.oninput = function() {
   tempBrightness = this.value;
@@ -47,11 +149,16 @@ contrastSliderElement.oninput = function() {
 };
 
 const modalElement = document.getElementById('id_tone_modal');
+modalElement.addEventListener('show.bs.modal', function() {
+  isEditingTone = true;
+  setFilterStyle();
+});
 modalElement.addEventListener('hide.bs.modal', function() {
   tempContrast = contrast;
   tempBrightness = brightness;
   contrastSliderElement.value = contrast;
   brightnessSliderElement.value = brightness;
+  isEditingTone = false;
   setFilterStyle();
 });
 
@@ -77,8 +184,198 @@ function setTransformStyle() {
       'rotate(' + rotation + 'deg) ' +
       'translate(' + translateX + 'px, ' + translateY + 'px)',
   );
+  scheduleTileUpdate();
+}
+
+// Zoomed past the detail of the rendition shown, the part of the image
+// on screen is drawn from tiles of the pyramid level matching the zoom,
+// so only what is visible is fetched and decoded, however large the scan.
+const pyramids = new Map();
+function loadPyramid(url) {
+  if (!pyramids.has(url)) {
+    pyramids.set(url, null);
+    fetch(url + '.json')
+        .then(function(response) {
+          return response.json();
+        })
+        .then(function(pyramid) {
+          pyramids.set(url, pyramid);
+          scheduleTileUpdate();
+        });
+  }
+  return pyramids.get(url);
+}
+
+function levelSize(pyramid, level) {
+  const divisor = Math.pow(2, pyramid.max_level - level);
+  return [
+    Math.ceil(pyramid.width / divisor),
+    Math.ceil(pyramid.height / divisor),
+  ];
+}
+
+function levelFor(pyramid, pixels) {
+  let level = pyramid.max_level;
+  while (level > 0 && levelSize(pyramid, level - 1)[0] >= pixels) {
+    level -= 1;
+  }
+  return level;
+}
+
+// Maps a point of the rotated image's box, in fractions of the box, to
+// the same fractions of the image.
+const unrotateFuncMap = {
+  0: function(x, y) {
+    return [x, y];
+  },
+  90: function(x, y) {
+    return [y, 1 - x];
+  },
+  180: function(x, y) {
+    return [1 - x, 1 - y];
+  },
+  270: function(x, y) {
+    return [1 - y, x];
+  },
+};
+
+function visibleRegion(image) {
+  const box = image.getBoundingClientRect();
+  const view = imageViewPort.getBoundingClientRect();
+  const left = (Math.max(box.left, view.left) - box.left) / box.width;
+  const right = (Math.min(box.right, view.right) - box.left) / box.width;
+  const top = (Math.max(box.top, view.top) - box.top) / box.height;
+  const bottom = (Math.min(box.bottom, view.bottom) - box.top) / box.height;
+  if (left >= right || top >= bottom) {
+    return null;
+  }
+  const first = unrotateFuncMap[rotation](left, top);
+  const second = unrotateFuncMap[rotation](right, bottom);
+  return {
+    left: Math.min(first[0], second[0]),
+    right: Math.max(first[0], second[0]),
+    top: Math.min(first[1], second[1]),
+    bottom: Math.max(first[1], second[1]),
+  };
+}
+
+function tileSpan(start, end, tileSize, count) {
+  return [
+    Math.max(0, Math.floor(Math.floor(start) / tileSize)),
+    Math.min(count - 1, Math.floor((Math.ceil(end) - 1) / tileSize)),
+  ];
+}
+
+function makeTile(url, tile) {
+  const pyramid = tile.pyramid;
+  const level = tile.level;
+  const column = tile.column;
+  const row = tile.row;
+  const size = levelSize(pyramid, level);
+  const tileSize = pyramid.tile_size;
+  const tileElement = document.createElement('img');
+  tileElement.src = url + '/' + level + '/' + column + '_' + row + '.jpg';
+  tileElement.alt = '';
+  tileElement.style.left = column * tileSize / size[0] * 100 + '%';
+  tileElement.style.top = row * tileSize / size[1] * 100 + '%';
+  tileElement.style.width =
+      Math.min(tileSize, size[0] - column * tileSize) / size[0] * 100 + '%';
+  tileElement.style.height =
+      Math.min(tileSize, size[1] - row * tileSize) / size[1] * 100 + '%';
+  return tileElement;
+}
+
+function wantedTiles(container, image) {
+  const wanted = new Map();
+  // Device pixels the width of the image is drawn with.
+  const pixels = image.offsetWidth * scale * window.devicePixelRatio;
+  if (container.hidden || !image.naturalWidth ||
+      pixels <= image.naturalWidth) {
+    return wanted;
+  }
+  const pyramid = loadPyramid(container.dataset.tiles);
+  const region = visibleRegion(image);
+  if (!pyramid || !region) {
+    return wanted;
+  }
+  const level = levelFor(pyramid, pixels);
+  const size = levelSize(pyramid, level);
+  if (size[0] <= image.naturalWidth) {
+    return wanted;
+  }
+  const tileSize = pyramid.tile_size;
+  const columns = tileSpan(
+      region.left * size[0],
+      region.right * size[0],
+      tileSize,
+      Math.ceil(size[0] / tileSize),
+  );
+  const rows = tileSpan(
+      region.top * size[1],
+      region.bottom * size[1],
+      tileSize,
+      Math.ceil(size[1] / tileSize),
+  );
+  for (let row = rows[0]; row <= rows[1]; row++) {
+    for (let column = columns[0]; column <= columns[1]; column++) {
+      wanted.set(level + '/' + column + '_' + row, {
+        pyramid: pyramid,
+        level: level,
+        column: column,
+        row: row,
+      });
+    }
+  }
+  return wanted;
+}
+
+let tileUpdateScheduled = false;
+function updateTiles() {
+  tileUpdateScheduled = false;
+  imageHolder.querySelectorAll(':scope > .col').forEach(function(container) {
+    const image = container.querySelector(':scope > img');
+    let overlay = container.querySelector(':scope > .tiles');
+    const wanted = wantedTiles(container, image);
+    if (!overlay) {
+      if (!wanted.size) {
+        return;
+      }
+      overlay = document.createElement('div');
+      overlay.className = 'tiles';
+      container.append(overlay);
+    }
+    overlay.style.left = image.offsetLeft + 'px';
+    overlay.style.top = image.offsetTop + 'px';
+    overlay.style.width = image.offsetWidth + 'px';
+    overlay.style.height = image.offsetHeight + 'px';
+    // Tiles scrolled out of view or of another level are dropped, so
+    // their bitmaps can be freed.
+    Array.from(overlay.children).forEach(function(tile) {
+      if (wanted.has(tile.dataset.key)) {
+        wanted.delete(tile.dataset.key);
+      } else {
+        tile.remove();
+      }
+    });
+    wanted.forEach(function(tile, key) {
+      const tileElement = makeTile(tonedUrl(container.dataset.tiles), tile);
+      tileElement.dataset.key = key;
+      overlay.append(tileElement);
+    });
+  });
 }
 
+function scheduleTileUpdate() {
+  if (!tileUpdateScheduled) {
+    tileUpdateScheduled = true;
+    window.requestAnimationFrame(updateTiles);
+  }
+}
+window.addEventListener('resize', scheduleTileUpdate);
+imageHolder.querySelectorAll('img').forEach(function(image) {
+  image.addEventListener('load', scheduleTileUpdate);
+});
+
 document.getElementById('id_zoom_in').onclick = function() {
   if (scale >= 26) {
     return;
@@ -158,3 +455,63 @@ mainImageContainer.ontouchstart = function(event) {
     event.preventDefault();
   }
 };
+
+const playerList = document.getElementById('id_players');
+function findPlayer(playerId) {
+  return playerList.querySelector('[data-player-id="' + playerId + '"]');
+}
+const gameEventHandlers = {
+  join: function(event) {
+    if (findPlayer(event.player_id)) {
+      return;
+    }
+    const playerElement = document.createElement('li');
+    playerElement.dataset.playerId = event.player_id;
+    const nameElement = document.createElement('span');
+    nameElement.className = 'player-name';
+    nameElement.textContent = event.name;
+    const scoreElement = document.createElement('span');
+    scoreElement.className = 'player-score';
+    scoreElement.textContent = '0';
+    playerElement.append(nameElement, ' ', scoreElement);
+    playerList.append(playerElement);
+  },
+  score: function(event) {
+    const playerElement = findPlayer(event.player_id);
+    if (playerElement) {
+      playerElement.querySelector('.player-score').textContent = event.score;
+      if (event.rank) {
+        playerElement.dataset.rank = event.rank;
+      }
+    }
+  },
+  scores: function(event) {
+    // Only players whose rank or score changed are sent.
+    event.ranks.forEach(gameEventHandlers.score);
+    const rank = function(playerElement) {
+      return Number(playerElement.dataset.rank) || Number.MAX_SAFE_INTEGER;
+    };
+    Array.from(playerList.children)
+        .sort(function(first, second) {
+          return rank(first) - rank(second);
+        })
+        .forEach(function(playerElement) {
+          playerList.append(playerElement);
+        });
+  },
+};
+
+function connectGameSocket() {
+  const protocol = window.location.protocol == 'https:' ? 'wss://' : 'ws://';
+  const socket = new WebSocket(
+      protocol + window.location.host + window.location.pathname + 'socket/',
+  );
+  socket.onmessage = function(message) {
+    const event = JSON.parse(message.data);
+    const handler = gameEventHandlers[event.type];
+    if (handler) {
+      handler(event);
+    }
+  };
+}
+connectGameSocket();
@@ -0,0 +1,441 @@
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import timedelta
+from functools import lru_cache
+from time import monotonic
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+from uuid import UUID
+from weakref import WeakKeyDictionary
+
+from django.conf import settings
+
+from games.codec import decode_game, decode_round, encode_game
+from games.metrics import STORE_SECONDS
+from games.models import FINISHED, Game, Player
+from games.sharding import Shards, redis_shards
+
+GAME_LIFETIME = timedelta(hours=2)
+# Finished games are kept this long after their last access, for their
+# players to see how it ended.
+FINISHED_GAME_LIFETIME = timedelta(minutes=10)
+
+if TYPE_CHECKING:  # pragma: no cover
+    # Imported when first used, so workers without Redis start sooner.
+    from games.redis_client import PooledRedis, RedisClients
+
+T = TypeVar('T')
+
+
+class GameNotFound(KeyError):
+    pass
+
+
+class SweptGame(NamedTuple):
+    game_id: UUID
+    finished: bool
+    # Bytes the game took in the store, encoded.
+    size: int
+
+
+class GameStore(ABC):
+    """Holds games between requests, keyed by ``Game.id``.
+
+    Every access refreshes the game's time to live, mirroring the cookie
+    renewal in the views, so a game lives as long as somebody uses it.
+    Finished games have a shorter time to live.  Games returned by
+    ``get`` are snapshots; use ``update`` to mutate.
+    """
+
+    @abstractmethod
+    async def get(self, game_id: UUID) -> Optional[Game]:
+        pass
+
+    @abstractmethod
+    async def read(
+            self,
+            game_id: UUID,
+            decode: Callable[[bytes], T],
+    ) -> Optional[T]:
+        """Like ``get``, but return only what ``decode`` reads of the game.
+
+        ``decode`` is given the game encoded by ``games.codec``, so it can
+        skip what the caller doesn't need, such as the batches.
+        """
+
+    @abstractmethod
+    async def put(self, game: Game) -> None:
+        pass
+
+    @abstractmethod
+    async def update(self, game_id: UUID, mutate: Callable[[Game], T]) -> T:
+        """Atomically apply ``mutate`` to a game and store the result.
+
+        ``mutate`` may run more than once if another writer gets there
+        first, so it must not have side effects outside the game.
+        """
+
+    @abstractmethod
+    async def delete(self, game_id: UUID) -> None:
+        pass
+
+    async def sweep(self, limit: int) -> List[SweptGame]:
+        """Evict at most ``limit`` expired games and say what they were.
+
+        Stores whose games expire by themselves, like Redis keys, have
+        nothing to sweep.
+        """
+        return []
+
+    async def close(self) -> None:
+        pass
+
+    async def update_player(
+            self,
+            game_id: UUID,
+            player_id: UUID,
+            mutate: Callable[[Player], T],
+    ) -> T:
+        def mutate_player(game: Game) -> T:
+            player = game.players.get(player_id)
+            if player is None:
+                raise KeyError(player_id)
+            return mutate(player)
+
+        return await self.update(game_id, mutate_player)
+
+
+class InMemoryGameStore(GameStore):
+    """Process local store, for development and single worker setups.
+
+    Games are kept encoded, as in Redis, so what ``get`` returns is a
+    snapshot here too and a failed ``update`` leaves the game as it was.
+    Expired games are evicted by ``sweep``, a batch at a time, rather
+    than by the requests that happen to find them, so no request waits
+    on a long eviction.  A request for an expired game still gets none.
+    """
+
+    def __init__(
+            self,
+            ttl: timedelta = GAME_LIFETIME,
+            clock: Callable[[], float] = monotonic,
+            finished_ttl: timedelta = FINISHED_GAME_LIFETIME,
+            encode: Callable[[Game], bytes] = encode_game,
+            decode: Callable[[bytes], Game] = decode_game,
+    ):
+        self._ttl = ttl.total_seconds()
+        self._finished_ttl = finished_ttl.total_seconds()
+        self._clock = clock
+        self._encode = encode
+        self._decode = decode
+        self._lock = threading.Lock()
+        # Ordered by last write, so the games that expire first are always
+        # at the front and eviction never has to scan live games.  Finished
+        # games live shorter, so they are kept in order apart.
+        self._games: 'OrderedDict[UUID, Tuple[float, bytes]]' = OrderedDict()
+        self._finished: 'OrderedDict[UUID, Tuple[float, bytes]]' = (
+            OrderedDict()
+        )
+
+    async def get(self, game_id: UUID) -> Optional[Game]:
+        with self._lock:
+            found = self._find(game_id)
+            if found is not None:
+                self._store(game_id, *found)
+        return self._decode(found[1]) if found is not None else None
+
+    async def read(
+            self,
+            game_id: UUID,
+            decode: Callable[[bytes], T],
+    ) -> Optional[T]:
+        with self._lock:
+            found = self._find(game_id)
+            if found is not None:
+                self._store(game_id, *found)
+        return decode(found[1]) if found is not None else None
+
+    async def put(self, game: Game) -> None:
+        data = self._encode(game)
+        with self._lock:
+            self._store(game.id, game.state == FINISHED, data)
+
+    async def update(self, game_id: UUID, mutate: Callable[[Game], T]) -> T:
+        with self._lock:
+            found = self._find(game_id)
+            if found is None:
+                raise GameNotFound(game_id)
+            game = self._decode(found[1])
+            result = mutate(game)
+            self._store(game_id, game.state == FINISHED, self._encode(game))
+        return result
+
+    async def delete(self, game_id: UUID) -> None:
+        with self._lock:
+            self._games.pop(game_id, None)
+            self._finished.pop(game_id, None)
+
+    async def sweep(self, limit: int) -> List[SweptGame]:
+        with self._lock:
+            return self._evict_expired(limit)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._evict_expired()
+            return len(self._games) + len(self._finished)
+
+    def _find(self, game_id: UUID) -> Optional[Tuple[bool, bytes]]:
+        """Return whether the game is finished, and the game encoded."""
+        for games in (self._games, self._finished):
+            expires_and_data = games.get(game_id)
+            if expires_and_data is not None:
+                expires, data = expires_and_data
+                if expires <= self._clock():
+                    del games[game_id]
+                    return None
+                return games is self._finished, data
+        return None
+
+    def _store(self, game_id: UUID, finished: bool, data: bytes) -> None:
+        self._games.pop(game_id, None)
+        self._finished.pop(game_id, None)
+        if finished:
+            self._finished[game_id] = (
+                self._clock() + self._finished_ttl,
+                data,
+            )
+        else:
+            self._games[game_id] = (self._clock() + self._ttl, data)
+
+    def _evict_expired(
+            self,
+            limit: Optional[int] = None,
+    ) -> List[SweptGame]:
+        current_time = self._clock()
+        evicted: List[SweptGame] = []
+        for games in (self._finished, self._games):
+            while games and (limit is None or len(evicted) < limit):
+                game_id, (expires, data) = next(iter(games.items()))
+                if expires > current_time:
+                    break
+                del games[game_id]
+                evicted.append(SweptGame(
+                    game_id,
+                    games is self._finished,
+                    len(data),
+                ))
+        return evicted
+
+
+class RedisGameStore(GameStore):
+    """Shared store so several workers and containers can serve a game.
+
+    A game is kept as one value under ``game:<id>`` and ``update`` uses
+    WATCH/MULTI so concurrent writers retry instead of losing updates.
+    Watching and reading the game is one round trip, writing it another.
+    """
+
+    def __init__(
+            self,
+            client_factory: Callable[[], 'PooledRedis'],
+            ttl: timedelta = GAME_LIFETIME,
+            encode: Callable[[Game], bytes] = encode_game,
+            decode: Callable[[bytes], Game] = decode_game,
+            finished_ttl: timedelta = FINISHED_GAME_LIFETIME,
+    ):
+        self._client_factory = client_factory
+        self._ttl = int(ttl.total_seconds())
+        self._finished_ttl = int(finished_ttl.total_seconds())
+        self._encode = encode
+        self._decode = decode
+        # aioredis connections are bound to the event loop that opened
+        # them, and sync views get a fresh loop for every async_to_sync.
+        self._clients: 'WeakKeyDictionary[Any, PooledRedis]' = (
+            WeakKeyDictionary()
+        )
+
+    @classmethod
+    def from_url(
+            cls,
+            url: str,
+            clients: Optional['RedisClients'] = None,
+            **kwargs: Any,
+    ) -> 'RedisGameStore':
+        # pylint: disable=import-outside-toplevel
+        from games.redis_client import RedisClients
+        shared = clients or RedisClients()
+        return cls(lambda: shared.client(url), **kwargs)
+
+    async def get(self, game_id: UUID) -> Optional[Game]:
+        key = self._key(game_id)
+        async with self._client().pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.expire(key, self._ttl)
+            data, _ = await pipe.execute()
+        if data is None:
+            return None
+        game = self._decode(data)
+        if game.state == FINISHED:
+            await self._client().expire(key, self._finished_ttl)
+        return game
+
+    async def read(
+            self,
+            game_id: UUID,
+            decode: Callable[[bytes], T],
+    ) -> Optional[T]:
+        key = self._key(game_id)
+        async with self._client().pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.expire(key, self._ttl)
+            data, _ = await pipe.execute()
+        if data is None:
+            return None
+        if decode_round(data).state == FINISHED:
+            await self._client().expire(key, self._finished_ttl)
+        return decode(data)
+
+    async def put(self, game: Game) -> None:
+        await self._client().set(
+            self._key(game.id),
+            self._encode(game),
+            ex=self._ttl_of(game),
+        )
+
+    async def update(self, game_id: UUID, mutate: Callable[[Game], T]) -> T:
+        # pylint: disable=import-outside-toplevel
+        from aioredis.exceptions import WatchError
+        key = self._key(game_id)
+        async with self._client().pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    data = await pipe.watch_and_get(key)
+                    if data is None:
+                        raise GameNotFound(game_id)
+                    game = self._decode(data)
+                    result = mutate(game)
+                    pipe.multi()
+                    pipe.set(key, self._encode(game), ex=self._ttl_of(game))
+                    await pipe.execute()
+                    return result
+                except WatchError:
+                    continue
+
+    async def delete(self, game_id: UUID) -> None:
+        await self._client().delete(self._key(game_id))
+
+    async def close(self) -> None:
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+    def _client(self) -> 'PooledRedis':
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = self._client_factory()
+        return client
+
+    def _ttl_of(self, game: Game) -> int:
+        return self._finished_ttl if game.state == FINISHED else self._ttl
+
+    @staticmethod
+    def _key(game_id: UUID) -> str:
+        return f'game:{game_id}'
+
+
+class ShardedGameStore(GameStore):
+    """Spreads games over the stores of ``shards`` by ``Game.id``."""
+
+    def __init__(self, shards: 'Shards[GameStore]'):
+        self._shards = shards
+
+    async def get(self, game_id: UUID) -> Optional[Game]:
+        return await self._shards[game_id].get(game_id)
+
+    async def read(
+            self,
+            game_id: UUID,
+            decode: Callable[[bytes], T],
+    ) -> Optional[T]:
+        return await self._shards[game_id].read(game_id, decode)
+
+    async def put(self, game: Game) -> None:
+        await self._shards[game.id].put(game)
+
+    async def update(self, game_id: UUID, mutate: Callable[[Game], T]) -> T:
+        return await self._shards[game_id].update(game_id, mutate)
+
+    async def delete(self, game_id: UUID) -> None:
+        await self._shards[game_id].delete(game_id)
+
+    async def sweep(self, limit: int) -> List[SweptGame]:
+        evicted: List[SweptGame] = []
+        for store in self._shards:
+            if len(evicted) >= limit:
+                break
+            evicted.extend(await store.sweep(limit - len(evicted)))
+        return evicted
+
+    async def close(self) -> None:
+        for store in self._shards:
+            await store.close()
+
+
+class TimedGameStore(GameStore):
+    """Records how long the operations of another store take."""
+
+    def __init__(self, store: GameStore):
+        self.store = store
+
+    async def get(self, game_id: UUID) -> Optional[Game]:
+        with STORE_SECONDS.time('get'):
+            return await self.store.get(game_id)
+
+    async def read(
+            self,
+            game_id: UUID,
+            decode: Callable[[bytes], T],
+    ) -> Optional[T]:
+        with STORE_SECONDS.time('read'):
+            return await self.store.read(game_id, decode)
+
+    async def put(self, game: Game) -> None:
+        with STORE_SECONDS.time('put'):
+            await self.store.put(game)
+
+    async def update(self, game_id: UUID, mutate: Callable[[Game], T]) -> T:
+        with STORE_SECONDS.time('update'):
+            return await self.store.update(game_id, mutate)
+
+    async def delete(self, game_id: UUID) -> None:
+        with STORE_SECONDS.time('delete'):
+            await self.store.delete(game_id)
+
+    async def sweep(self, limit: int) -> List[SweptGame]:
+        with STORE_SECONDS.time('sweep'):
+            return await self.store.sweep(limit)
+
+    async def close(self) -> None:
+        await self.store.close()
+
+
+@lru_cache(maxsize=None)
+def get_game_store() -> GameStore:
+    """Return the store for this process, picked by ``REDIS_URL``."""
+    store: GameStore
+    if settings.REDIS_URL:
+        store = ShardedGameStore(redis_shards(RedisGameStore.from_url))
+    else:
+        store = InMemoryGameStore()
+    return TimedGameStore(store)
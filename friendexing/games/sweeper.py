@@ -0,0 +1,123 @@
+"""Evicts expired games, and originals no game has shown, in the background.
+
+The guesses of evicted games go with them.
+
+Each sweep works in batches of at most ``SWEEP_BATCH_SIZE``, yielding
+between batches, so requests waiting on the store wait for one batch
+at most.  What each sweep reclaims is counted in ``games.metrics``.
+"""
+import asyncio
+import logging
+import threading
+from datetime import timedelta
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from games.guesses import GuessStore, get_guess_store
+from games.images import DerivativeCache, get_derivative_cache
+from games.metrics import (
+    FORGOTTEN_IMAGES,
+    SWEEP_SECONDS,
+    SWEPT_GAME_BYTES,
+    SWEPT_GAMES,
+)
+from games.stores import GAME_LIFETIME, GameStore, get_game_store
+
+LOGGER = logging.getLogger(__name__)
+
+SWEEP_INTERVAL = timedelta(minutes=1)
+SWEEP_BATCH_SIZE = 200
+
+
+class Sweep(NamedTuple):
+    games: int
+    # Size of the games as they were stored.
+    game_bytes: int
+    images: int
+
+
+class Sweeper:
+    """Sweeps ``store`` and the originals of ``derivatives`` periodically.
+
+    Originals unused for ``image_idle`` are forgotten, which by default
+    is as long as a game lives without being played.  The guesses of the
+    games evicted are forgotten by ``guesses``, if given.
+    """
+
+    def __init__(
+            self,
+            store: GameStore,
+            derivatives: DerivativeCache,
+            interval: timedelta = SWEEP_INTERVAL,
+            batch_size: int = SWEEP_BATCH_SIZE,
+            image_idle: timedelta = GAME_LIFETIME,
+            guesses: Optional[GuessStore] = None,
+    ):
+        self._store = store
+        self._derivatives = derivatives
+        self._interval = interval.total_seconds()
+        self._batch_size = batch_size
+        self._image_idle = image_idle.total_seconds()
+        self._guesses = guesses
+
+    async def sweep(self) -> Sweep:
+        games = game_bytes = images = 0
+        while True:
+            with SWEEP_SECONDS.time():
+                evicted = await self._store.sweep(self._batch_size)
+            for game in evicted:
+                SWEPT_GAMES.inc('finished' if game.finished else 'idle')
+                SWEPT_GAME_BYTES.inc(amount=game.size)
+                game_bytes += game.size
+                if self._guesses is not None:
+                    await self._guesses.forget(game.game_id)
+            games += len(evicted)
+            if len(evicted) < self._batch_size:
+                break
+            await asyncio.sleep(0)
+        while True:
+            with SWEEP_SECONDS.time():
+                forgotten = self._derivatives.forget_unused(
+                    self._image_idle,
+                    self._batch_size,
+                )
+            FORGOTTEN_IMAGES.inc(amount=forgotten)
+            images += forgotten
+            if forgotten < self._batch_size:
+                break
+            await asyncio.sleep(0)
+        return Sweep(games, game_bytes, images)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception('Could not sweep games')
+            await asyncio.sleep(self._interval)
+
+    def run_in_thread(self) -> threading.Thread:
+        """Sweep from a daemon thread with its own event loop."""
+        thread = threading.Thread(
+            target=asyncio.run,
+            args=(self.run(),),
+            name='game-sweeper',
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+
+@lru_cache(maxsize=None)
+def get_sweeper() -> Sweeper:
+    """Return this process' sweeper, sweeping in a thread.
+
+    Started once per worker, when the server starts the application.
+    """
+    sweeper = Sweeper(
+        get_game_store(),
+        get_derivative_cache(),
+        guesses=get_guess_store(),
+    )
+    sweeper.run_in_thread()
+    return sweeper
@@ -0,0 +1,395 @@
+"""Deep zoom tile pyramids of batch images, made once and cached on disk.
+
+Level ``max_level`` is the original and each level below it is half as
+wide and high, down to a single pixel at level 0, as in Deep Zoom.
+Every level is cut into square tiles, so a zoomed in viewer fetches and
+decodes only the tiles it shows, at the level matching its zoom.
+
+Pyramids are named after the content hash of their original, like the
+renditions of ``DerivativeCache``, and evicted whole, least recently
+used first.  Tiles in other tones are made one at a time, as they are
+asked for, and kept in the pyramid of their image.
+"""
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from django.conf import settings
+from PIL import Image as PillowImage
+from PIL import ImageOps
+
+from games.images import (
+    EXTENSION,
+    DerivativeCache,
+    StrPath,
+    get_derivative_cache,
+)
+from games.tones import ORIGINAL, Tone, apply_tone
+
+TILE_SIZE = 256
+TILE_QUALITY = 80
+
+DESCRIPTOR = 'pyramid.json'
+# Holds a folder of levels for each tone but the original.
+TONES = 'tones'
+
+
+class Pyramid(NamedTuple):
+    width: int
+    height: int
+    tile_size: int
+    max_level: int
+
+    def level_size(self, level: int) -> Tuple[int, int]:
+        scale = 1 << (self.max_level - level)
+        return -(-self.width // scale), -(-self.height // scale)
+
+    def grid(self, level: int) -> Tuple[int, int]:
+        """Return the number of tile columns and rows of ``level``."""
+        width, height = self.level_size(level)
+        return -(-width // self.tile_size), -(-height // self.tile_size)
+
+    def has_tile(self, level: int, column: int, row: int) -> bool:
+        if not 0 <= level <= self.max_level:
+            return False
+        columns, rows = self.grid(level)
+        return 0 <= column < columns and 0 <= row < rows
+
+    def level_for(self, pixels: float) -> int:
+        """Return the least detailed level at least ``pixels`` wide."""
+        level = self.max_level
+        while level > 0 and self.level_size(level - 1)[0] >= pixels:
+            level -= 1
+        return level
+
+    def visible_tiles(
+            self,
+            level: int,
+            left: float,
+            top: float,
+            right: float,
+            bottom: float,
+    ) -> List[Tuple[int, int]]:
+        """Return the tiles of ``level`` showing a region of the image.
+
+        The region is given in fractions of the image's width and height.
+        """
+        width, height = self.level_size(level)
+        columns, rows = self.grid(level)
+        first_column, last_column = _tile_span(
+            left * width,
+            right * width,
+            self.tile_size,
+            columns,
+        )
+        first_row, last_row = _tile_span(
+            top * height,
+            bottom * height,
+            self.tile_size,
+            rows,
+        )
+        return [
+            (column, row)
+            for row in range(first_row, last_row + 1)
+            for column in range(first_column, last_column + 1)
+        ]
+
+
+def _tile_span(
+        start: float,
+        end: float,
+        tile_size: int,
+        count: int,
+) -> Tuple[int, int]:
+    first = max(0, math.floor(start) // tile_size)
+    last = min(count - 1, (math.ceil(end) - 1) // tile_size)
+    return first, last
+
+
+def pyramid_for(
+        width: int,
+        height: int,
+        tile_size: int = TILE_SIZE,
+) -> Pyramid:
+    return Pyramid(
+        width,
+        height,
+        tile_size,
+        (max(width, height) - 1).bit_length(),
+    )
+
+
+def build_pyramid(
+        source: StrPath,
+        directory: Path,
+        tile_size: int = TILE_SIZE,
+        quality: int = TILE_QUALITY,
+) -> Pyramid:
+    """Write the tiles of ``source`` under ``directory``, a folder a level.
+
+    Each level is resized from the one above it, so the original is
+    decoded once.  The descriptor is written last.
+    """
+    with PillowImage.open(source) as original:
+        image = ImageOps.exif_transpose(original).convert('RGB')
+    pyramid = pyramid_for(image.width, image.height, tile_size)
+    for level in range(pyramid.max_level, -1, -1):
+        size = pyramid.level_size(level)
+        if image.size != size:
+            image = image.resize(size, PillowImage.Resampling.LANCZOS)
+        level_directory = directory / str(level)
+        level_directory.mkdir()
+        columns, rows = pyramid.grid(level)
+        for column in range(columns):
+            for row in range(rows):
+                left = column * tile_size
+                top = row * tile_size
+                tile = image.crop((
+                    left,
+                    top,
+                    min(left + tile_size, image.width),
+                    min(top + tile_size, image.height),
+                ))
+                tile.save(
+                    level_directory / f'{column}_{row}{EXTENSION}',
+                    'JPEG',
+                    quality=quality,
+                    optimize=True,
+                )
+    (directory / DESCRIPTOR).write_text(json.dumps(pyramid._asdict()))
+    return pyramid
+
+
+def read_pyramid(directory: Path) -> Pyramid:
+    return Pyramid(**json.loads((directory / DESCRIPTOR).read_text()))
+
+
+def _directory_size(directory: Path) -> int:
+    return sum(
+        path.stat().st_size for path in directory.rglob('*') if path.is_file()
+    )
+
+
+class TileCache:
+    """Content addressed tile pyramids under ``root``, at most ``max_bytes``.
+
+    Originals are looked up in ``derivatives``, so images hashed by any
+    process sharing its cache can be tiled.
+    """
+
+    def __init__(
+            self,
+            root: StrPath,
+            derivatives: DerivativeCache,
+            max_bytes: int,
+    ):
+        self._root = Path(root)
+        self._derivatives = derivatives
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Building one pyramid at a time keeps a single full size image
+        # in memory, however many of them are first zoomed into at once.
+        self._build_lock = threading.Lock()
+        # Digest to pyramid and its size in bytes, least recently used
+        # first.
+        self._entries: 'OrderedDict[str, Tuple[Pyramid, int]]' = (
+            OrderedDict()
+        )
+        self._size = 0
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def pyramid(self, digest: str) -> Optional[Pyramid]:
+        """Return the pyramid of an image, building it if it is missing.
+
+        Returns ``None`` for originals no process sharing the cache has
+        seen.
+        """
+        pyramid = self._get(digest)
+        if pyramid is not None:
+            return pyramid
+        with self._build_lock:
+            pyramid = self._get(digest)
+            if pyramid is not None:
+                return pyramid
+            directory = self._root / digest
+            if (directory / DESCRIPTOR).exists():
+                # Built by another process.
+                pyramid = read_pyramid(directory)
+                self._remember(digest, pyramid, _directory_size(directory))
+                return pyramid
+            source = self._derivatives.source(digest)
+            if source is None:
+                return None
+            return self._build(digest, source)
+
+    def descriptor(self, digest: str) -> Optional[Path]:
+        if self.pyramid(digest) is None:
+            return None
+        return self._root / digest / DESCRIPTOR
+
+    def path(
+            self,
+            digest: str,
+            level: int,
+            column: int,
+            row: int,
+            tone: Tone = ORIGINAL,
+    ) -> Optional[Path]:
+        """Return the file of a tile, or ``None`` if there is no such tile."""
+        pyramid = self.pyramid(digest)
+        if pyramid is None or not pyramid.has_tile(level, column, row):
+            return None
+        name = f'{column}_{row}{EXTENSION}'
+        path = self._root / digest / str(level) / name
+        if tone == ORIGINAL:
+            return path
+        toned = self._root / digest / TONES / tone.name / str(level) / name
+        if toned.exists():
+            return toned
+        histogram = None
+        if tone.equalize:
+            histogram = self._derivatives.histogram(digest)
+            if histogram is None:
+                return None
+        return self._render_tone(pyramid, digest, path, tone, histogram)
+
+    def _render_tone(
+            self,
+            pyramid: Pyramid,
+            digest: str,
+            tile: Path,
+            tone: Tone,
+            histogram: Optional[Sequence[int]],
+    ) -> Optional[Path]:
+        # Folders are made one at a time, so that none are made in a
+        # pyramid just evicted.
+        directory = self._root / digest
+        for part in (TONES, tone.name, tile.parent.name):
+            directory /= part
+            try:
+                directory.mkdir(exist_ok=True)
+            except FileNotFoundError:
+                return None
+        path = directory / tile.name
+        descriptor, temporary_name = tempfile.mkstemp(
+            dir=directory,
+            suffix='.tmp',
+        )
+        try:
+            with os.fdopen(descriptor, 'wb') as temporary:
+                with PillowImage.open(tile) as original:
+                    image = original.convert('RGB')
+                apply_tone(image, tone, histogram).save(
+                    temporary,
+                    'JPEG',
+                    quality=TILE_QUALITY,
+                    optimize=True,
+                )
+            os.replace(temporary_name, path)
+        except FileNotFoundError:
+            # The pyramid was evicted meanwhile, by this process or
+            # another.
+            try:
+                os.unlink(temporary_name)
+            except FileNotFoundError:
+                pass
+            return None
+        except BaseException:
+            os.unlink(temporary_name)
+            raise
+        self._remember(digest, pyramid, path.stat().st_size)
+        return path
+
+    def _get(self, digest: str) -> Optional[Pyramid]:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            if not (self._root / digest / DESCRIPTOR).exists():
+                # Evicted by another process sharing the folder.
+                del self._entries[digest]
+                self._size -= entry[1]
+                return None
+            self._entries.move_to_end(digest)
+            return entry[0]
+
+    def _build(self, digest: str, source: Path) -> Pyramid:
+        # Built next to its final name and moved into place, so readers
+        # never see a partial pyramid, even with several workers.
+        temporary = Path(tempfile.mkdtemp(dir=self._root, suffix='.tmp'))
+        directory = self._root / digest
+        try:
+            pyramid = build_pyramid(source, temporary)
+            size = _directory_size(temporary)
+            os.rename(temporary, directory)
+        except OSError:
+            shutil.rmtree(temporary, ignore_errors=True)
+            if not (directory / DESCRIPTOR).exists():
+                raise
+            # Another process finished the same pyramid first.
+            pyramid = read_pyramid(directory)
+            size = _directory_size(directory)
+        except BaseException:
+            shutil.rmtree(temporary, ignore_errors=True)
+            raise
+        self._remember(digest, pyramid, size)
+        return pyramid
+
+    def _remember(self, digest: str, pyramid: Pyramid, size: int) -> None:
+        """Count ``size`` more bytes of the pyramid of ``digest``."""
+        with self._lock:
+            _, old_size = self._entries.pop(digest, (pyramid, 0))
+            self._size += size
+            self._entries[digest] = (pyramid, old_size + size)
+            evicted = []
+            while self._size > self._max_bytes and len(self._entries) > 1:
+                evicted_digest, (_, evicted_size) = self._entries.popitem(
+                    last=False,
+                )
+                self._size -= evicted_size
+                evicted.append(evicted_digest)
+        for evicted_digest in evicted:
+            self._remove(self._root / evicted_digest)
+
+    def _remove(self, directory: Path) -> None:
+        # Moved aside first, so no reader finds half a pyramid.
+        temporary = Path(tempfile.mkdtemp(dir=self._root, suffix='.tmp'))
+        try:
+            os.replace(directory, temporary)
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(temporary, ignore_errors=True)
+
+    def _load(self) -> None:
+        # As with renditions, the oldest pyramids are taken to be the
+        # least recently used.
+        pyramids = sorted(
+            (descriptor.stat().st_mtime, descriptor.parent)
+            for descriptor in self._root.glob(f'*/{DESCRIPTOR}')
+            if not descriptor.parent.name.endswith('.tmp')
+        )
+        for _, directory in pyramids:
+            size = _directory_size(directory)
+            self._entries[directory.name] = (read_pyramid(directory), size)
+            self._size += size
+
+
+@lru_cache(maxsize=None)
+def get_tile_cache() -> TileCache:
+    return TileCache(
+        settings.IMAGE_TILE_DIR,
+        get_derivative_cache(),
+        settings.IMAGE_TILE_MAX_BYTES,
+    )
@@ -0,0 +1,117 @@
+"""Tone presets of batch images, rendered by the server.
+
+A tone inverts, equalizes and changes the brightness and contrast of an
+image the way the play page's CSS filters do, so a client can show a
+rendition or tile made in that tone instead of filtering every frame.
+Brightness and contrast go in steps, which keeps the number of presets,
+and so of cached files, small.
+
+Every step maps each channel value to another one, so a tone is applied
+as a single lookup table.  Equalizing uses the histogram of the whole
+image, so that tiles of it match each other and its renditions.
+"""
+import re
+from typing import List, NamedTuple, Optional, Sequence
+
+from PIL import Image as PillowImage
+
+# Brightness and contrast are in percent, in these steps up to the most.
+TONE_STEP = 25
+MAX_TONE = 200
+
+_LEVELS = 256
+_TONE_NAME = re.compile(r'^i([01])e([01])b(\d{3})c(\d{3})$')
+
+
+class Tone(NamedTuple):
+    invert: bool = False
+    equalize: bool = False
+    brightness: int = 100
+    contrast: int = 100
+
+    @property
+    def name(self) -> str:
+        return (
+            f'i{self.invert:d}e{self.equalize:d}'
+            f'b{self.brightness:03d}c{self.contrast:03d}'
+        )
+
+
+ORIGINAL = Tone()
+
+
+def parse_tone(name: str) -> Tone:
+    """Return the tone ``name`` names.
+
+    Raises ``ValueError`` for names not of a preset.
+    """
+    match = _TONE_NAME.match(name)
+    if not match:
+        raise ValueError(f'Not a tone: {name}')
+    invert, equalize, brightness, contrast = match.groups()
+    tone = Tone(invert == '1', equalize == '1', int(brightness), int(contrast))
+    for percent in (tone.brightness, tone.contrast):
+        if percent > MAX_TONE or percent % TONE_STEP:
+            raise ValueError(f'Not a tone preset: {name}')
+    return tone
+
+
+def equalize_table(histogram: Sequence[int]) -> List[int]:
+    """Return a table spreading each band of ``histogram`` evenly.
+
+    This is how ``PIL.ImageOps.equalize`` builds its table.
+    """
+    table: List[int] = []
+    for start in range(0, len(histogram), _LEVELS):
+        band = histogram[start:start + _LEVELS]
+        used = [count for count in band if count]
+        step = (sum(used) - used[-1]) // (_LEVELS - 1) if used else 0
+        if not step:
+            table.extend(range(_LEVELS))
+            continue
+        total = step // 2
+        for count in band:
+            table.append(min(_LEVELS - 1, total // step))
+            total += count
+    return table
+
+
+def _clamp(value: float) -> float:
+    return min(1.0, max(0.0, value))
+
+
+def tone_table(
+        tone: Tone,
+        histogram: Optional[Sequence[int]] = None,
+        bands: int = 3,
+) -> List[int]:
+    """Return the lookup table of ``tone`` for an image of ``bands``.
+
+    As with the CSS filters, the image is inverted, then its contrast and
+    then its brightness is changed.  Equalizing comes first and needs the
+    image's ``histogram``.
+    """
+    contrast = tone.contrast / 100
+    brightness = tone.brightness / 100
+    curve = []
+    for level in range(_LEVELS):
+        value = level / (_LEVELS - 1)
+        if tone.invert:
+            value = 1 - value
+        value = _clamp((value - 0.5) * contrast + 0.5)
+        value = _clamp(value * brightness)
+        curve.append(round(value * (_LEVELS - 1)))
+    if not tone.equalize:
+        return curve * bands
+    if histogram is None:
+        raise ValueError('Equalizing needs the histogram of the image')
+    return [curve[level] for level in equalize_table(histogram)]
+
+
+def apply_tone(
+        image: PillowImage.Image,
+        tone: Tone,
+        histogram: Optional[Sequence[int]] = None,
+) -> PillowImage.Image:
+    """Return ``image``, in RGB, in ``tone``."""
+    return image.point(tone_table(tone, histogram))
@@ -1,9 +1,41 @@
 from django.urls import path
 
-from games.views import GameCreate, game_view, PlayerCreate
+from games.views import (
+    GameCreate,
+    fields_view,
+    finish_view,
+    game_view,
+    guess_view,
+    image_manifest_view,
+    image_view,
+    leaderboard_view,
+    PlayerCreate,
+    round_view,
+    tile_pyramid_view,
+    tile_view,
+)
 
 urlpatterns = [  # noqa: F841
     path('<uuid:game_id>/', game_view),
     path('<uuid:game_id>/join/', PlayerCreate.as_view()),
+    path('<uuid:game_id>/rounds/', round_view),
+    path('<uuid:game_id>/finish/', finish_view),
+    path('<uuid:game_id>/guesses/', guess_view),
+    path('<uuid:game_id>/fields/', fields_view),
+    path('<uuid:game_id>/images/', image_manifest_view),
+    path('<uuid:game_id>/leaderboard/', leaderboard_view),
     path('create/', GameCreate.as_view()),
+    path('images/<slug:digest>/<slug:rendition>.jpg', image_view),
+    path('images/<slug:digest>/tiles.json', tile_pyramid_view),
+    path(
+        'images/<slug:digest>/tiles/<int:level>/<int:column>_<int:row>.jpg',
+        tile_view,
+    ),
+    # The same in another tone, named as in ``games.tones``.
+    path('images/<slug:digest>/<slug:tone>/<slug:rendition>.jpg', image_view),
+    path(
+        'images/<slug:digest>/<slug:tone>/tiles/'
+        '<int:level>/<int:column>_<int:row>.jpg',
+        tile_view,
+    ),
 ]
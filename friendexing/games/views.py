@@ -1,20 +1,133 @@
-from datetime import timedelta, datetime
-from typing import Optional, Any, Dict
+from datetime import datetime, timezone
+from functools import lru_cache, partial
+from time import time
+from typing import Optional, Any, Dict, List, Tuple
 from uuid import UUID
 
+from asgiref.sync import async_to_sync
+from django.contrib.staticfiles import finders
+from django.core.exceptions import ImproperlyConfigured
 from django.forms import BaseForm
-from django.http import HttpRequest, HttpResponse
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseForbidden,
+    HttpResponseNotAllowed,
+    Http404,
+    JsonResponse,
+)
+from django.http.response import HttpResponseBase
 from django.shortcuts import render, redirect
-from django.utils.timezone import now
 from django.views.decorators.csrf import csrf_protect
+from django.views.decorators.http import require_POST, require_safe
 from django.views.generic import FormView
 
+from games.events import get_event_hub, make_event
 from games.forms import GameForm, PlayerForm
-from games.models import Game
+from games.codec import GameRound, decode_player, decode_round
+from games.guesses import (
+    MAX_GUESS_LENGTH,
+    Guess,
+    GuessesClosed,
+    get_guess_buffer,
+)
+from games.images import (
+    CONTENT_TYPE,
+    EXTENSION,
+    RENDITIONS,
+    get_derivative_cache,
+)
+from games.leaderboard import get_leaderboard
+from games.models import FINISHED, Game, InvalidTransition, Player
+from games.ordering import ordered_fields
+from games.responses import immutable_file_response
+from games.rounds import (
+    CLOSE_DELAY_SECONDS,
+    finish_game,
+    get_round_scheduler,
+    is_round_open,
+    start_round,
+)
+from games.stores import GameNotFound, get_game_store
+from games.tiles import get_tile_cache
+from games.tones import ORIGINAL, Tone, parse_tone
+from games.tokens import PlayerToken, get_player_tokens
 
 
-def get_expiry() -> datetime:
-    return now() + timedelta(hours=2)
+# Shown until a batch with images has been imported into the game.
+DEMO_IMAGE = 'games/demo-1.jpg'
+DEMO_IMAGE_COUNT = 6
+
+ROUND_CLOSED = {'error': 'The round is closed'}
+
+
+def get_request_token(
+        request: HttpRequest,
+        game_id: UUID,
+) -> Optional[PlayerToken]:
+    """Return the valid token of the request's player, checked in CPU."""
+    value = request.COOKIES.get(str(game_id))
+    return get_player_tokens().read(value, game_id) if value else None
+
+
+def set_token_cookie(response: HttpResponse, token: PlayerToken) -> None:
+    response.set_cookie(
+        key=str(token.game_id),
+        value=get_player_tokens().sign(token),
+        expires=datetime.fromtimestamp(token.expires, timezone.utc),
+        httponly=True,
+    )
+
+
+def renew_token_cookie(response: HttpResponse, token: PlayerToken) -> None:
+    """Reissue ``token`` if it is close to expiring."""
+    tokens = get_player_tokens()
+    if tokens.needs_renewal(token):
+        set_token_cookie(response, tokens.renew(token))
+
+
+# The manifest lists at most this many images after the current one.
+MAX_MANIFEST_IMAGES = 20
+
+# The leaderboard lists at most this many players from the top.
+MAX_LEADERBOARD_PLAYERS = 100
+
+
+@lru_cache(maxsize=None)
+def get_demo_digest() -> str:
+    """Return the digest of the demo image, hashed once per process."""
+    source = finders.find(DEMO_IMAGE)
+    if not isinstance(source, str):
+        raise ImproperlyConfigured(f'Static file {DEMO_IMAGE} is missing')
+    return get_derivative_cache().digest(source)
+
+
+def get_image_digests(game: Game) -> List[str]:
+    """Return the digest of every image of ``game``, in batch order."""
+    digests = [
+        image.digest
+        for batch in game.batches
+        for image in batch.images
+        if image.digest
+    ]
+    return digests or [get_demo_digest()] * DEMO_IMAGE_COUNT
+
+
+def get_image_urls(digests: List[str]) -> List[Dict[str, str]]:
+    """Return the URLs of every image, by rendition name and ``tiles``.
+
+    Renditions missing from the cache are made when first asked for.
+    """
+    urls = []
+    for digest in digests:
+        image_urls = {
+            rendition: f'/games/images/{digest}/{rendition}{EXTENSION}'
+            for rendition in RENDITIONS
+        }
+        # The pyramid descriptor is this with ``.json`` added.
+        image_urls['tiles'] = f'/games/images/{digest}/tiles'
+        urls.append(image_urls)
+    return urls
 
 
 class GameCreate(FormView):
@@ -25,12 +138,14 @@ class GameCreate(FormView):
     def form_valid(self, form: BaseForm) -> HttpResponse:
         assert isinstance(form, GameForm)
         self.game = form.create_game()
+        async_to_sync(get_game_store().put)(self.game)
         response = super().form_valid(form)
-        response.set_cookie(
-            key=str(self.game.id),
-            value=str(self.game.players[0].id),
-            expires=get_expiry(),
-        )
+        host = self.game.players[0]
+        set_token_cookie(response, get_player_tokens().issue(
+            self.game.id,
+            host.id,
+            host.name,
+        ))
         return response
 
     def get_success_url(self) -> str:
@@ -40,18 +155,18 @@ class GameCreate(FormView):
 
 @csrf_protect
 def game_view(request: HttpRequest, game_id: UUID) -> HttpResponse:
-    game_id_str = str(game_id)
-    player_id = request.COOKIES.get(game_id_str)
-    if player_id:
-        response = render(request, 'games/play.html')
-        response.set_cookie(
-            key=game_id_str,
-            value=player_id,
-            expires=get_expiry(),
-        )
-        return response
-    else:
+    token = get_request_token(request, game_id)
+    if token is None:
         return redirect(f'/games/{game_id}/join/')
+    game = async_to_sync(get_game_store().get)(game_id)
+    if game is None:
+        raise Http404('Game not found')
+    response = render(request, 'games/play.html', {
+        'game': game,
+        'images': get_image_urls(get_image_digests(game)),
+    })
+    renew_token_cookie(response, token)
+    return response
 
 
 class PlayerCreate(FormView):
@@ -61,12 +176,33 @@ class PlayerCreate(FormView):
     def form_valid(self, form: BaseForm) -> HttpResponse:
         assert isinstance(form, PlayerForm)
         player = form.create_player()
-        response = super().form_valid(form)
-        response.set_cookie(
-            key=str(self.kwargs['game_id']),
-            value=str(player.id),
-            expires=get_expiry(),
+
+        def join(game: Game) -> bool:
+            if game.players.has_name(player.name):
+                return False
+            game.players.append(player)
+            return True
+
+        try:
+            joined = async_to_sync(get_game_store().update)(
+                self.kwargs['game_id'],
+                join,
+            )
+        except GameNotFound as error:
+            raise Http404('Game not found') from error
+        if not joined:
+            form.reject_taken_name()
+            return self.form_invalid(form)
+        async_to_sync(get_event_hub().publish)(
+            self.kwargs['game_id'],
+            make_event('join', player_id=player.id, name=player.name),
         )
+        response = super().form_valid(form)
+        set_token_cookie(response, get_player_tokens().issue(
+            self.kwargs['game_id'],
+            player.id,
+            player.name,
+        ))
         return response
 
     def get_context_data(self, **kwargs: Dict['str', Any]) -> Dict[str, Any]:
@@ -76,3 +212,286 @@ class PlayerCreate(FormView):
 
     def get_success_url(self) -> str:
         return f'/games/{self.kwargs["game_id"]}/'
+
+
+@require_POST
+@csrf_protect
+def round_view(request: HttpRequest, game_id: UUID) -> HttpResponse:
+    game = async_to_sync(get_game_store().get)(game_id)
+    if game is None:
+        raise Http404('Game not found')
+    token = get_request_token(request, game_id)
+    if token is None or token.player_id != game.players[0].id:
+        return HttpResponseForbidden('Only the host can start rounds')
+
+    def start(game: Game) -> Optional[Tuple[int, float]]:
+        now = time()
+        if is_round_open(game, now):
+            return None
+        round_number = start_round(game, now)
+        assert game.round_deadline
+        return round_number, game.round_deadline
+
+    try:
+        started = async_to_sync(get_game_store().update)(game_id, start)
+    except InvalidTransition:
+        return JsonResponse({'error': 'The game is finished'}, status=409)
+    if started is None:
+        return JsonResponse({'error': 'A round is already open'}, status=409)
+    round_number, deadline = started
+    get_round_scheduler().schedule(
+        game_id,
+        round_number,
+        deadline + CLOSE_DELAY_SECONDS,
+    )
+    async_to_sync(get_event_hub().publish)(game_id, make_event(
+        'state',
+        state='round_open',
+        round_number=round_number,
+        deadline=deadline,
+    ))
+    return JsonResponse({'round_number': round_number, 'deadline': deadline})
+
+
+@require_POST
+@csrf_protect
+def finish_view(request: HttpRequest, game_id: UUID) -> HttpResponse:
+    """End the game for everyone; it is then evicted soon after."""
+    game = async_to_sync(get_game_store().get)(game_id)
+    if game is None:
+        raise Http404('Game not found')
+    token = get_request_token(request, game_id)
+    if token is None or token.player_id != game.players[0].id:
+        return HttpResponseForbidden('Only the host can finish the game')
+    try:
+        async_to_sync(get_game_store().update)(game_id, finish_game)
+    except InvalidTransition:
+        return JsonResponse({'error': 'The game is finished'}, status=409)
+    async_to_sync(get_event_hub().publish)(
+        game_id,
+        make_event('state', state=FINISHED),
+    )
+    return JsonResponse({'state': FINISHED})
+
+
+def read_round_and_player(
+        data: bytes,
+        player_id: UUID,
+) -> Tuple[GameRound, Optional[Player]]:
+    """Decode the round of an encoded game and one of its players."""
+    return decode_round(data), decode_player(data, player_id)
+
+
+async def guess_view(request: HttpRequest, game_id: UUID) -> HttpResponse:
+    """Take a player's guess of the field ``guess_id`` in the open round.
+
+    Guesses are kept apart from the game until the round closes, so a
+    room guessing at once doesn't contend on it.  A player may guess
+    again until then; the last guess counts.  Scoring ignores guesses of
+    fields the game doesn't have.  Only the round and the guessing player
+    are decoded of the game.
+    """
+    # Django's method decorators only take async views from 5.0.
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    token = get_request_token(request, game_id)
+    if token is None:
+        return HttpResponseForbidden('Join the game first')
+    try:
+        round_number = int(request.POST['round_number'])
+        guess_id = int(request.POST['guess_id'])
+        guess = request.POST['guess'].strip()
+    except (KeyError, ValueError):
+        return JsonResponse(
+            {'error': 'round_number, guess_id and guess are required'},
+            status=400,
+        )
+    if guess_id < 0 or len(guess) > MAX_GUESS_LENGTH:
+        return JsonResponse(
+            {'error': 'guess_id must not be negative, nor guess too long'},
+            status=400,
+        )
+    found = await get_game_store().read(
+        game_id,
+        partial(read_round_and_player, player_id=token.player_id),
+    )
+    if found is None:
+        raise Http404('Game not found')
+    game_round, player = found
+    if player is None:
+        return HttpResponseForbidden('Join the game first')
+    now = time()
+    if (
+            round_number != game_round.round_number
+            or not is_round_open(game_round, now)
+    ):
+        return JsonResponse(ROUND_CLOSED, status=409)
+    assert game_round.round_deadline
+    round_start = (
+        game_round.round_deadline - game_round.settings.total_time_to_guess
+    )
+    guess_time = int(now - round_start)
+    try:
+        await get_guess_buffer().submit(
+            game_id,
+            round_number,
+            Guess(token.player_id, guess_id, guess, guess_time),
+        )
+    except GuessesClosed:
+        # Written after the round's guesses were collected for scoring.
+        return JsonResponse(ROUND_CLOSED, status=409)
+    await get_event_hub().publish(
+        game_id,
+        make_event('guess', player_id=token.player_id),
+    )
+    response = JsonResponse({
+        'round_number': round_number,
+        'guess_time': guess_time,
+    })
+    # Players may stay on the play page for longer than a token lives.
+    renew_token_cookie(response, token)
+    return response
+
+
+async def leaderboard_view(
+        request: HttpRequest,
+        game_id: UUID,
+) -> HttpResponse:
+    """Return the ``count`` best players and the player's own standing.
+
+    Read from the leaderboard alone, without loading the game.  Players
+    are ranked once their first round is scored.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    token = get_request_token(request, game_id)
+    if token is None:
+        return HttpResponseForbidden('Join the game first')
+    try:
+        count = max(1, min(
+            int(request.GET.get('count', 10)),
+            MAX_LEADERBOARD_PLAYERS,
+        ))
+    except ValueError:
+        return JsonResponse({'error': 'count must be a number'}, status=400)
+    top, standing = await get_leaderboard().standings(
+        game_id,
+        token.player_id,
+        count,
+    )
+    return JsonResponse({
+        'top': [leader._asdict() for leader in top],
+        'player': standing._asdict() if standing else None,
+    })
+
+
+@require_safe
+def fields_view(request: HttpRequest, game_id: UUID) -> HttpResponse:
+    """List the fields of the game in the order the player sees them.
+
+    Values are left out, they are what players guess.  Games that
+    randomize fields give each player a new order every round.
+    """
+    token = get_request_token(request, game_id)
+    if token is None:
+        return HttpResponseForbidden('Join the game first')
+    game = async_to_sync(get_game_store().get)(game_id)
+    if game is None:
+        raise Http404('Game not found')
+    return JsonResponse({
+        'round_number': game.round_number,
+        'fields': [
+            position._asdict()
+            for position in ordered_fields(game, token.player_id)
+        ],
+    })
+
+
+@require_safe
+def image_manifest_view(request: HttpRequest, game_id: UUID) -> HttpResponse:
+    """List the images after ``after``, for players to prefetch.
+
+    Images are numbered from 1 in batch order, as on the play page.
+    """
+    if get_request_token(request, game_id) is None:
+        return HttpResponseForbidden('Join the game first')
+    try:
+        after = max(0, int(request.GET.get('after', 0)))
+        count = min(int(request.GET.get('count', 3)), MAX_MANIFEST_IMAGES)
+    except ValueError:
+        return JsonResponse(
+            {'error': 'after and count must be numbers'},
+            status=400,
+        )
+    game = async_to_sync(get_game_store().get)(game_id)
+    if game is None:
+        raise Http404('Game not found')
+    digests = get_image_digests(game)[after:after + max(0, count)]
+    return JsonResponse({'images': [
+        dict(urls, number=number)
+        for number, urls in enumerate(get_image_urls(digests), after + 1)
+    ]})
+
+
+def get_tone(name: Optional[str]) -> Tone:
+    """Return the tone named in an image URL, the original if none is."""
+    if name is None:
+        return ORIGINAL
+    try:
+        return parse_tone(name)
+    except ValueError:
+        raise Http404('Unknown tone') from None
+
+
+@require_safe
+def image_view(
+        request: HttpRequest,
+        digest: str,
+        rendition: str,
+        tone: Optional[str] = None,
+) -> HttpResponseBase:
+    """Serve a rendition, made on first request if it is missing.
+
+    Its URL changes whenever its content does.
+    """
+    if rendition not in RENDITIONS:
+        raise Http404('Unknown rendition')
+    path = get_derivative_cache().path(digest, rendition, get_tone(tone))
+    if path is None:
+        raise Http404('Image not found')
+    return immutable_file_response(request, path, path.stem, CONTENT_TYPE)
+
+
+@require_safe
+def tile_pyramid_view(request: HttpRequest, digest: str) -> HttpResponseBase:
+    """Describe the tile pyramid of an image, building it on first use."""
+    path = get_tile_cache().descriptor(digest)
+    if path is None:
+        raise Http404('Image not found')
+    return immutable_file_response(
+        request,
+        path,
+        f'{digest}-tiles',
+        'application/json',
+    )
+
+
+@require_safe
+def tile_view(
+        request: HttpRequest,
+        digest: str,
+        level: int,
+        column: int,
+        row: int,
+        tone: Optional[str] = None,
+) -> HttpResponseBase:
+    """Serve one tile of an image's pyramid."""
+    path = get_tile_cache().path(digest, level, column, row, get_tone(tone))
+    if path is None:
+        raise Http404('Tile not found')
+    return immutable_file_response(
+        request,
+        path,
+        f'{digest}-{level}-{column}-{row}' + (f'-{tone}' if tone else ''),
+        CONTENT_TYPE,
+    )
@@ -0,0 +1,495 @@
+"""A small Redis stand-in speaking RESP, so tests need no Redis server.
+
+Only the commands the game stores use are implemented.  Run it as a
+script to get a stand-alone process::
+
+    python local_redis.py --port 6390
+"""
+import argparse
+import ast
+import asyncio
+from fnmatch import fnmatchcase
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+Command = Callable[['_Connection', List[bytes]], Any]
+
+COMMANDS: Dict[bytes, Command] = {}
+
+
+class ReplyError(Exception):
+    pass
+
+
+class _NullArray:
+    pass
+
+
+NULL_ARRAY = _NullArray()
+
+
+class Pushes(list):  # type: ignore
+    """Several replies to one command, as pub/sub sends."""
+
+
+def command(name: str) -> Callable[[Command], Command]:
+    def register(function: Command) -> Command:
+        COMMANDS[name.encode()] = function
+        return function
+
+    return register
+
+
+class LocalRedisServer:
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.host = host
+        self.port = port
+        self.data: Dict[bytes, Any] = {}
+        self.expires: Dict[bytes, float] = {}
+        self.versions: Dict[bytes, int] = {}
+        self.channels: Dict[bytes, Set['_Connection']] = {}
+        # Connections accepted so far.
+        self.connections = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        return f'redis://{self.host}:{self.port}'
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(
+            self._serve,
+            self.host,
+            self.port,
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        assert self._server
+        self._server.close()
+        await self._server.wait_closed()
+
+    def lookup(self, key: bytes) -> Any:
+        expires = self.expires.get(key)
+        if expires is not None and expires <= monotonic():
+            self.delete(key)
+        return self.data.get(key)
+
+    def store(self, key: bytes, value: Any) -> None:
+        self.data[key] = value
+        self.touch(key)
+
+    def delete(self, key: bytes) -> bool:
+        self.expires.pop(key, None)
+        existed = self.data.pop(key, None) is not None
+        self.touch(key)
+        return existed
+
+    def touch(self, key: bytes) -> None:
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    async def _serve(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter,
+    ) -> None:
+        self.connections += 1
+        connection = _Connection(self, writer)
+        try:
+            while True:
+                arguments = await _read_command(reader)
+                if arguments is None:
+                    break
+                writer.write(_encode(connection.execute(arguments)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            connection.close()
+            writer.close()
+
+
+class _Connection:
+    def __init__(self, server: LocalRedisServer, writer: asyncio.StreamWriter):
+        self.server = server
+        self.writer = writer
+        self.channels: Set[bytes] = set()
+        self.watched: Dict[bytes, int] = {}
+        self.queued: Optional[List[List[bytes]]] = None
+
+    def execute(self, arguments: List[bytes]) -> Any:
+        name = arguments[0].upper()
+        if self.queued is not None and name not in (b'EXEC', b'DISCARD'):
+            self.queued.append(arguments)
+            return 'QUEUED'
+        return self.call(arguments)
+
+    def call(self, arguments: List[bytes]) -> Any:
+        function = COMMANDS.get(arguments[0].upper())
+        if function is None:
+            return ReplyError(f'unknown command {arguments[0]!r}')
+        try:
+            return function(self, arguments[1:])
+        except ReplyError as error:
+            return error
+
+    def close(self) -> None:
+        for channel in self.channels:
+            self.server.channels[channel].discard(self)
+
+
+async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    assert line.startswith(b'*'), line
+    arguments = []
+    for _ in range(int(line[1:])):
+        length = int((await reader.readline())[1:])
+        arguments.append((await reader.readexactly(length + 2))[:-2])
+    return arguments
+
+
+def _encode(reply: Any) -> bytes:
+    if reply is None:
+        return b'$-1\r\n'
+    if reply is NULL_ARRAY:
+        return b'*-1\r\n'
+    if isinstance(reply, bool):
+        return b':%d\r\n' % reply
+    if isinstance(reply, int):
+        return b':%d\r\n' % reply
+    if isinstance(reply, float):
+        reply = repr(reply).encode()
+    if isinstance(reply, bytes):
+        return b'$%d\r\n%s\r\n' % (len(reply), reply)
+    if isinstance(reply, str):
+        return f'+{reply}\r\n'.encode()
+    if isinstance(reply, ReplyError):
+        return f'-ERR {reply}\r\n'.encode()
+    if isinstance(reply, Pushes):
+        return b''.join(map(_encode, reply))
+    if isinstance(reply, (list, tuple)):
+        return b'*%d\r\n' % len(reply) + b''.join(map(_encode, reply))
+    raise TypeError(reply)
+
+
+def _set_ttl(connection: _Connection, key: bytes, seconds: float) -> None:
+    connection.server.expires[key] = monotonic() + seconds
+
+
+@command('PING')
+def _ping(_: _Connection, arguments: List[bytes]) -> Any:
+    return arguments[0] if arguments else 'PONG'
+
+
+@command('GET')
+def _get(connection: _Connection, arguments: List[bytes]) -> Any:
+    return connection.server.lookup(arguments[0])
+
+
+@command('SET')
+def _set(connection: _Connection, arguments: List[bytes]) -> Any:
+    key, value, *options = arguments
+    ttl: Optional[float] = None
+    exists = connection.server.lookup(key) is not None
+    option_iter = iter(options)
+    for option in option_iter:
+        option = option.upper()
+        if option == b'EX':
+            ttl = int(next(option_iter))
+        elif option == b'PX':
+            ttl = int(next(option_iter)) / 1000
+        elif option == b'NX' and exists:
+            return None
+        elif option == b'XX' and not exists:
+            return None
+    connection.server.store(key, value)
+    connection.server.expires.pop(key, None)
+    if ttl is not None:
+        _set_ttl(connection, key, ttl)
+    return 'OK'
+
+
+@command('DEL')
+def _delete(connection: _Connection, arguments: List[bytes]) -> Any:
+    return sum(
+        connection.server.lookup(key) is not None
+        and connection.server.delete(key)
+        for key in arguments
+    )
+
+
+@command('EXISTS')
+def _exists(connection: _Connection, arguments: List[bytes]) -> Any:
+    return sum(connection.server.lookup(key) is not None for key in arguments)
+
+
+@command('EXPIRE')
+def _expire(connection: _Connection, arguments: List[bytes]) -> Any:
+    key, seconds = arguments
+    if connection.server.lookup(key) is None:
+        return 0
+    _set_ttl(connection, key, int(seconds))
+    return 1
+
+
+@command('TTL')
+def _ttl(connection: _Connection, arguments: List[bytes]) -> Any:
+    if connection.server.lookup(arguments[0]) is None:
+        return -2
+    expires = connection.server.expires.get(arguments[0])
+    if expires is None:
+        return -1
+    return round(expires - monotonic())
+
+
+@command('PTTL')
+def _pttl(connection: _Connection, arguments: List[bytes]) -> Any:
+    if connection.server.lookup(arguments[0]) is None:
+        return -2
+    expires = connection.server.expires.get(arguments[0])
+    if expires is None:
+        return -1
+    return round((expires - monotonic()) * 1000)
+
+
+@command('SCAN')
+def _scan(connection: _Connection, arguments: List[bytes]) -> Any:
+    # Every key in one go, which a client must accept from Redis too.
+    _, *options = arguments
+    pattern = b'*'
+    option_iter = iter(options)
+    for option in option_iter:
+        value = next(option_iter)
+        if option.upper() == b'MATCH':
+            pattern = value
+    keys = [
+        key for key in list(connection.server.data)
+        if connection.server.lookup(key) is not None
+        and fnmatchcase(key.decode(), pattern.decode())
+    ]
+    return [b'0', keys]
+
+
+@command('DUMP')
+def _dump(connection: _Connection, arguments: List[bytes]) -> Any:
+    value = connection.server.lookup(arguments[0])
+    return None if value is None else repr(value).encode()
+
+
+@command('RESTORE')
+def _restore(connection: _Connection, arguments: List[bytes]) -> Any:
+    key, ttl, data, *options = arguments
+    exists = connection.server.lookup(key) is not None
+    if exists and b'REPLACE' not in [option.upper() for option in options]:
+        raise ReplyError('BUSYKEY Target key name already exists.')
+    connection.server.store(key, ast.literal_eval(data.decode()))
+    connection.server.expires.pop(key, None)
+    if int(ttl):
+        _set_ttl(connection, key, int(ttl) / 1000)
+    return 'OK'
+
+
+@command('HSET')
+def _hset(connection: _Connection, arguments: List[bytes]) -> Any:
+    key, *pairs = arguments
+    if not pairs or len(pairs) % 2:
+        raise ReplyError("wrong number of arguments for 'hset' command")
+    fields = connection.server.lookup(key) or {}
+    added = sum(field not in fields for field in pairs[::2])
+    fields.update(zip(pairs[::2], pairs[1::2]))
+    connection.server.store(key, fields)
+    return added
+
+
+@command('HGETALL')
+def _hgetall(connection: _Connection, arguments: List[bytes]) -> Any:
+    fields = connection.server.lookup(arguments[0]) or {}
+    return [item for field in fields.items() for item in field]
+
+
+@command('ZADD')
+def _zadd(connection: _Connection, arguments: List[bytes]) -> Any:
+    key, *pairs = arguments
+    if not pairs or len(pairs) % 2:
+        raise ReplyError("wrong number of arguments for 'zadd' command")
+    scores = connection.server.lookup(key) or {}
+    added = sum(member not in scores for member in pairs[1::2])
+    scores.update(zip(pairs[1::2], map(float, pairs[::2])))
+    connection.server.store(key, scores)
+    return added
+
+
+@command('ZSCORE')
+def _zscore(connection: _Connection, arguments: List[bytes]) -> Any:
+    key, member = arguments
+    score = (connection.server.lookup(key) or {}).get(member)
+    return None if score is None else _format_score(score)
+
+
+@command('ZCOUNT')
+def _zcount(connection: _Connection, arguments: List[bytes]) -> Any:
+    key, low, high = arguments
+    above = _score_bound(low, above=True)
+    below = _score_bound(high, above=False)
+    return sum(
+        above(score) and below(score)
+        for score in (connection.server.lookup(key) or {}).values()
+    )
+
+
+@command('ZREVRANGE')
+def _zrevrange(connection: _Connection, arguments: List[bytes]) -> Any:
+    key, start, stop, *options = arguments
+    ranked = sorted(
+        (connection.server.lookup(key) or {}).items(),
+        key=lambda item: (item[1], item[0]),
+        reverse=True,
+    )
+    stop_index = int(stop)
+    ranked = ranked[int(start):None if stop_index == -1 else stop_index + 1]
+    if [option.upper() for option in options] == [b'WITHSCORES']:
+        return [
+            item
+            for member, score in ranked
+            for item in (member, _format_score(score))
+        ]
+    return [member for member, _ in ranked]
+
+
+@command('ZRANGEBYSCORE')
+def _zrangebyscore(connection: _Connection, arguments: List[bytes]) -> Any:
+    key, low, high, *options = arguments
+    above = _score_bound(low, above=True)
+    below = _score_bound(high, above=False)
+    ranked = sorted(
+        (
+            (member, score)
+            for member, score in (connection.server.lookup(key) or {}).items()
+            if above(score) and below(score)
+        ),
+        key=lambda item: (item[1], item[0]),
+    )
+    if [option.upper() for option in options] == [b'WITHSCORES']:
+        return [
+            item
+            for member, score in ranked
+            for item in (member, _format_score(score))
+        ]
+    return [member for member, _ in ranked]
+
+
+def _format_score(score: float) -> bytes:
+    # Like Redis, whole scores are sent without a fraction.
+    return b'%d' % score if score.is_integer() else repr(score).encode()
+
+
+def _score_bound(bound: bytes, above: bool) -> Callable[[float], bool]:
+    exclusive = bound.startswith(b'(')
+    value = float(bound.lstrip(b'('))
+    if above:
+        return (lambda score: score > value) if exclusive else (
+            lambda score: score >= value
+        )
+    return (lambda score: score < value) if exclusive else (
+        lambda score: score <= value
+    )
+
+
+@command('WATCH')
+def _watch(connection: _Connection, arguments: List[bytes]) -> Any:
+    for key in arguments:
+        connection.server.lookup(key)
+        connection.watched[key] = connection.server.versions.get(key, 0)
+    return 'OK'
+
+
+@command('UNWATCH')
+def _unwatch(connection: _Connection, _: List[bytes]) -> Any:
+    connection.watched.clear()
+    return 'OK'
+
+
+@command('MULTI')
+def _multi(connection: _Connection, _: List[bytes]) -> Any:
+    connection.queued = []
+    return 'OK'
+
+
+@command('DISCARD')
+def _discard(connection: _Connection, _: List[bytes]) -> Any:
+    connection.queued = None
+    connection.watched.clear()
+    return 'OK'
+
+
+@command('EXEC')
+def _exec(connection: _Connection, _: List[bytes]) -> Any:
+    queued = connection.queued or []
+    connection.queued = None
+    server = connection.server
+    for key in connection.watched:
+        server.lookup(key)
+    changed = any(
+        server.versions.get(key, 0) != version
+        for key, version in connection.watched.items()
+    )
+    connection.watched.clear()
+    if changed:
+        return NULL_ARRAY
+    return [connection.call(arguments) for arguments in queued]
+
+
+@command('SUBSCRIBE')
+def _subscribe(connection: _Connection, arguments: List[bytes]) -> Any:
+    replies = Pushes()
+    for channel in arguments:
+        connection.channels.add(channel)
+        connection.server.channels.setdefault(channel, set()).add(connection)
+        replies.append([b'subscribe', channel, len(connection.channels)])
+    return replies
+
+
+@command('UNSUBSCRIBE')
+def _unsubscribe(connection: _Connection, arguments: List[bytes]) -> Any:
+    replies = Pushes()
+    for channel in arguments or list(connection.channels):
+        connection.channels.discard(channel)
+        connection.server.channels.get(channel, set()).discard(connection)
+        replies.append([b'unsubscribe', channel, len(connection.channels)])
+    return replies
+
+
+@command('PUBLISH')
+def _publish(connection: _Connection, arguments: List[bytes]) -> Any:
+    channel, message = arguments
+    subscribers = connection.server.channels.get(channel, set())
+    for subscriber in subscribers:
+        subscriber.writer.write(_encode([b'message', channel, message]))
+    return len(subscribers)
+
+
+def _parse_address() -> Tuple[str, int]:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=6379,
+        help='0 for any free port, printed with the URL on start',
+    )
+    arguments = parser.parse_args()
+    return arguments.host, arguments.port
+
+
+async def _main() -> None:
+    host, port = _parse_address()
+    server = LocalRedisServer(host, port)
+    await server.start()
+    print(server.url, flush=True)
+    await asyncio.Event().wait()
+
+
+if __name__ == '__main__':  # pragma: no cover
+    asyncio.run(_main())
@@ -0,0 +1,157 @@
+from typing import Tuple
+from unittest import TestCase
+from uuid import uuid4
+
+from games.codec import (
+    CodecError,
+    decode_game,
+    decode_player,
+    decode_round,
+    encode_game,
+)
+from games.models import Batch, Game, Image, Player, Record
+
+
+def make_game() -> Game:
+    game = Game.create(45, True, 'Admin')
+    game.players.append(Player(
+        'Guesser ✓',
+        score=120,
+        guess_id=3,
+        guess='Smith',
+        guess_time=12,
+    ))
+    names = ('surname', 'age', 'note')
+    record = Record(names, ['Smith', '42', ''], bytearray(b'\x01\x00\x00'))
+    game.batches.append(Batch(
+        {'surname': str, 'age': int},
+        [
+            Image(
+                True,
+                [record, Record(names, ['Jones', '7', 'x'])],
+                '/batches/1/page-1.jpg',
+                'ab' * 32,
+            ),
+            Image(False),
+        ],
+    ))
+    game.state = 'playing'
+    game.round_number = 2
+    game.round_deadline = 1614470400.25
+    return game
+
+
+def player_state(player: Player) -> Tuple[object, ...]:
+    return (
+        player.id,
+        player.name,
+        player.score,
+        player.guess_id,
+        player.guess,
+        player.guess_time,
+    )
+
+
+class TestCodec(TestCase):
+    def test_round_trip(self) -> None:
+        game = make_game()
+
+        decoded = decode_game(encode_game(game))
+
+        self.assertEqual(game.id, decoded.id)
+        self.assertEqual('playing', decoded.state)
+        self.assertEqual(2, decoded.round_number)
+        self.assertEqual(1614470400.25, decoded.round_deadline)
+        self.assertEqual(45, decoded.settings.total_time_to_guess)
+        self.assertTrue(decoded.settings.should_randomize_fields)
+        self.assertEqual(
+            [player_state(player) for player in game.players],
+            [player_state(player) for player in decoded.players],
+        )
+        self.assertIs(
+            decoded.players[1],
+            decoded.players.get(game.players[1].id),
+        )
+        self.assertTrue(decoded.players.has_name('guesser ✓'))
+        batch = decoded.batches[0]
+        self.assertEqual({'surname': str, 'age': int}, batch.schema)
+        self.assertEqual([True, False], [
+            image.indexable for image in batch.images
+        ])
+        self.assertEqual(['/batches/1/page-1.jpg', None], [
+            image.source for image in batch.images
+        ])
+        self.assertEqual(['ab' * 32, None], [
+            image.digest for image in batch.images
+        ])
+        self.assertEqual([], batch.images[1].records)
+        first_record, second_record = batch.images[0].records
+        self.assertIs(first_record.names, second_record.names)
+        self.assertEqual(['surname', 'age', 'note'], list(first_record.fields))
+        self.assertEqual(
+            [('Smith', True), ('42', False), ('', False)],
+            [
+                (field.value, field.is_checked)
+                for field in first_record.fields.values()
+            ],
+        )
+        self.assertEqual(['Jones', '7', 'x'], second_record.values)
+
+    def test_round_trip_empty_player(self) -> None:
+        game = Game.create(1, False, '')
+
+        decoded = decode_game(encode_game(game))
+
+        self.assertEqual(
+            player_state(game.players[0]),
+            player_state(decoded.players[0]),
+        )
+        self.assertEqual([], decoded.batches)
+        self.assertIsNone(decoded.round_deadline)
+
+    def test_decode_player(self) -> None:
+        game = make_game()
+        data = encode_game(game)
+
+        player = decode_player(data, game.players[1].id)
+
+        assert player
+        self.assertEqual(player_state(game.players[1]), player_state(player))
+        self.assertIsNone(decode_player(data, uuid4()))
+
+    def test_decode_round(self) -> None:
+        game = make_game()
+        game.round_number = 3
+        game.round_deadline = 130.5
+
+        game_round = decode_round(encode_game(game))
+
+        self.assertEqual(
+            (game.state, 3, 130.5),
+            (
+                game_round.state,
+                game_round.round_number,
+                game_round.round_deadline,
+            ),
+        )
+        self.assertEqual(
+            game.settings.total_time_to_guess,
+            game_round.settings.total_time_to_guess,
+        )
+
+    def test_rejects_other_versions(self) -> None:
+        data = bytearray(encode_game(make_game()))
+        data[2] += 1
+
+        with self.assertRaises(CodecError):
+            decode_game(bytes(data))
+
+    def test_rejects_garbage(self) -> None:
+        with self.assertRaises(CodecError):
+            decode_game(b'not a game')
+
+    def test_rejects_truncated_data(self) -> None:
+        data = encode_game(make_game())
+
+        with self.assertRaises(CodecError):
+            decode_game(data[:len(data) // 2])
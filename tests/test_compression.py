@@ -0,0 +1,65 @@
+from io import BytesIO
+from unittest import TestCase
+
+from django.conf import settings
+from django.http import FileResponse, HttpRequest, HttpResponse
+from django.http.response import HttpResponseBase
+from django.test import RequestFactory
+
+from games.compression import TextGZipMiddleware, gzip_static
+
+if not settings.configured:
+    settings.configure()
+
+TEXT = b'<p>Hello</p>' * 100
+
+
+def gzip_request() -> HttpRequest:
+    return RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+
+def compress(response: HttpResponseBase) -> HttpResponseBase:
+    middleware = TextGZipMiddleware(lambda request: response)
+    return middleware.process_response(gzip_request(), response)
+
+
+class TestTextGZipMiddleware(TestCase):
+    def test_compresses_text(self) -> None:
+        response = compress(HttpResponse(TEXT))
+
+        self.assertEqual('gzip', response['Content-Encoding'])
+
+    def test_leaves_images(self) -> None:
+        response = compress(HttpResponse(TEXT, content_type='image/jpeg'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(TEXT, response.content)  # type: ignore
+
+    def test_leaves_files(self) -> None:
+        response = compress(
+            FileResponse(BytesIO(TEXT), content_type='text/plain'),
+        )
+        self.addCleanup(response.close)
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(str(len(TEXT)), response['Content-Length'])
+
+
+class TestGzipStatic(TestCase):
+    def test_compresses_text_files(self) -> None:
+        def view(request: HttpRequest) -> HttpResponseBase:
+            return FileResponse(BytesIO(TEXT), content_type='text/css')
+
+        response = gzip_static(view)(gzip_request())
+        self.addCleanup(response.close)
+
+        self.assertEqual('gzip', response['Content-Encoding'])
+
+    def test_leaves_images(self) -> None:
+        def view(request: HttpRequest) -> HttpResponseBase:
+            return FileResponse(BytesIO(TEXT), content_type='image/jpeg')
+
+        response = gzip_static(view)(gzip_request())
+        self.addCleanup(response.close)
+
+        self.assertFalse(response.has_header('Content-Encoding'))
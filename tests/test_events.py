@@ -0,0 +1,169 @@
+import asyncio
+import json
+from threading import Thread
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional
+from unittest import IsolatedAsyncioTestCase
+from uuid import uuid4
+
+from games.events import (
+    Event,
+    InProcessEventHub,
+    RedisEventHub,
+    make_event,
+)
+from games.models import Game
+from games.sockets import CLOSE_NOT_FOUND, CLOSE_NOT_JOINED, GameSocket
+from games.tokens import PlayerTokens
+from local_redis import LocalRedisServer
+
+
+async def next_event(events: AsyncIterator[Event]) -> Event:
+    return await asyncio.wait_for(events.__anext__(), timeout=1)
+
+
+class TestInProcessEventHub(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.hub = InProcessEventHub()
+
+    async def test_fan_out(self) -> None:
+        game_id = uuid4()
+        other_game_id = uuid4()
+        async with self.hub.subscribe(game_id) as first, \
+                self.hub.subscribe(game_id) as second, \
+                self.hub.subscribe(other_game_id) as other:
+            await self.hub.publish(game_id, make_event('join', name='A'))
+
+            self.assertEqual('A', (await next_event(first))['name'])
+            self.assertEqual('A', (await next_event(second))['name'])
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(other.__anext__(), timeout=0.05)
+
+    async def test_publish_from_another_thread(self) -> None:
+        game_id = uuid4()
+        async with self.hub.subscribe(game_id) as events:
+            thread = Thread(target=lambda: asyncio.run(self.hub.publish(
+                game_id,
+                make_event('state', state='playing'),
+            )))
+            thread.start()
+            thread.join()
+
+            self.assertEqual('playing', (await next_event(events))['state'])
+
+
+class TestRedisEventHub(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.server = LocalRedisServer()
+        await self.server.start()
+        self.worker_hub = RedisEventHub.from_url(self.server.url)
+        self.other_worker_hub = RedisEventHub.from_url(self.server.url)
+
+    async def asyncTearDown(self) -> None:
+        await self.worker_hub.close()
+        await self.other_worker_hub.close()
+        await self.server.stop()
+
+    async def test_events_cross_workers(self) -> None:
+        game_id = uuid4()
+        async with self.worker_hub.subscribe(game_id) as events:
+            await self.other_worker_hub.publish(
+                game_id,
+                make_event('score', player_id=game_id, score=10),
+            )
+
+            self.assertEqual(
+                {'type': 'score', 'player_id': str(game_id), 'score': 10},
+                await next_event(events),
+            )
+
+    async def test_resubscribe(self) -> None:
+        game_id = uuid4()
+        async with self.worker_hub.subscribe(game_id):
+            pass
+        async with self.worker_hub.subscribe(game_id) as events:
+            await self.other_worker_hub.publish(game_id, make_event('guess'))
+
+            self.assertEqual('guess', (await next_event(events))['type'])
+
+
+class TestGameSocket(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.hub = InProcessEventHub()
+        self.tokens = PlayerTokens('secret')
+        self.socket = GameSocket(self.hub, self.tokens)
+        self.game = Game.create(30, False, 'Admin')
+        self.received: 'asyncio.Queue[Dict[str, Any]]' = asyncio.Queue()
+        self.sent: 'asyncio.Queue[Mapping[str, Any]]' = asyncio.Queue()
+
+    def connect(
+            self,
+            cookie: str,
+            path: Optional[str] = None,
+    ) -> 'asyncio.Future[None]':
+        scope = {
+            'type': 'websocket',
+            'path': path or f'/games/{self.game.id}/socket/',
+            'headers': [(b'cookie', cookie.encode())],
+        }
+        self.received.put_nowait({'type': 'websocket.connect'})
+        return asyncio.ensure_future(
+            self.socket(scope, self.received.get, self.sent.put),
+        )
+
+    async def next_sent(self) -> Mapping[str, Any]:
+        return await asyncio.wait_for(self.sent.get(), timeout=1)
+
+    async def test_pushes_events(self) -> None:
+        host = self.game.players[0]
+        token = self.tokens.issue(self.game.id, host.id, host.name)
+        connection = self.connect(
+            f'{self.game.id}={self.tokens.sign(token)}',
+        )
+        self.assertEqual({'type': 'websocket.accept'}, await self.next_sent())
+
+        await self.hub.publish(self.game.id, make_event('join', name='B'))
+
+        message = await self.next_sent()
+        self.assertEqual({'type': 'join', 'name': 'B'}, json.loads(
+            message['text'],
+        ))
+        self.received.put_nowait({'type': 'websocket.disconnect'})
+        await connection
+
+    async def test_rejects_players_not_in_game(self) -> None:
+        host = self.game.players[0]
+        forger = PlayerTokens('other secret')
+        forged = forger.sign(forger.issue(self.game.id, host.id, host.name))
+        for cookie in (
+                'other=cookie',
+                f'{self.game.id}={host.id}',
+                f'{self.game.id}={forged}',
+        ):
+            with self.subTest(cookie=cookie):
+                sent: List[Mapping[str, Any]] = []
+                await self.connect(cookie)
+                while not self.sent.empty():
+                    sent.append(self.sent.get_nowait())
+
+                self.assertEqual(
+                    [{'type': 'websocket.close', 'code': CLOSE_NOT_JOINED}],
+                    sent,
+                )
+
+    async def test_rejects_paths_of_no_game(self) -> None:
+        host = self.game.players[0]
+        token = self.tokens.issue(self.game.id, host.id, host.name)
+        cookie = f'{self.game.id}={self.tokens.sign(token)}'
+        for path in (
+                f'/games/{"-" * 36}/socket/',
+                f'/games/{str(self.game.id).replace("-", "0")}/socket/',
+                f'/games/{self.game.id}/',
+        ):
+            with self.subTest(path=path):
+                await self.connect(cookie, path)
+
+                self.assertEqual(
+                    {'type': 'websocket.close', 'code': CLOSE_NOT_FOUND},
+                    await self.next_sent(),
+                )
+                self.assertTrue(self.sent.empty())
@@ -0,0 +1,243 @@
+import asyncio
+from datetime import timedelta
+from typing import TYPE_CHECKING
+from unittest import IsolatedAsyncioTestCase
+from uuid import uuid4
+
+import aioredis
+
+from games.codec import decode_round, encode_game
+from games.models import FINISHED, Game, Player
+from games.stores import (
+    GameNotFound,
+    GameStore,
+    InMemoryGameStore,
+    RedisGameStore,
+)
+from local_redis import LocalRedisServer
+
+if TYPE_CHECKING:  # pragma: no cover
+    StoreTestCase = IsolatedAsyncioTestCase
+else:
+    # Not a test case itself, so its tests only run mixed into one.
+    StoreTestCase = object
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.time = 0.0
+
+    def __call__(self) -> float:
+        return self.time
+
+
+class GameStoreTests(StoreTestCase):
+    """Behaviour every store shares, mixed into a test case per backend."""
+
+    store: GameStore
+
+    async def test_get_missing_game(self) -> None:
+        game = Game.create(30, False, 'Admin')
+        self.assertIsNone(await self.store.get(game.id))
+
+    async def test_put_and_get(self) -> None:
+        game = Game.create(30, True, 'Admin')
+        await self.store.put(game)
+
+        stored_game = await self.store.get(game.id)
+
+        assert stored_game
+        self.assertEqual(game.id, stored_game.id)
+        self.assertEqual(30, stored_game.settings.total_time_to_guess)
+        self.assertEqual('Admin', stored_game.players[0].name)
+
+    async def test_read(self) -> None:
+        game = Game.create(30, True, 'Admin')
+        await self.store.put(game)
+
+        game_round = await self.store.read(game.id, decode_round)
+
+        assert game_round
+        self.assertEqual(game.state, game_round.state)
+        self.assertIsNone(await self.store.read(uuid4(), decode_round))
+
+    async def test_update(self) -> None:
+        game = Game.create(30, False, 'Admin')
+        await self.store.put(game)
+        player = Player('Joiner')
+
+        def join(stored_game: Game) -> int:
+            stored_game.players.append(player)
+            return len(stored_game.players)
+
+        player_count = await self.store.update(game.id, join)
+
+        stored_game = await self.store.get(game.id)
+        assert stored_game
+        self.assertEqual(2, player_count)
+        self.assertEqual(['Admin', 'Joiner'], [
+            stored_player.name for stored_player in stored_game.players
+        ])
+
+    async def test_update_player(self) -> None:
+        game = Game.create(30, False, 'Admin')
+        await self.store.put(game)
+
+        def add_points(player: Player) -> None:
+            player.score += 5
+
+        await self.store.update_player(game.id, game.players[0].id, add_points)
+
+        stored_game = await self.store.get(game.id)
+        assert stored_game
+        self.assertEqual(5, stored_game.players[0].score)
+
+    async def test_games_are_snapshots(self) -> None:
+        game = Game.create(30, False, 'Admin')
+        await self.store.put(game)
+        game.players[0].score = 1
+        stored_game = await self.store.get(game.id)
+        assert stored_game
+        stored_game.players[0].score = 2
+
+        def fail(stored_game: Game) -> None:
+            stored_game.players[0].score = 3
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            await self.store.update(game.id, fail)
+
+        stored_game = await self.store.get(game.id)
+        assert stored_game
+        self.assertEqual(0, stored_game.players[0].score)
+
+    async def test_update_missing_game(self) -> None:
+        game = Game.create(30, False, 'Admin')
+        with self.assertRaises(GameNotFound):
+            await self.store.update(game.id, lambda _: None)
+
+    async def test_delete(self) -> None:
+        game = Game.create(30, False, 'Admin')
+        await self.store.put(game)
+
+        await self.store.delete(game.id)
+
+        self.assertIsNone(await self.store.get(game.id))
+
+    async def test_concurrent_updates_are_not_lost(self) -> None:
+        game = Game.create(30, False, 'Admin')
+        await self.store.put(game)
+
+        def add_point(player: Player) -> None:
+            player.score += 1
+
+        await asyncio.gather(*(
+            self.store.update_player(game.id, game.players[0].id, add_point)
+            for _ in range(50)
+        ))
+
+        stored_game = await self.store.get(game.id)
+        assert stored_game
+        self.assertEqual(50, stored_game.players[0].score)
+
+
+class TestInMemoryGameStore(GameStoreTests, IsolatedAsyncioTestCase):
+    store: InMemoryGameStore
+
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.store = InMemoryGameStore(ttl=timedelta(hours=2), clock=self.clock)
+
+    async def test_games_expire(self) -> None:
+        old_game = Game.create(30, False, 'Admin')
+        await self.store.put(old_game)
+        self.clock.time += 60 * 60
+        new_game = Game.create(30, False, 'Admin')
+        await self.store.put(new_game)
+
+        self.clock.time += 60 * 60 + 1
+
+        self.assertIsNone(await self.store.get(old_game.id))
+        self.assertIsNotNone(await self.store.get(new_game.id))
+        self.assertEqual(1, len(self.store))
+
+    async def test_access_extends_lifetime(self) -> None:
+        game = Game.create(30, False, 'Admin')
+        await self.store.put(game)
+
+        for _ in range(3):
+            self.clock.time += 60 * 60
+            self.assertIsNotNone(await self.store.get(game.id))
+
+    async def test_finished_games_expire_sooner(self) -> None:
+        game = Game.create(30, False, 'Admin')
+        await self.store.put(game)
+        await self.store.update(game.id, lambda game: game.move_to(FINISHED))
+
+        self.clock.time += 10 * 60
+
+        self.assertIsNone(await self.store.get(game.id))
+
+    async def test_sweep_evicts_in_batches(self) -> None:
+        games = [Game.create(30, False, 'Admin') for _ in range(5)]
+        for game in games:
+            await self.store.put(game)
+        await self.store.update(
+            games[4].id,
+            lambda game: game.move_to(FINISHED),
+        )
+        live_game = Game.create(30, False, 'Admin')
+        self.clock.time += 60 * 60
+        await self.store.put(live_game)
+
+        self.clock.time += 60 * 60
+
+        swept = await self.store.sweep(3)
+        self.assertEqual(
+            [games[4].id, games[0].id, games[1].id],
+            [game.game_id for game in swept],
+        )
+        self.assertEqual([True, False, False], [
+            game.finished for game in swept
+        ])
+        self.assertEqual(len(encode_game(games[0])), swept[1].size)
+        self.assertEqual(
+            [games[2].id, games[3].id],
+            [game.game_id for game in await self.store.sweep(3)],
+        )
+        self.assertEqual([], await self.store.sweep(3))
+        self.assertIsNotNone(await self.store.get(live_game.id))
+
+
+class TestRedisGameStore(GameStoreTests, IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.server = LocalRedisServer()
+        await self.server.start()
+        self.store = RedisGameStore.from_url(self.server.url)
+
+    async def asyncTearDown(self) -> None:
+        await self.store.close()
+        await self.server.stop()
+
+    async def test_games_expire(self) -> None:
+        game = Game.create(30, False, 'Admin')
+        await self.store.put(game)
+
+        client = aioredis.from_url(self.server.url)
+        ttl = await client.ttl(f'game:{game.id}')
+        await client.close()
+
+        self.assertEqual(2 * 60 * 60, ttl)
+
+    async def test_finished_games_expire_sooner(self) -> None:
+        game = Game.create(30, False, 'Admin')
+        await self.store.put(game)
+        await self.store.update(game.id, lambda game: game.move_to(FINISHED))
+        await self.store.get(game.id)
+
+        client = aioredis.from_url(self.server.url)
+        ttl = await client.ttl(f'game:{game.id}')
+        await client.close()
+
+        self.assertEqual(10 * 60, ttl)
+        self.assertEqual([], await self.store.sweep(10))
@@ -0,0 +1,233 @@
+import asyncio
+from typing import TYPE_CHECKING, List, Sequence
+from unittest import IsolatedAsyncioTestCase, TestCase
+from uuid import UUID, uuid4
+
+from games.guesses import (
+    Guess,
+    GuessBuffer,
+    GuessesClosed,
+    GuessStore,
+    InMemoryGuessStore,
+    RedisGuessStore,
+    apply_guesses,
+)
+from games.models import Game
+from local_redis import LocalRedisServer
+
+SUBMITTERS = 200
+
+if TYPE_CHECKING:  # pragma: no cover
+    StoreTestCase = IsolatedAsyncioTestCase
+else:
+    # Not a test case itself, so its tests only run mixed into one.
+    StoreTestCase = object
+
+
+class TestGuesses(TestCase):
+    def test_apply_guesses(self) -> None:
+        game = Game.create(30, False, 'Admin')
+        admin = game.players[0]
+
+        apply_guesses(game, {
+            admin.id: Guess(admin.id, 2, 'Smith', 5),
+            uuid4(): Guess(uuid4(), 1, 'Left the game', 1),
+        })
+
+        self.assertEqual((2, 'Smith', 5), (
+            admin.guess_id,
+            admin.guess,
+            admin.guess_time,
+        ))
+
+
+class GuessStoreTests(StoreTestCase):
+    """Behaviour every store shares, mixed into a test case per backend."""
+
+    store: GuessStore
+
+    async def test_add_and_get(self) -> None:
+        game_id = uuid4()
+        first = Guess(uuid4(), 3, 'Smith: John', 4)
+        second = Guess(uuid4(), 0, '', 0)
+
+        await self.store.add_many(game_id, 1, [first, second])
+
+        self.assertEqual(
+            {first.player_id: first, second.player_id: second},
+            await self.store.get_all(game_id, 1),
+        )
+        self.assertEqual({}, await self.store.get_all(game_id, 2))
+
+    async def test_later_guess_replaces_earlier(self) -> None:
+        game_id = uuid4()
+        player_id = uuid4()
+
+        for guess, guess_time in (('Smyth', 4), ('Smith', 9)):
+            await self.store.add_many(game_id, 1, [
+                Guess(player_id, 3, guess, guess_time),
+            ])
+
+        self.assertEqual(
+            {player_id: Guess(player_id, 3, 'Smith', 9)},
+            await self.store.get_all(game_id, 1),
+        )
+
+    async def test_delete(self) -> None:
+        game_id = uuid4()
+        await self.store.add_many(game_id, 1, [Guess(uuid4(), 3, 'Smith', 4)])
+
+        await self.store.delete(game_id, 1)
+
+        self.assertEqual({}, await self.store.get_all(game_id, 1))
+
+    async def test_collect_refuses_later_guesses(self) -> None:
+        game_id = uuid4()
+        guess = Guess(uuid4(), 3, 'Smith', 4)
+        await self.store.add_many(game_id, 1, [guess])
+
+        collected = await self.store.collect(game_id, 1)
+
+        with self.assertRaises(GuessesClosed):
+            await self.store.add_many(game_id, 1, [
+                Guess(uuid4(), 3, 'Too late', 31),
+            ])
+        self.assertEqual({guess.player_id: guess}, collected)
+        self.assertEqual(collected, await self.store.collect(game_id, 1))
+        await self.store.add_many(game_id, 2, [guess])
+
+    async def test_late_submitters_are_refused(self) -> None:
+        buffer = GuessBuffer(self.store)
+        game_id = uuid4()
+        await self.store.collect(game_id, 1)
+
+        with self.assertRaises(GuessesClosed):
+            await buffer.submit(game_id, 1, Guess(uuid4(), 0, 'Smith', 30))
+
+    async def test_simultaneous_submitters(self) -> None:
+        store = CountingGuessStore(self.store)
+        buffer = GuessBuffer(store)
+        game_id = uuid4()
+        guesses = [
+            Guess(uuid4(), number, f'Guess {number}', 29)
+            for number in range(SUBMITTERS)
+        ]
+
+        await asyncio.gather(*(
+            buffer.submit(game_id, 1, guess) for guess in guesses
+        ))
+
+        stored = await self.store.get_all(game_id, 1)
+        self.assertEqual({guess.player_id: guess for guess in guesses}, stored)
+        self.assertEqual([SUBMITTERS], store.batch_sizes)
+
+
+class TestInMemoryGuessStore(GuessStoreTests, IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.store = InMemoryGuessStore(clock=lambda: self.now)
+
+    async def test_games_expire(self) -> None:
+        game_id = uuid4()
+        guess = Guess(uuid4(), 3, 'Smith', 4)
+        await self.store.add_many(game_id, 2, [guess])
+        await self.store.collect(game_id, 1)
+
+        self.now += 60 * 60
+        await self.store.add_many(game_id, 2, [guess])
+        self.now += 90 * 60
+
+        self.assertEqual({guess.player_id: guess}, await self.store.get_all(
+            game_id,
+            2,
+        ))
+        with self.assertRaises(GuessesClosed):
+            await self.store.add_many(game_id, 1, [guess])
+
+        self.now += 60 * 60
+
+        self.assertEqual({}, await self.store.get_all(game_id, 2))
+        await self.store.add_many(game_id, 1, [guess])
+
+
+class TestRedisGuessStore(GuessStoreTests, IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.server = LocalRedisServer()
+        await self.server.start()
+        self.store = RedisGuessStore.from_url(self.server.url)
+
+    async def asyncTearDown(self) -> None:
+        await self.store.close()
+        await self.server.stop()
+
+
+class CountingGuessStore(InMemoryGuessStore):
+    """Passes writes on to another store, noting how many come at once."""
+
+    def __init__(self, store: GuessStore):
+        super().__init__()
+        self.store = store
+        self.batch_sizes: List[int] = []
+
+    async def add_many(
+            self,
+            game_id: UUID,
+            round_number: int,
+            guesses: Sequence[Guess],
+    ) -> None:
+        self.batch_sizes.append(len(guesses))
+        await self.store.add_many(game_id, round_number, guesses)
+
+
+class TestGuessBuffer(IsolatedAsyncioTestCase):
+    async def test_splits_full_batches(self) -> None:
+        store = CountingGuessStore(InMemoryGuessStore())
+        buffer = GuessBuffer(store, delay=10, max_batch=50)
+        game_id = uuid4()
+
+        await asyncio.wait_for(asyncio.gather(*(
+            buffer.submit(game_id, 1, Guess(uuid4(), 0, 'Smith', 1))
+            for _ in range(SUBMITTERS)
+        )), timeout=1)
+
+        self.assertEqual([50] * 4, store.batch_sizes)
+
+    async def test_player_guessing_twice_is_written_once(self) -> None:
+        store = CountingGuessStore(InMemoryGuessStore())
+        buffer = GuessBuffer(store)
+        game_id = uuid4()
+        player_id = uuid4()
+
+        await asyncio.gather(
+            buffer.submit(game_id, 1, Guess(player_id, 0, 'Smyth', 1)),
+            buffer.submit(game_id, 1, Guess(player_id, 0, 'Smith', 2)),
+        )
+
+        self.assertEqual([1], store.batch_sizes)
+        self.assertEqual(
+            'Smith',
+            (await store.store.get_all(game_id, 1))[player_id].guess,
+        )
+
+    async def test_failed_write_reaches_every_submitter(self) -> None:
+        buffer = GuessBuffer(BrokenGuessStore())
+        game_id = uuid4()
+
+        results = await asyncio.gather(*(
+            buffer.submit(game_id, 1, Guess(uuid4(), 0, 'Smith', 1))
+            for _ in range(3)
+        ), return_exceptions=True)
+
+        self.assertEqual(3, sum(
+            isinstance(result, ConnectionError) for result in results
+        ))
+
+
+class BrokenGuessStore(InMemoryGuessStore):
+    async def add_many(
+            self,
+            game_id: UUID,
+            round_number: int,
+            guesses: Sequence[Guess],
+    ) -> None:
+        raise ConnectionError('Store is down')
@@ -0,0 +1,143 @@
+import shutil
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from PIL import Image as PillowImage
+
+from games.images import (
+    LARGE,
+    MEDIUM,
+    RENDITIONS,
+    THUMBNAIL,
+    DerivativeCache,
+)
+from games.tones import Tone
+
+
+class TestDerivativeCache(TestCase):
+    def setUp(self) -> None:
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.source = self.directory / 'page.jpg'
+        PillowImage.new('RGB', (3000, 2000), 'white').save(self.source)
+        self.root = self.directory / 'cache'
+
+    def test_makes_every_rendition(self) -> None:
+        cache = DerivativeCache(self.root, 10 * 1024 ** 2)
+
+        digest = cache.add(self.source)
+
+        for name, rendition in RENDITIONS.items():
+            path = cache.path(digest, name)
+            assert path
+            with PillowImage.open(path) as image:
+                self.assertEqual(rendition.max_size, max(image.size))
+                self.assertTrue(image.info.get('progressive'))
+        with self.assertRaises(KeyError):
+            cache.path(digest, 'huge')
+
+    def test_addressed_by_content(self) -> None:
+        cache = DerivativeCache(self.root, 10 * 1024 ** 2)
+        copy = self.directory / 'copy.jpg'
+        shutil.copy(self.source, copy)
+
+        self.assertEqual(cache.add(self.source), cache.add(copy))
+        renditions = list(self.root.glob('*.jpg'))
+        self.assertEqual(len(RENDITIONS), len(renditions))
+        self.assertIsNone(cache.path('0' * 64, THUMBNAIL.name))
+
+    def test_evicts_least_recently_used(self) -> None:
+        probe = DerivativeCache(self.directory / 'probe', 10 * 1024 ** 2)
+        digest = probe.add(self.source)
+        sizes = {}
+        for name in RENDITIONS:
+            path = probe.path(digest, name)
+            assert path
+            sizes[name] = path.stat().st_size
+        cache = DerivativeCache(
+            self.root,
+            sizes[LARGE.name] + sizes[MEDIUM.name],
+        )
+        cache.digest(self.source)
+
+        cache.path(digest, THUMBNAIL.name)
+        large = cache.path(digest, LARGE.name)
+        cache.path(digest, THUMBNAIL.name)
+        cache.path(digest, MEDIUM.name)
+
+        assert large
+        self.assertFalse(large.exists())
+        self.assertEqual(sizes[THUMBNAIL.name] + sizes[MEDIUM.name], cache.size)
+        self.assertEqual(large, cache.path(digest, LARGE.name))
+        self.assertTrue(large.exists())
+
+    def test_makes_toned_renditions_from_the_original_tone(self) -> None:
+        cache = DerivativeCache(self.root, 10 * 1024 ** 2)
+        digest = cache.digest(self.source)
+        inverted = Tone(invert=True)
+
+        path = cache.path(digest, MEDIUM.name, inverted)
+
+        assert path
+        self.assertEqual(f'{digest}-medium-{inverted.name}.jpg', path.name)
+        self.assertTrue(cache.path(digest, MEDIUM.name))
+        with PillowImage.open(path) as image:
+            self.assertEqual(1280, max(image.size))
+            red, green, blue = image.getpixel((640, 400))
+            self.assertLess(max(red, green, blue), 8)
+        self.assertEqual(path, cache.path(digest, MEDIUM.name, inverted))
+        self.assertIsNone(cache.path('0' * 64, MEDIUM.name, inverted))
+
+    def test_equalizes_with_one_histogram(self) -> None:
+        cache = DerivativeCache(self.root, 10 * 1024 ** 2)
+        digest = cache.digest(self.source)
+
+        thumbnail = cache.path(digest, THUMBNAIL.name, Tone(equalize=True))
+
+        assert thumbnail
+        histogram = cache.histogram(digest)
+        assert histogram
+        self.assertEqual(768, len(histogram))
+        self.assertIs(histogram, cache.histogram(digest))
+        self.assertIsNone(cache.histogram('0' * 64))
+
+    def test_forgets_unused_originals(self) -> None:
+        now = 0.0
+        cache = DerivativeCache(self.root, 10 * 1024 ** 2, lambda: now)
+        other = self.directory / 'other.jpg'
+        PillowImage.new('RGB', (300, 200), 'black').save(other)
+        old = cache.digest(self.source)
+        now = 60
+        cache.digest(other)
+        now = 100
+
+        self.assertEqual(1, cache.forget_unused(50, 10))
+        self.assertEqual(0, cache.forget_unused(50, 10))
+
+        # Read back from its link, as it is still needed.
+        self.assertEqual(self.source.resolve(), cache.source(old))
+        self.assertTrue(cache.path(old, THUMBNAIL.name))
+        self.assertEqual(0, cache.forget_unused(50, 10))
+
+    def test_makes_renditions_of_originals_other_processes_saw(self) -> None:
+        digest = DerivativeCache(self.root, 10 * 1024 ** 2).digest(
+            self.source,
+        )
+        cache = DerivativeCache(self.root, 10 * 1024 ** 2)
+
+        self.assertEqual(self.source.resolve(), cache.source(digest))
+        path = cache.path(digest, THUMBNAIL.name)
+        assert path
+        self.assertTrue(path.exists())
+
+    def test_ignores_links_to_changed_originals(self) -> None:
+        digest = DerivativeCache(self.root, 10 * 1024 ** 2).digest(
+            self.source,
+        )
+        PillowImage.new('RGB', (30, 20), 'black').save(self.source)
+        cache = DerivativeCache(self.root, 10 * 1024 ** 2)
+
+        self.assertIsNone(cache.source(digest))
+        self.assertIsNone(cache.path(digest, THUMBNAIL.name))
@@ -0,0 +1,98 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from games.importing import BatchImportError, import_batch, parse_schema
+
+SCHEMA = {'surname': str, 'age': int}
+
+
+class TestParseSchema(TestCase):
+    def test_parse(self) -> None:
+        self.assertEqual(
+            {'surname': str, 'age': int, 'married': bool},
+            parse_schema('surname, age:int,married:bool'),
+        )
+
+    def test_rejects_bad_schemas(self) -> None:
+        for spec in ('age:date', 'image', 'age,age', ''):
+            with self.subTest(spec=spec), self.assertRaises(BatchImportError):
+                parse_schema(spec)
+
+
+class TestImportBatch(TestCase):
+    def setUp(self) -> None:
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.images = self.directory / 'images'
+        self.images.mkdir()
+        for name in ('page-2.jpg', 'page-1.jpg', 'blank.jpg', 'notes.txt'):
+            (self.images / name).touch()
+
+    def write(self, name: str, content: str) -> Path:
+        path = self.directory / name
+        path.write_text(content, encoding='utf-8')
+        return path
+
+    def test_csv(self) -> None:
+        records = self.write('records.csv', (
+            'image,surname,age\n'
+            'page-1.jpg,Smith,42\n'
+            'page-2.jpg,"Jones, Jr.",\n'
+            'page-1.jpg,Núñez,7\n'
+        ))
+
+        batch, count = import_batch(records, self.images, SCHEMA)
+
+        self.assertEqual(3, count)
+        self.assertEqual(SCHEMA, batch.schema)
+        self.assertEqual(
+            [
+                ('blank.jpg', False, []),
+                ('page-1.jpg', True, [['Smith', '42'], ['Núñez', '7']]),
+                ('page-2.jpg', True, [['Jones, Jr.', '']]),
+            ],
+            [
+                (
+                    Path(image.source or '').name,
+                    image.indexable,
+                    [record.values for record in image.records],
+                )
+                for image in batch.images
+            ],
+        )
+
+    def test_json_lines(self) -> None:
+        records = self.write('records.jsonl', (
+            '{"image": "page-1.jpg", "surname": "Smith", "age": 42}\n'
+            '\n'
+            '{"image": "page-2.jpg", "surname": "Jones", "age": null}\n'
+        ))
+
+        batch, count = import_batch(records, self.images, SCHEMA)
+
+        self.assertEqual(2, count)
+        self.assertEqual(['Smith', '42'], batch.images[1].records[0].values)
+        self.assertEqual(['Jones', ''], batch.images[2].records[0].values)
+
+    def test_reports_bad_rows(self) -> None:
+        cases = {
+            'wrong type': 'page-1.jpg,Smith,forty',
+            'missing image': 'page-3.jpg,Smith,40',
+            'extra value': 'page-1.jpg,Smith,40,x',
+        }
+        for case, row in cases.items():
+            records = self.write(
+                'records.csv',
+                f'image,surname,age\npage-1.jpg,Jones,1\n{row}\n',
+            )
+            with self.subTest(case), \
+                    self.assertRaisesRegex(BatchImportError, '^Line 3: '):
+                import_batch(records, self.images, SCHEMA)
+
+    def test_reports_missing_columns(self) -> None:
+        records = self.write('records.jsonl', '{"image": "page-1.jpg"}\n')
+
+        with self.assertRaisesRegex(BatchImportError, r'\[age, surname\]'):
+            import_batch(records, self.images, SCHEMA)
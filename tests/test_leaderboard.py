@@ -0,0 +1,264 @@
+import random
+from typing import TYPE_CHECKING, Dict, List
+from unittest import IsolatedAsyncioTestCase, TestCase
+from uuid import UUID, uuid4
+
+from games.leaderboard import (
+    InMemoryLeaderboard,
+    Leaderboard,
+    RedisLeaderboard,
+    Standing,
+    rank_players,
+    rank_shifts,
+    shifted_ranges,
+)
+from local_redis import LocalRedisServer
+
+if TYPE_CHECKING:  # pragma: no cover
+    LeaderboardTestCase = IsolatedAsyncioTestCase
+else:
+    # Not a test case itself, so its tests only run mixed into one.
+    LeaderboardTestCase = object
+
+
+class TestRanking(TestCase):
+    def test_equal_scores_share_a_rank(self) -> None:
+        first, second, third = uuid4(), uuid4(), uuid4()
+
+        self.assertEqual([
+            Standing(first, 1, 30),
+            Standing(second, 1, 30),
+            Standing(third, 3, 10),
+        ], list(rank_players([(first, 30), (second, 30), (third, 10)])))
+
+    def test_shifted_ranges(self) -> None:
+        player_id = uuid4()
+
+        self.assertEqual([(10, 40)], shifted_ranges([
+            (player_id, 10, 30),
+            (player_id, 40, 20),
+        ]))
+        self.assertEqual([(None, 5), (10, 20)], shifted_ranges([
+            (player_id, 20, 10),
+            (player_id, None, 5),
+        ]))
+
+    def test_rank_shifts(self) -> None:
+        player_id = uuid4()
+        rank_shift = rank_shifts([(player_id, 10, 30), (player_id, None, 20)])
+
+        self.assertEqual(2, rank_shift(10))
+        self.assertEqual(1, rank_shift(20))
+        self.assertEqual(0, rank_shift(30))
+        self.assertEqual(-1, rank_shifts([(player_id, 30, 5)])(10))
+
+
+class LeaderboardTests(LeaderboardTestCase):
+    """Behaviour every leaderboard shares, mixed into a case per backend."""
+
+    leaderboard: Leaderboard
+
+    async def test_first_update_ranks_everyone(self) -> None:
+        game_id = uuid4()
+        leader, runner_up = uuid4(), uuid4()
+
+        changes = await self.leaderboard.update(
+            game_id,
+            {runner_up: 50, leader: 150},
+        )
+
+        self.assertEqual([
+            Standing(leader, 1, 150),
+            Standing(runner_up, 2, 50),
+        ], changes)
+
+    async def test_update_reports_only_changes(self) -> None:
+        game_id = uuid4()
+        players = [uuid4() for _ in range(5)]
+        await self.leaderboard.update(game_id, {
+            player_id: 100 - 10 * number
+            for number, player_id in enumerate(players)
+        })
+
+        changes = await self.leaderboard.update(game_id, {
+            players[0]: 100,
+            players[3]: 95,
+        })
+
+        self.assertEqual([
+            Standing(players[3], 2, 95),
+            Standing(players[1], 3, 90),
+            Standing(players[2], 4, 80),
+        ], changes)
+        self.assertEqual([], await self.leaderboard.update(game_id, {
+            players[0]: 100,
+        }))
+
+    async def test_changes_match_comparing_whole_boards(self) -> None:
+        game_id = uuid4()
+        rng = random.Random(0)
+        players = [uuid4() for _ in range(40)]
+        scores: Dict[UUID, int] = {}
+
+        for _ in range(30):
+            before = set(ranked(scores))
+            update = {
+                player_id: scores.get(player_id, 0) + rng.randrange(-5, 20)
+                for player_id in rng.sample(players, rng.randrange(1, 6))
+            }
+            scores.update(update)
+
+            changes = await self.leaderboard.update(game_id, update)
+
+            self.assertEqual(
+                [
+                    standing for standing in ranked(scores)
+                    if standing not in before
+                ],
+                changes,
+            )
+
+    async def test_rank(self) -> None:
+        game_id = uuid4()
+        first, second, third = uuid4(), uuid4(), uuid4()
+        await self.leaderboard.update(
+            game_id,
+            {first: 20, second: 20, third: 5},
+        )
+
+        self.assertEqual(
+            Standing(second, 1, 20),
+            await self.leaderboard.rank(game_id, second),
+        )
+        self.assertEqual(
+            Standing(third, 3, 5),
+            await self.leaderboard.rank(game_id, third),
+        )
+        self.assertIsNone(await self.leaderboard.rank(game_id, uuid4()))
+        self.assertIsNone(await self.leaderboard.rank(uuid4(), first))
+
+    async def test_standings_match_top_and_rank(self) -> None:
+        game_id = uuid4()
+        scores = {uuid4(): score for score in (50, 40, 40, 30, 20, 10)}
+        await self.leaderboard.update(game_id, scores)
+        top = await self.leaderboard.top(game_id, 3)
+
+        for player_id in (*scores, uuid4()):
+            for count in (0, 2, 3):
+                with self.subTest(score=scores.get(player_id), count=count):
+                    self.assertEqual(
+                        (
+                            top[:count],
+                            await self.leaderboard.rank(game_id, player_id),
+                        ),
+                        await self.leaderboard.standings(
+                            game_id,
+                            player_id,
+                            count,
+                        ),
+                    )
+
+    async def test_top(self) -> None:
+        game_id = uuid4()
+        scores = {uuid4(): score for score in (10, 40, 30, 20)}
+        await self.leaderboard.update(game_id, scores)
+        by_score = {score: player_id for player_id, score in scores.items()}
+
+        self.assertEqual([
+            Standing(by_score[40], 1, 40),
+            Standing(by_score[30], 2, 30),
+        ], await self.leaderboard.top(game_id, 2))
+        self.assertEqual([], await self.leaderboard.top(uuid4(), 2))
+
+    async def test_no_top_below_one(self) -> None:
+        game_id = uuid4()
+        scores = {uuid4(): score for score in (10, 40, 30, 20)}
+        await self.leaderboard.update(game_id, scores)
+        player_id = next(iter(scores))
+
+        for count in (0, -1):
+            with self.subTest(count=count):
+                self.assertEqual(
+                    [],
+                    await self.leaderboard.top(game_id, count),
+                )
+                top, standing = await self.leaderboard.standings(
+                    game_id,
+                    player_id,
+                    count,
+                )
+                self.assertEqual([], top)
+                self.assertEqual(Standing(player_id, 4, 10), standing)
+
+    async def test_many_small_updates_match_a_full_sort(self) -> None:
+        game_id = uuid4()
+        players = [uuid4() for _ in range(200)]
+        scores = {player_id: 0 for player_id in players}
+        await self.leaderboard.update(game_id, scores)
+
+        for step in range(50):
+            player_id = players[step * 7 % len(players)]
+            scores[player_id] += step * 13 % 40
+            await self.leaderboard.update(
+                game_id,
+                {player_id: scores[player_id]},
+            )
+
+        expected = list(rank_players(sorted(
+            scores.items(),
+            key=lambda item: -item[1],
+        )))
+        standings = await self.leaderboard.top(game_id, len(players))
+        self.assertEqual(
+            sorted((rank, score) for _, rank, score in expected),
+            sorted((rank, score) for _, rank, score in standings),
+        )
+        for player_id in players[:20]:
+            standing = await self.leaderboard.rank(game_id, player_id)
+            assert standing
+            own = scores[player_id]
+            higher = sum(score > own for score in scores.values())
+            self.assertEqual(higher + 1, standing.rank)
+
+
+def ranked(scores: Dict[UUID, int]) -> List[Standing]:
+    return list(rank_players(sorted(
+        scores.items(),
+        key=lambda item: (-item[1], item[0]),
+    )))
+
+
+class TestInMemoryLeaderboard(LeaderboardTests, IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.leaderboard = InMemoryLeaderboard(clock=lambda: self.now)
+
+    async def test_boards_expire(self) -> None:
+        game_id = uuid4()
+        player_id = uuid4()
+        await self.leaderboard.update(game_id, {player_id: 10})
+
+        self.now += 3 * 60 * 60
+
+        self.assertIsNone(await self.leaderboard.rank(game_id, player_id))
+
+
+class TestRedisLeaderboard(LeaderboardTests, IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.server = LocalRedisServer()
+        await self.server.start()
+        self.leaderboard = RedisLeaderboard.from_url(self.server.url)
+
+    async def asyncTearDown(self) -> None:
+        await self.leaderboard.close()
+        await self.server.stop()
+
+    async def test_board_expires_with_the_game(self) -> None:
+        game_id = uuid4()
+        await self.leaderboard.update(game_id, {uuid4(): 10})
+
+        self.assertIn(
+            f'game:{game_id}:leaderboard'.encode(),
+            self.server.expires,
+        )
+
@@ -0,0 +1,107 @@
+from unittest import IsolatedAsyncioTestCase, TestCase
+from uuid import uuid4
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.test import RequestFactory, override_settings
+
+from games.instrumentation import InstrumentationMiddleware
+from games.metrics import (
+    REQUEST_SECONDS,
+    STORE_SECONDS,
+    Counter,
+    Histogram,
+    Registry,
+)
+from games.models import Game
+from games.stores import InMemoryGameStore, TimedGameStore
+
+if not settings.configured:
+    settings.configure()
+
+
+class TestMetrics(TestCase):
+    def test_render(self) -> None:
+        registry = Registry()
+        requests = Histogram(
+            'requests_seconds',
+            'Request time.',
+            ('view',),
+            buckets=(0.1, 1),
+        )
+        sent = Counter('sent_bytes_total', 'Bytes sent.', ('view',))
+        registry.register(requests)
+        registry.register(sent)
+
+        requests.observe(0.1, 'game_view')
+        requests.observe(0.5, 'game_view')
+        requests.observe(3, 'game_view')
+        sent.inc('say "hi"\n', amount=512)
+
+        self.assertEqual(
+            '# HELP requests_seconds Request time.\n'
+            '# TYPE requests_seconds histogram\n'
+            'requests_seconds_bucket{view="game_view",le="0.1"} 1\n'
+            'requests_seconds_bucket{view="game_view",le="1"} 2\n'
+            'requests_seconds_bucket{view="game_view",le="+Inf"} 3\n'
+            'requests_seconds_sum{view="game_view"} 3.6\n'
+            'requests_seconds_count{view="game_view"} 3\n'
+            '# HELP sent_bytes_total Bytes sent.\n'
+            '# TYPE sent_bytes_total counter\n'
+            'sent_bytes_total{view="say \\"hi\\"\\n"} 512\n',
+            registry.render(),
+        )
+
+    def test_names_are_unique(self) -> None:
+        registry = Registry()
+        registry.register(Counter('sent', 'Sent.'))
+
+        with self.assertRaises(ValueError):
+            registry.register(Counter('sent', 'Sent again.'))
+
+
+class TestTimedGameStore(IsolatedAsyncioTestCase):
+    async def test_times_operations(self) -> None:
+        store = TimedGameStore(InMemoryGameStore())
+        game = Game.create(30, False, 'Admin')
+        gets = STORE_SECONDS.count('get')
+        puts = STORE_SECONDS.count('put')
+
+        await store.put(game)
+        await store.get(game.id)
+        await store.get(uuid4())
+
+        self.assertEqual(gets + 2, STORE_SECONDS.count('get'))
+        self.assertEqual(puts + 1, STORE_SECONDS.count('put'))
+
+
+class TestInstrumentationMiddleware(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        overridden = override_settings(PROFILE_EVERY_N_REQUESTS=0)
+        overridden.enable()
+        self.addCleanup(overridden.disable)
+
+    def test_times_sync_requests(self) -> None:
+        middleware = InstrumentationMiddleware(lambda request: HttpResponse())
+        views = REQUEST_SECONDS.count('unmatched', 'GET')
+
+        middleware(RequestFactory().get('/'))
+
+        self.assertFalse(iscoroutinefunction(middleware))
+        self.assertEqual(views + 1, REQUEST_SECONDS.count('unmatched', 'GET'))
+
+    async def test_times_async_requests(self) -> None:
+        async def get_response(request: HttpRequest) -> HttpResponse:
+            return HttpResponse(b'hello')
+
+        middleware = InstrumentationMiddleware(get_response)
+        views = REQUEST_SECONDS.count('unmatched', 'POST')
+
+        response = await middleware(  # type: ignore
+            RequestFactory().post('/'),
+        )
+
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertEqual(b'hello', response.content)
+        self.assertEqual(views + 1, REQUEST_SECONDS.count('unmatched', 'POST'))
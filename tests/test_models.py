@@ -0,0 +1,118 @@
+from unittest import TestCase
+
+from games.models import (
+    FINISHED,
+    PLAYING,
+    REVIEWING,
+    WAITING,
+    Game,
+    InvalidTransition,
+    Player,
+    Players,
+    Record,
+)
+
+
+class TestGame(TestCase):
+    def test_create(self) -> None:
+        game = Game.create(30, True, 'Admin')
+
+        self.assertEqual(30, game.settings.total_time_to_guess)
+        self.assertTrue(game.settings.should_randomize_fields)
+        self.assertEqual(['Admin'], [player.name for player in game.players])
+        self.assertEqual([], game.batches)
+        self.assertEqual('wait', game.state)
+
+    def test_rounds_alternate_playing_and_reviewing(self) -> None:
+        game = Game.create(30, False, 'Admin')
+
+        for state in (PLAYING, REVIEWING, PLAYING, REVIEWING, FINISHED):
+            game.move_to(state)
+
+        self.assertEqual(FINISHED, game.state)
+
+    def test_invalid_transitions(self) -> None:
+        for state, target in (
+                (WAITING, REVIEWING),
+                (PLAYING, PLAYING),
+                (REVIEWING, WAITING),
+                (FINISHED, PLAYING),
+                (FINISHED, FINISHED),
+                ('unknown', PLAYING),
+        ):
+            game = Game.create(30, False, 'Admin')
+            game.state = state
+            with self.subTest(state=state, target=target):
+                with self.assertRaises(InvalidTransition):
+                    game.move_to(target)
+                self.assertEqual(state, game.state)
+
+
+class TestPlayers(TestCase):
+    def test_keeps_join_order_and_finds_players_by_id(self) -> None:
+        first, second = Player('Ann'), Player('Bob')
+        players = Players([first])
+
+        players.append(second)
+
+        self.assertEqual([first, second], list(players))
+        self.assertIs(second, players[1])
+        self.assertIs(second, players.get(second.id))
+        self.assertIsNone(players.get(Player('Cy').id))
+        self.assertIn(first, players)
+
+    def test_names_clash_ignoring_case_and_spacing(self) -> None:
+        players = Players([Player('Mary  Ann')])
+
+        self.assertTrue(players.has_name(' mary ann'))
+        self.assertFalse(players.has_name('Mary'))
+
+    def test_indexes_follow_removal_and_replacement(self) -> None:
+        first, second, third = Player('Ann'), Player('Bob'), Player('Cy')
+        players = Players([first, second])
+
+        del players[0]
+        players[0] = third
+
+        self.assertEqual([third], list(players))
+        self.assertIsNone(players.get(first.id))
+        self.assertIsNone(players.get(second.id))
+        self.assertFalse(players.has_name('Bob'))
+        self.assertTrue(players.has_name('Cy'))
+
+    def test_players_join_once(self) -> None:
+        player = Player('Ann')
+        players = Players([player])
+
+        with self.assertRaises(ValueError):
+            players.append(player)
+        with self.assertRaises(ValueError):
+            players.extend([Player('Bob'), player])
+
+
+class TestRecord(TestCase):
+    def test_fields_are_views_onto_columns(self) -> None:
+        record = Record(('surname', 'age'), ['Smith', '42'])
+
+        record.fields['age'].value = '43'
+        record.field('surname').is_checked = True
+
+        self.assertEqual(['Smith', '43'], record.values)
+        self.assertEqual(bytearray(b'\x01\x00'), record.checked)
+        self.assertEqual(
+            {'surname': ('Smith', True), 'age': ('43', False)},
+            {
+                name: (field.value, field.is_checked)
+                for name, field in record.fields.items()
+            },
+        )
+
+    def test_unknown_field(self) -> None:
+        record = Record(('surname',), ['Smith'])
+
+        with self.assertRaises(KeyError):
+            record.field('age')
+
+    def test_names_and_values_must_match(self) -> None:
+        with self.assertRaises(ValueError):
+            Record(('surname', 'age'), ['Smith'])
@@ -1,8 +1,9 @@
 import logging
 import os
+import re
 from functools import partial
 from time import sleep
-from typing import Callable, List, Tuple
+from typing import Callable, List, Optional, Tuple
 from unittest import TestCase
 
 from selenium import webdriver
@@ -13,6 +14,22 @@ from selenium.webdriver.support.wait import WebDriverWait
 
 LOGGER = logging.getLogger(__name__)
 
+# Milliseconds from navigation until the first main image arrived, or
+# null while it is still loading.
+TIME_TO_FIRST_IMAGE_SCRIPT = '''
+const image = document.querySelector('#id_image_1 img');
+if (!image.complete || !image.currentSrc) {
+  return null;
+}
+const entry = performance.getEntriesByName(image.currentSrc)[0];
+return entry ? entry.responseEnd : performance.now();
+'''
+MAX_TIME_TO_FIRST_IMAGE_MS = 5000
+# A medium rendition, in the original tone or a preset.
+IMAGE_SRC = re.compile(
+    r'/games/images/[0-9a-f]+/(?:(?P<tone>[0-9a-z]+)/)?medium\.jpg$',
+)
+
 
 class TestNormalFlow(TestCase):
     chrome_driver: WebDriver
@@ -72,7 +89,9 @@ class TestNormalFlow(TestCase):
 
     def test_normal_flow(self) -> None:
         join_url_1 = self._create_game(self.chrome_driver)
+        self._test_time_to_first_image(self.chrome_driver)
         join_url_2 = self._create_game(self.firefox_driver)
+        self._test_time_to_first_image(self.firefox_driver)
         self._join_game(self.chrome_driver, join_url_2)
         self._join_game(self.firefox_driver, join_url_1)
         self._manipulate_images(
@@ -141,6 +160,17 @@ class TestNormalFlow(TestCase):
         assert isinstance(driver.current_url, str)
         return driver.current_url
 
+    def _test_time_to_first_image(self, driver: WebDriver) -> None:
+        time_to_first_image = WebDriverWait(driver, 10).until(
+            lambda driver: driver.execute_script(TIME_TO_FIRST_IMAGE_SCRIPT),
+        )
+        LOGGER.info(
+            'Time to first image in %s: %.0f ms',
+            driver.name,
+            time_to_first_image,
+        )
+        self.assertLess(time_to_first_image, MAX_TIME_TO_FIRST_IMAGE_MS)
+
     def _join_game(self, driver: WebDriver, join_url: str) -> None:
         driver.get(join_url)
         self.assertEqual('Join Game', driver.title)
@@ -172,15 +202,7 @@ class TestNormalFlow(TestCase):
             right_transform_matrices,
         )
 
-        image_view_port_elem = driver.find_element_by_id(
-            'id_image_view_port',
-        )
-
-        self._test_image_filters(
-            driver,
-            expand_settings_elem,
-            image_view_port_elem,
-        )
+        self._test_image_filters(driver, expand_settings_elem)
 
         self._test_thumbnails(driver)
         json_coverage = driver.execute_script(
@@ -320,9 +342,8 @@ class TestNormalFlow(TestCase):
             self,
             driver: WebDriver,
             expand_settings_elem: WebElement,
-            image_view_port_elem: WebElement,
     ) -> None:
-        self._test_invert(driver, image_view_port_elem)
+        self._test_invert(driver)
 
         tone_modal = driver.find_element_by_id('id_tone_modal')
         self.assertFalse(tone_modal.is_displayed())
@@ -333,21 +354,11 @@ class TestNormalFlow(TestCase):
 
         brightness_slider = driver.find_element_by_id('id_brightness_slider')
         contrast_slider = driver.find_element_by_id('id_contrast_slider')
-        self._test_apply_modal(
-            brightness_slider,
-            contrast_slider,
-            driver,
-            image_view_port_elem,
-        )
+        self._test_apply_modal(brightness_slider, contrast_slider, driver)
 
         tone_button.click()
 
-        self._test_cancel_modal(
-            brightness_slider,
-            contrast_slider,
-            driver,
-            image_view_port_elem,
-        )
+        self._test_cancel_modal(brightness_slider, contrast_slider, driver)
 
         expand_settings_elem.click()
         wait = WebDriverWait(driver, timeout=5)
@@ -360,96 +371,101 @@ class TestNormalFlow(TestCase):
 
         wait.until(extra_image_settings_not_displayed)
 
-    def _test_invert(
+    def _image_tone(self, driver: WebDriver) -> Optional[str]:
+        """Return the tone preset of the first image, unless original."""
+        image = driver.find_element_by_css_selector('#id_image_1 img')
+        match = IMAGE_SRC.search(image.get_attribute('src'))
+        assert match, image.get_attribute('src')
+        return match.group('tone')
+
+    def _click_slider(
             self,
-            driver: WebDriver,
-            image_view_port_elem: WebElement,
+            move_sliders: ActionChains,
+            slider: WebElement,
+            fraction: float,
     ) -> None:
+        size = slider.size
+        move_sliders.move_to_element_with_offset(
+            to_element=slider,
+            xoffset=max(1, round(size['width'] * fraction) - 1),
+            yoffset=size['height'] / 2,
+        )
+        move_sliders.click()
+
+    def _test_invert(self, driver: WebDriver) -> None:
         invert_button = driver.find_element_by_id('id_invert_button')
         invert_button.click()
 
-        filter_style = image_view_port_elem.value_of_css_property('filter')
-
-        self.assertEqual('invert(1) contrast(1) brightness(1)', filter_style)
+        self.assertEqual('i1e0b100c100', self._image_tone(driver))
 
         invert_button.click()
 
-        filter_style = image_view_port_elem.value_of_css_property('filter')
+        self.assertIsNone(self._image_tone(driver))
+
+        equalize_button = driver.find_element_by_id('id_equalize_button')
+        equalize_button.click()
+
+        self.assertEqual('i0e1b100c100', self._image_tone(driver))
+
+        equalize_button.click()
 
-        self.assertEqual('invert(0) contrast(1) brightness(1)', filter_style)
+        self.assertIsNone(self._image_tone(driver))
 
     def _test_apply_modal(
             self,
             brightness_slider: WebElement,
             contrast_slider: WebElement,
             driver: WebDriver,
-            image_view_port_elem: WebElement,
     ) -> None:
+        # Between steps, the sliders snap to the nearest preset.
         move_sliders = ActionChains(driver)
-        brightness_slider_size = brightness_slider.size
-        contrast_slider_size = contrast_slider.size
-        move_sliders.move_to_element_with_offset(
-            to_element=brightness_slider,
-            xoffset=brightness_slider_size['width'] - 1,
-            yoffset=brightness_slider_size['height'] / 2,
-        )
-        move_sliders.click()
+        self._click_slider(move_sliders, brightness_slider, 0.4)
+        self._click_slider(move_sliders, contrast_slider, 0.6)
+        move_sliders.perform()
 
-        move_sliders.move_to_element_with_offset(
-            to_element=contrast_slider,
-            xoffset=contrast_slider_size['width'] - 1,
-            yoffset=contrast_slider_size['height'] / 2,
-        )
-        move_sliders.click()
+        for slider in (brightness_slider, contrast_slider):
+            value = float(slider.get_attribute('value'))
+            self.assertEqual(0, value * 4 % 1, value)
+        # Previewed with filters until applied.
+        self.assertIsNone(self._image_tone(driver))
 
+        move_sliders = ActionChains(driver)
+        self._click_slider(move_sliders, brightness_slider, 1)
+        self._click_slider(move_sliders, contrast_slider, 1)
         move_sliders.perform()
+
+        self.assertEqual('2', brightness_slider.get_attribute('value'))
+        self.assertEqual('2', contrast_slider.get_attribute('value'))
+
         apply_button = driver.find_element_by_id(
             'id_apply_image_editor_button',
         )
         apply_button.click()
 
-        filter_style = image_view_port_elem.value_of_css_property('filter')
-
-        self.assertEqual('invert(0) contrast(2) brightness(2)', filter_style)
+        self.assertEqual('i0e0b200c200', self._image_tone(driver))
 
     def _test_cancel_modal(
             self,
             brightness_slider: WebElement,
             contrast_slider: WebElement,
             driver: WebDriver,
-            image_view_port_elem: WebElement,
     ) -> None:
-        brightness_slider_size = brightness_slider.size
-        contrast_slider_size = contrast_slider.size
         move_sliders = ActionChains(driver)
-        move_sliders.move_to_element_with_offset(
-            to_element=brightness_slider,
-            xoffset=1,
-            yoffset=brightness_slider_size['height'] / 2,
-        )
-        move_sliders.click()
-
-        move_sliders.move_to_element_with_offset(
-            to_element=contrast_slider,
-            xoffset=1,
-            yoffset=contrast_slider_size['height'] / 2,
-        )
-        move_sliders.click()
-
+        self._click_slider(move_sliders, brightness_slider, 0)
+        self._click_slider(move_sliders, contrast_slider, 0)
         move_sliders.perform()
 
-        filter_style = image_view_port_elem.value_of_css_property('filter')
-
-        self.assertEqual('invert(0) contrast(0) brightness(0)', filter_style)
+        self.assertEqual('0', brightness_slider.get_attribute('value'))
+        self.assertEqual('0', contrast_slider.get_attribute('value'))
 
         close_image_editor_button = driver.find_element_by_id(
             'id_close_image_editor_button',
         )
         close_image_editor_button.click()
 
-        filter_style = image_view_port_elem.value_of_css_property('filter')
-
-        self.assertEqual('invert(0) contrast(2) brightness(2)', filter_style)
+        self.assertEqual('i0e0b200c200', self._image_tone(driver))
+        self.assertEqual('2', brightness_slider.get_attribute('value'))
+        self.assertEqual('2', contrast_slider.get_attribute('value'))
 
     def _test_thumbnails(
             self,
@@ -0,0 +1,163 @@
+import random
+import subprocess  # nosec
+import sys
+import tracemalloc
+from typing import Callable, Dict, List
+from unittest import TestCase
+from uuid import UUID, uuid4
+
+from games.models import Batch, Field, Game, Image, Player, Record
+from games.ordering import ordered_fields
+
+NAMES = ('surname', 'given', 'age', 'birthplace', 'occupation')
+PLAYERS = 50
+
+ORDER_SCRIPT = '''
+import sys
+from uuid import UUID
+
+from games.ordering import order_seed
+
+print(order_seed(UUID(sys.argv[1]), UUID(sys.argv[2]), 3))
+'''
+
+
+def make_game(randomize: bool = True, images: int = 4) -> Game:
+    game = Game.create(30, randomize, 'Admin')
+    game.players.extend(Player(f'Player {number}') for number in range(9))
+    game.batches.append(Batch(
+        dict.fromkeys(NAMES, str),
+        [
+            Image(True, [
+                Record(NAMES, [f'{name} {page}.{row}' for name in NAMES])
+                for row in range(10)
+            ])
+            for page in range(images)
+        ],
+    ))
+    game.round_number = 3
+    return game
+
+
+def field_order(game: Game, player_id: UUID) -> List[int]:
+    return [
+        position.guess_id for position in ordered_fields(game, player_id)
+    ]
+
+
+class TestFieldOrder(TestCase):
+    def test_is_a_permutation_of_guess_ids(self) -> None:
+        game = make_game()
+
+        order = field_order(game, game.players[1].id)
+
+        self.assertEqual(list(range(4 * 10 * len(NAMES))), sorted(order))
+        self.assertNotEqual(sorted(order), list(order))
+
+    def test_is_reproducible(self) -> None:
+        game = make_game()
+        player_id = game.players[1].id
+
+        self.assertEqual(
+            field_order(game, player_id),
+            field_order(game, player_id),
+        )
+
+    def test_is_reproducible_in_another_process(self) -> None:
+        game = make_game()
+        player_id = game.players[1].id
+        seeds = {
+            subprocess.run(  # nosec
+                [sys.executable, '-c', ORDER_SCRIPT, str(game.id),
+                 str(player_id)],
+                check=True,
+                capture_output=True,
+                text=True,
+                env={'PYTHONHASHSEED': hash_seed, 'PYTHONPATH': ':'.join(
+                    sys.path,
+                )},
+            ).stdout
+            for hash_seed in ('1', '2')
+        }
+
+        self.assertEqual(1, len(seeds))
+
+    def test_differs_by_player_and_round(self) -> None:
+        game = make_game()
+        first = field_order(game, game.players[1].id)
+
+        second = field_order(game, game.players[2].id)
+        game.round_number += 1
+        next_round = field_order(game, game.players[1].id)
+
+        self.assertNotEqual(first, second)
+        self.assertNotEqual(first, next_round)
+
+    def test_guess_id_order_without_randomizing(self) -> None:
+        game = make_game(randomize=False)
+
+        order = field_order(game, game.players[1].id)
+
+        self.assertEqual(list(range(len(order))), list(order))
+
+    def test_pages_keep_records_and_records_share_columns(self) -> None:
+        game = make_game()
+        values = [
+            value
+            for image in game.batches[0].images
+            for record in image.records
+            for value in record.values
+        ]
+
+        positions = list(ordered_fields(game, game.players[1].id))
+
+        for position in positions:
+            self.assertTrue(values[position.guess_id].startswith(
+                f'{position.name} {position.image_number - 1}.',
+            ))
+        names = [position.name for position in positions]
+        columns = {
+            tuple(names[start:start + len(NAMES)])
+            for start in range(0, len(names), len(NAMES))
+        }
+        self.assertEqual(1, len(columns))
+
+
+class TestOrderMemory(TestCase):
+    """Recomputing orders beats keeping a shuffled copy per player."""
+
+    def test_uses_less_memory_than_storing_shuffles(self) -> None:
+        game = make_game(images=20)
+        player_ids = [uuid4() for _ in range(PLAYERS)]
+
+        def store_shuffles() -> object:
+            stored: Dict[UUID, List[Dict[str, Field]]] = {}
+            for player_id in player_ids:
+                fields = [
+                    dict(record.fields)
+                    for image in game.batches[0].images
+                    for record in image.records
+                ]
+                random.Random(player_id.int).shuffle(fields)
+                stored[player_id] = fields
+            return stored
+
+        def recompute() -> object:
+            for player_id in player_ids:
+                for _ in ordered_fields(game, player_id):
+                    pass
+            return None
+
+        stored = peak_memory(store_shuffles)
+        recomputed = peak_memory(recompute)
+
+        self.assertLess(recomputed * 20, stored)
+
+
+def peak_memory(build: Callable[[], object]) -> int:
+    tracemalloc.start()
+    built = build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return peak
@@ -0,0 +1,90 @@
+import asyncio
+from typing import List, Tuple
+from unittest import IsolatedAsyncioTestCase
+
+from aioredis.exceptions import WatchError
+
+from games.redis_client import RedisClients
+from local_redis import LocalRedisServer
+
+
+class TestRedisClients(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.server = LocalRedisServer()
+        await self.server.start()
+        self.round_trips: List[Tuple[str, float]] = []
+        self.clients = RedisClients(
+            max_connections=2,
+            hooks=[lambda command, seconds: self.round_trips.append(
+                (command, seconds),
+            )],
+        )
+
+    async def asyncTearDown(self) -> None:
+        await self.clients.close()
+        await self.server.stop()
+
+    async def test_shares_a_client_per_node(self) -> None:
+        client = self.clients.client(self.server.url)
+
+        self.assertIs(client, self.clients.client(self.server.url))
+        self.assertIsNot(client, self.clients.client(self.server.url + '/1'))
+
+    async def test_reports_each_round_trip(self) -> None:
+        client = self.clients.client(self.server.url)
+
+        await client.set('key', 'value')
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.get('key')
+            pipe.expire('key', 10)
+            await pipe.execute()
+        async with client.pipeline(transaction=True) as pipe:
+            await pipe.watch('key')
+            pipe.multi()
+            pipe.delete('key')
+            await pipe.execute()
+
+        self.assertEqual(
+            ['SET', 'PIPELINE', 'WATCH', 'MULTI'],
+            [command for command, _ in self.round_trips],
+        )
+        self.assertTrue(all(seconds >= 0 for _, seconds in self.round_trips))
+
+    async def test_bounds_connections(self) -> None:
+        client = self.clients.client(self.server.url)
+
+        await asyncio.gather(*(client.get(str(key)) for key in range(20)))
+
+        self.assertLessEqual(self.server.connections, 2)
+
+    async def test_close_disconnects(self) -> None:
+        client = self.clients.client(self.server.url)
+        await client.ping()
+
+        await self.clients.close()
+        await self.clients.client(self.server.url).ping()
+
+        self.assertIsNot(client, self.clients.client(self.server.url))
+        self.assertEqual(2, self.server.connections)
+
+    async def test_watch_and_get(self) -> None:
+        client = self.clients.client(self.server.url)
+        await client.set('key', 'first')
+
+        async with client.pipeline(transaction=True) as pipe:
+            self.assertEqual(b'first', await pipe.watch_and_get('key'))
+            await client.set('key', 'second')
+            pipe.multi()
+            pipe.set('key', 'third')
+            with self.assertRaises(WatchError):
+                await pipe.execute()
+        async with client.pipeline(transaction=True) as pipe:
+            self.assertEqual(b'second', await pipe.watch_and_get('key'))
+            pipe.multi()
+            pipe.set('key', 'third')
+            await pipe.execute()
+
+        self.assertEqual(b'third', await client.get('key'))
+        self.assertIn('WATCH GET', [
+            command for command, _ in self.round_trips
+        ])
@@ -0,0 +1,96 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any
+from unittest import TestCase
+
+from django.conf import settings
+from django.http.response import HttpResponseBase
+from django.test import RequestFactory
+
+from games.responses import (
+    UnsatisfiableRange,
+    immutable_file_response,
+    parse_byte_range,
+)
+
+if not settings.configured:
+    settings.configure()
+
+
+class TestParseByteRange(TestCase):
+    def test_ranges(self) -> None:
+        self.assertEqual((0, 9), parse_byte_range('bytes=0-9', 100))
+        self.assertEqual((90, 99), parse_byte_range('bytes=90-', 100))
+        self.assertEqual((90, 99), parse_byte_range('bytes=90-150', 100))
+        self.assertEqual((80, 99), parse_byte_range('bytes=-20', 100))
+        self.assertEqual((0, 99), parse_byte_range('bytes=-200', 100))
+
+    def test_ignored_ranges(self) -> None:
+        for header in ('bytes=0-1,5-6', 'lines=1-2', 'bytes=-'):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_byte_range(header, 100))
+
+    def test_unsatisfiable_ranges(self) -> None:
+        for header in ('bytes=100-', 'bytes=9-5'):
+            with self.subTest(header=header), \
+                    self.assertRaises(UnsatisfiableRange):
+                parse_byte_range(header, 100)
+
+
+class TestImmutableFileResponse(TestCase):
+    def setUp(self) -> None:
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'image.jpg'
+        self.path.write_bytes(bytes(range(256)) * 4)
+        self.factory = RequestFactory()
+
+    def get(self, **headers: Any) -> HttpResponseBase:
+        response = immutable_file_response(
+            self.factory.get('/image.jpg', **headers),
+            self.path,
+            'abc-thumbnail',
+            'image/jpeg',
+        )
+        self.addCleanup(response.close)
+        return response
+
+    def content(self, response: HttpResponseBase) -> bytes:
+        return b''.join(response.streaming_content)  # type: ignore
+
+    def test_whole_file(self) -> None:
+        response = self.get()
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('"abc-thumbnail"', response['ETag'])
+        self.assertEqual('bytes', response['Accept-Ranges'])
+        self.assertEqual('1024', response['Content-Length'])
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(self.path.read_bytes(), self.content(response))
+
+    def test_not_modified(self) -> None:
+        response = self.get(HTTP_IF_NONE_MATCH='"other", "abc-thumbnail"')
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual('"abc-thumbnail"', response['ETag'])
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_byte_range(self) -> None:
+        response = self.get(HTTP_RANGE='bytes=256-261')
+
+        self.assertEqual(206, response.status_code)
+        self.assertEqual('bytes 256-261/1024', response['Content-Range'])
+        self.assertEqual('6', response['Content-Length'])
+        self.assertEqual(bytes(range(6)), self.content(response))
+
+    def test_byte_range_of_other_version(self) -> None:
+        response = self.get(HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"old"')
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(1024, len(self.content(response)))
+
+    def test_unsatisfiable_range(self) -> None:
+        response = self.get(HTTP_RANGE='bytes=2000-')
+
+        self.assertEqual(416, response.status_code)
+        self.assertEqual('bytes */1024', response['Content-Range'])
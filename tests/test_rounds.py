@@ -0,0 +1,276 @@
+import asyncio
+from time import time
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple, TypeVar
+from unittest import IsolatedAsyncioTestCase, TestCase
+from uuid import UUID
+
+from games.guesses import Guess, InMemoryGuessStore
+from games.models import (
+    FINISHED,
+    PLAYING,
+    REVIEWING,
+    Batch,
+    Game,
+    Image,
+    InvalidTransition,
+    Player,
+    Record,
+)
+from games.rounds import (
+    RoundScheduler,
+    close_round,
+    finish_game,
+    finish_round,
+    is_round_open,
+    start_round,
+)
+from games.scoring import PlayerScore
+from games.stores import GameStore, InMemoryGameStore, RedisGameStore
+from local_redis import LocalRedisServer
+
+if TYPE_CHECKING:  # pragma: no cover
+    SchedulerTestCase = IsolatedAsyncioTestCase
+else:
+    SchedulerTestCase = object
+
+T = TypeVar('T')
+
+
+class TestRoundState(TestCase):
+    def test_start_round(self) -> None:
+        game = Game.create(30, False, 'Admin')
+        game.players[0].guess = 'old guess'
+
+        round_number = start_round(game, now=100)
+
+        self.assertEqual(1, round_number)
+        self.assertEqual(130, game.round_deadline)
+        self.assertIsNone(game.players[0].guess)
+        self.assertTrue(is_round_open(game, now=129.9))
+        self.assertFalse(is_round_open(game, now=130))
+
+    def test_close_round_once(self) -> None:
+        game = Game.create(30, False, 'Admin')
+        round_number = start_round(game, now=100)
+
+        self.assertFalse(close_round(game, round_number + 1))
+        self.assertTrue(close_round(game, round_number))
+        self.assertFalse(close_round(game, round_number))
+        self.assertFalse(is_round_open(game, now=101))
+        self.assertEqual(REVIEWING, game.state)
+
+    def test_start_round_after_an_unclosed_one(self) -> None:
+        game = Game.create(30, False, 'Admin')
+        start_round(game, now=100)
+
+        self.assertEqual(2, start_round(game, now=200))
+        self.assertEqual(PLAYING, game.state)
+
+    def test_finished_games_have_no_rounds(self) -> None:
+        game = Game.create(30, False, 'Admin')
+        round_number = start_round(game, now=100)
+
+        finish_game(game)
+
+        self.assertEqual(FINISHED, game.state)
+        self.assertFalse(close_round(game, round_number))
+        with self.assertRaises(InvalidTransition):
+            start_round(game, now=200)
+        with self.assertRaises(InvalidTransition):
+            finish_game(game)
+
+    def test_finish_round_scores_once(self) -> None:
+        game = Game.create(30, False, 'Admin')
+        round_number = start_round(game, now=100)
+
+        scores = finish_round(game, round_number)
+
+        self.assertEqual([PlayerScore(game.players[0].id, 0, 0)], scores)
+        self.assertIsNone(finish_round(game, round_number))
+
+    def test_finish_round_scores_guesses(self) -> None:
+        game = make_game_with_records()
+        admin = game.players[0]
+        round_number = start_round(game, now=100)
+
+        scores = finish_round(game, round_number, {
+            admin.id: Guess(admin.id, 1, 'Ann', 0),
+        })
+
+        assert scores
+        self.assertEqual(150, scores[0].points)
+        self.assertEqual('Ann', admin.guess)
+
+
+def make_game_with_records() -> Game:
+    game = Game.create(30, False, 'Admin')
+    game.batches.append(Batch({'surname': str, 'given': str}, [
+        Image(True, [Record(('surname', 'given'), ['Smith', 'Ann'])]),
+    ]))
+    return game
+
+
+class FailingOnceGameStore(GameStore):
+    """Fails its first update, as a store timing out would."""
+
+    def __init__(self, store: GameStore):
+        self.store = store
+        self.failed = False
+
+    async def get(self, game_id: UUID) -> Optional[Game]:
+        return await self.store.get(game_id)
+
+    async def read(
+            self,
+            game_id: UUID,
+            decode: Callable[[bytes], T],
+    ) -> Optional[T]:
+        return await self.store.read(game_id, decode)
+
+    async def put(self, game: Game) -> None:
+        await self.store.put(game)
+
+    async def update(self, game_id: UUID, mutate: Callable[[Game], T]) -> T:
+        if not self.failed:
+            self.failed = True
+            raise TimeoutError()
+        return await self.store.update(game_id, mutate)
+
+    async def delete(self, game_id: UUID) -> None:
+        await self.store.delete(game_id)
+
+
+class SchedulerTests(SchedulerTestCase):
+    store: GameStore
+
+    async def make_scheduler(self) -> RoundScheduler:
+        scheduler = RoundScheduler(self.store, self.on_round_closed)
+        task = asyncio.ensure_future(scheduler.run())
+        self.addCleanup(task.cancel)
+        return scheduler
+
+    async def on_round_closed(
+            self,
+            game_id: UUID,
+            round_number: int,
+            _: List[PlayerScore],
+    ) -> None:
+        self.closed.append((game_id, round_number))
+
+    async def start_game(self, time_to_guess: float) -> Tuple[Game, float]:
+        game = Game.create(1, False, 'Admin')
+        round_number = start_round(game, time())
+        game.round_deadline = time() + time_to_guess
+        await self.store.put(game)
+        self.assertEqual(1, round_number)
+        return game, game.round_deadline
+
+    async def test_closes_rounds_in_deadline_order(self) -> None:
+        self.closed: List[Tuple[UUID, int]] = []
+        scheduler = await self.make_scheduler()
+        late_game, late_deadline = await self.start_game(0.2)
+        early_game, early_deadline = await self.start_game(0.05)
+
+        scheduler.schedule(late_game.id, 1, late_deadline)
+        scheduler.schedule(early_game.id, 1, early_deadline)
+        await asyncio.sleep(0.1)
+
+        self.assertEqual([(early_game.id, 1)], self.closed)
+        await asyncio.sleep(0.2)
+        self.assertEqual([(early_game.id, 1), (late_game.id, 1)], self.closed)
+        stored_game = await self.store.get(late_game.id)
+        assert stored_game
+        self.assertIsNone(stored_game.round_deadline)
+
+    async def test_closes_round_once_across_schedulers(self) -> None:
+        self.closed = []
+        schedulers = [await self.make_scheduler() for _ in range(3)]
+        game, deadline = await self.start_game(0.05)
+
+        for scheduler in schedulers:
+            scheduler.schedule(game.id, 1, deadline)
+        await asyncio.sleep(0.2)
+
+        self.assertEqual([(game.id, 1)], self.closed)
+
+    async def test_skips_deleted_games(self) -> None:
+        self.closed = []
+        scheduler = await self.make_scheduler()
+        game, deadline = await self.start_game(0.05)
+        await self.store.delete(game.id)
+
+        scheduler.schedule(game.id, 1, deadline)
+        await asyncio.sleep(0.1)
+
+        self.assertEqual([], self.closed)
+        self.assertEqual(0, len(scheduler))
+
+    async def test_retries_rounds_the_store_failed_to_close(self) -> None:
+        self.closed = []
+        scheduler = RoundScheduler(
+            FailingOnceGameStore(self.store),
+            self.on_round_closed,
+            retry_seconds=0.1,
+        )
+        task = asyncio.ensure_future(scheduler.run())
+        self.addCleanup(task.cancel)
+        failed_game, failed_deadline = await self.start_game(0.02)
+        later_game, later_deadline = await self.start_game(0.05)
+
+        with self.assertLogs('games.rounds', 'ERROR'):
+            scheduler.schedule(failed_game.id, 1, failed_deadline)
+            scheduler.schedule(later_game.id, 1, later_deadline)
+            await asyncio.sleep(0.08)
+
+        self.assertEqual([(later_game.id, 1)], self.closed)
+        self.assertEqual(1, len(scheduler))
+        await asyncio.sleep(0.1)
+        self.assertEqual(
+            [(later_game.id, 1), (failed_game.id, 1)],
+            self.closed,
+        )
+        self.assertFalse(task.done())
+
+    async def test_scores_stored_guesses(self) -> None:
+        self.closed = []
+        guesses = InMemoryGuessStore()
+        scheduler = RoundScheduler(
+            self.store,
+            self.on_round_closed,
+            guesses=guesses,
+        )
+        task = asyncio.ensure_future(scheduler.run())
+        self.addCleanup(task.cancel)
+        game = make_game_with_records()
+        player = Player('Joiner')
+        game.players.append(player)
+        start_round(game, time())
+        game.round_deadline = time() + 0.05
+        await self.store.put(game)
+        await guesses.add_many(game.id, 1, [Guess(player.id, 0, 'Smith', 0)])
+
+        scheduler.schedule(game.id, 1, game.round_deadline)
+        await asyncio.sleep(0.2)
+
+        stored_game = await self.store.get(game.id)
+        assert stored_game
+        self.assertEqual([0, 150], [
+            stored_player.score for stored_player in stored_game.players
+        ])
+        self.assertEqual({}, await guesses.get_all(game.id, 1))
+
+
+class TestInMemoryRoundScheduler(SchedulerTests, IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.store = InMemoryGameStore()
+
+
+class TestRedisRoundScheduler(SchedulerTests, IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.server = LocalRedisServer()
+        await self.server.start()
+        self.store = RedisGameStore.from_url(self.server.url)
+
+    async def asyncTearDown(self) -> None:
+        await self.store.close()
+        await self.server.stop()
@@ -0,0 +1,87 @@
+from unittest import TestCase
+
+from games.models import Batch, Game, Image, Player, Record
+from games.scoring import (
+    FULL_POINTS,
+    PlayerScore,
+    bounded_edit_distance,
+    normalize,
+    reference_values,
+    score_round,
+)
+
+
+class TestMatching(TestCase):
+    def test_normalize(self) -> None:
+        self.assertEqual('jose mari', normalize('  José   Mari. '))
+
+    def test_bounded_edit_distance(self) -> None:
+        self.assertEqual(0, bounded_edit_distance('smith', 'smith', 1))
+        self.assertEqual(1, bounded_edit_distance('smith', 'smyth', 1))
+        self.assertEqual(3, bounded_edit_distance('smith', 'smithson', 3))
+        self.assertIsNone(bounded_edit_distance('smith', 'jones', 2))
+        self.assertIsNone(bounded_edit_distance('smith', 'smithson', 2))
+        self.assertEqual(2, bounded_edit_distance('kitten', 'sittin', 2))
+        self.assertEqual(3, bounded_edit_distance('kitten', 'sitting', 3))
+
+
+class TestReferenceValues(TestCase):
+    def test_normalizes_only_guessed_fields(self) -> None:
+        names = ('surname', 'given')
+        game = Game.create(30, False, 'Admin')
+        game.batches.extend([
+            Batch({'surname': str, 'given': str}, [
+                Image(True, [Record(names, ['Smith', 'José'])]),
+                Image(True, [Record(names, ['Jones', 'Ann.'])]),
+            ]),
+            Batch({'surname': str}, [
+                Image(True, [Record(('surname',), ['Brown'])]),
+            ]),
+        ])
+
+        self.assertEqual(
+            {1: 'jose', 3: 'ann', 4: 'brown'},
+            reference_values(game, [4, 3, 1, 3, 5, -1]),
+        )
+        self.assertEqual({}, reference_values(game, []))
+
+
+class TestScoreRound(TestCase):
+    def setUp(self) -> None:
+        self.game = Game.create(30, False, 'Admin')
+        self.game.batches.append(Batch({'surname': str, 'given': str}, [
+            Image(True, [Record(('surname', 'given'), ['Smith', 'José'])]),
+        ]))
+
+    def guess(self, guess_id: int, guess: str, guess_time: int) -> Player:
+        player = Player(guess, guess_id=guess_id, guess=guess,
+                        guess_time=guess_time)
+        self.game.players.append(player)
+        return player
+
+    def test_scores(self) -> None:
+        admin = self.game.players[0]
+        exact = self.guess(1, 'jose', 30)
+        quick = self.guess(0, 'SMITH', 0)
+        close = self.guess(0, 'Smyth', 30)
+        wrong = self.guess(0, 'Jones', 0)
+        unknown = self.guess(2, 'Smith', 0)
+
+        scores = score_round(self.game)
+
+        self.assertEqual([
+            PlayerScore(admin.id, 0, 0),
+            PlayerScore(exact.id, FULL_POINTS, FULL_POINTS),
+            PlayerScore(quick.id, 150, 150),
+            PlayerScore(close.id, 40, 40),
+            PlayerScore(wrong.id, 0, 0),
+            PlayerScore(unknown.id, 0, 0),
+        ], scores)
+
+    def test_adds_to_score(self) -> None:
+        player = self.guess(0, 'Smith', 15)
+        player.score = 10
+
+        score_round(self.game)
+
+        self.assertEqual(10 + FULL_POINTS + 25, player.score)
@@ -0,0 +1,63 @@
+import os
+import signal
+import subprocess  # nosec
+import sys
+from typing import List
+from unittest import TestCase
+from urllib.request import urlopen
+
+from games.serving import SUPERVISOR_PID, request_shutdown
+
+SERVER_SCRIPT = '''
+import os
+import sys
+
+from games.serving import Supervisor, bind
+
+
+async def application(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 200})
+    body = str(os.getpid()).encode()
+    await send({'type': 'http.response.body', 'body': body})
+
+
+listener = bind('127.0.0.1', 0, 16)
+print(listener.getsockname()[1], flush=True)
+sys.exit(Supervisor(application, listener, 2, 5, 5).run())
+'''
+
+
+class TestSupervisor(TestCase):
+    def test_serves_from_workers_until_stopped(self) -> None:
+        server = subprocess.Popen(  # nosec
+            [sys.executable, '-c', SERVER_SCRIPT],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        self.addCleanup(server.kill)
+        assert server.stdout
+        port = int(server.stdout.readline())
+
+        workers: List[int] = []
+        for _ in range(4):
+            with urlopen(f'http://127.0.0.1:{port}/', timeout=10) as response:
+                workers.append(int(response.read()))
+        server.send_signal(signal.SIGTERM)
+
+        self.assertEqual(0, server.wait(timeout=20))
+        self.assertNotIn(server.pid, workers)
+
+    def test_request_shutdown_signals_supervisor(self) -> None:
+        received: List[int] = []
+        previous = signal.signal(
+            signal.SIGTERM,
+            lambda signum, _: received.append(signum),
+        )
+        self.addCleanup(signal.signal, signal.SIGTERM, previous)
+        os.environ[SUPERVISOR_PID] = str(os.getpid())
+        self.addCleanup(os.environ.pop, SUPERVISOR_PID)
+
+        request_shutdown()
+
+        self.assertEqual([signal.SIGTERM], received)
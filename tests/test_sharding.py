@@ -0,0 +1,170 @@
+import subprocess  # nosec
+import sys
+from random import Random
+from collections import Counter
+from pathlib import Path
+from typing import List
+from unittest import IsolatedAsyncioTestCase, TestCase
+from uuid import UUID, uuid4
+
+import aioredis
+
+from games.leaderboard import RedisLeaderboard, ShardedLeaderboard
+from games.models import Game, Player
+from games.sharding import HashRing, Shards, game_id_of, rebalance
+from games.stores import RedisGameStore, ShardedGameStore
+
+LOCAL_REDIS = Path(__file__).with_name('local_redis.py')
+
+
+class TestHashRing(TestCase):
+    def setUp(self) -> None:
+        random = Random(4)
+        self.game_ids = [
+            UUID(int=random.getrandbits(128), version=4) for _ in range(4000)
+        ]
+
+    def test_spreads_games_evenly(self) -> None:
+        ring = HashRing(['redis://a', 'redis://b', 'redis://c', 'redis://d'])
+
+        counts = Counter(map(ring.node_for, self.game_ids))
+
+        for node in ring.nodes:
+            self.assertAlmostEqual(1000, counts[node], delta=150)
+
+    def test_added_node_only_takes_games(self) -> None:
+        old = HashRing(['redis://a', 'redis://b', 'redis://c'])
+        new = HashRing(['redis://a', 'redis://b', 'redis://c', 'redis://d'])
+
+        moved = [
+            game_id for game_id in self.game_ids
+            if old.node_for(game_id) != new.node_for(game_id)
+        ]
+
+        self.assertEqual({'redis://d'}, set(map(new.node_for, moved)))
+        self.assertAlmostEqual(1000, len(moved), delta=200)
+
+    def test_rejects_bad_node_lists(self) -> None:
+        for nodes in ([], ['redis://a', 'redis://a']):
+            with self.subTest(nodes=nodes), self.assertRaises(ValueError):
+                HashRing(nodes)
+
+    def test_game_id_of(self) -> None:
+        game_id = uuid4()
+
+        self.assertEqual(game_id, game_id_of(f'game:{game_id}'.encode()))
+        self.assertEqual(
+            game_id,
+            game_id_of(f'game:{game_id}:round:1:guesses'.encode()),
+        )
+        self.assertIsNone(game_id_of(b'game:nope'))
+        self.assertIsNone(game_id_of(f'worker:{game_id}'.encode()))
+
+
+class TestShardedStores(IsolatedAsyncioTestCase):
+    """Runs against stand-in Redis processes, one per node."""
+
+    def setUp(self) -> None:
+        self.urls = [self.start_node() for _ in range(3)]
+
+    def start_node(self) -> str:
+        node = subprocess.Popen(  # nosec
+            [sys.executable, str(LOCAL_REDIS), '--port', '0'],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        self.addCleanup(node.wait)
+        self.addCleanup(node.kill)
+        assert node.stdout
+        self.addCleanup(node.stdout.close)
+        return node.stdout.readline().strip()
+
+    async def asyncSetUp(self) -> None:
+        self.clients = {url: aioredis.from_url(url) for url in self.urls}
+
+    async def asyncTearDown(self) -> None:
+        for client in self.clients.values():
+            await client.close()
+
+    async def put_games(
+            self,
+            ring: HashRing,
+            count: int,
+    ) -> List[Game]:
+        store = ShardedGameStore(Shards(ring, RedisGameStore.from_url))
+        leaderboard = ShardedLeaderboard(
+            Shards(ring, RedisLeaderboard.from_url),
+        )
+        games = [Game.create(30, False, 'Admin') for _ in range(count)]
+        for game in games:
+            await store.put(game)
+            await leaderboard.update(game.id, {game.players[0].id: 3})
+        await store.close()
+        await leaderboard.close()
+        return games
+
+    async def nodes_of(self, game_id: UUID) -> List[str]:
+        return [
+            url for url, client in self.clients.items()
+            if await client.exists(
+                f'game:{game_id}',
+                f'game:{game_id}:leaderboard',
+            )
+        ]
+
+    async def test_keeps_a_games_keys_on_its_node(self) -> None:
+        ring = HashRing(self.urls)
+        store = ShardedGameStore(Shards(ring, RedisGameStore.from_url))
+        self.addAsyncCleanup(store.close)
+
+        games = await self.put_games(ring, 30)
+        await store.update(
+            games[0].id,
+            lambda game: game.players.append(Player('Joiner')),
+        )
+
+        for game in games:
+            self.assertEqual([ring.node_for(game.id)], await self.nodes_of(
+                game.id,
+            ))
+        self.assertEqual(set(self.urls), {
+            ring.node_for(game.id) for game in games
+        })
+        stored = await store.get(games[0].id)
+        assert stored
+        self.assertEqual(2, len(stored.players))
+
+    async def test_rebalance_moves_games_to_added_node(self) -> None:
+        old = HashRing(self.urls[:2])
+        new = HashRing(self.urls)
+        games = await self.put_games(old, 60)
+        moving = {
+            game.id for game in games
+            if new.node_for(game.id) == self.urls[2]
+        }
+
+        moved = await rebalance(old, new, aioredis.from_url)
+
+        self.assertEqual(
+            {self.urls[0]: 0, self.urls[1]: 0, self.urls[2]: len(moving)},
+            moved,
+        )
+        self.assertTrue(moving)
+        store = ShardedGameStore(Shards(new, RedisGameStore.from_url))
+        self.addAsyncCleanup(store.close)
+        for game in games:
+            self.assertEqual([new.node_for(game.id)], await self.nodes_of(
+                game.id,
+            ))
+            stored = await store.get(game.id)
+            assert stored
+            self.assertEqual(game.id, stored.id)
+        for game_id in moving:
+            self.assertGreater(
+                await self.clients[self.urls[2]].ttl(f'game:{game_id}'),
+                0,
+            )
+        self.assertEqual(
+            {self.urls[0]: 0, self.urls[1]: 0, self.urls[2]: 0},
+            await rebalance(old, new, aioredis.from_url),
+        )
@@ -0,0 +1,32 @@
+from unittest import TestCase
+
+from games.startup import ImportTime, by_package, parse_import_times
+
+REPORT = '''\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2000 |       2000 |     django.utils.version
+import time:      1000 |       3000 |   django.utils
+import time:       500 |       3500 | django
+import time:      4000 |       4000 | aioredis
+Traceback (most recent call last):
+'''
+
+
+class TestStartup(TestCase):
+    def test_parse_import_times(self) -> None:
+        times = parse_import_times(REPORT.splitlines())
+
+        self.assertEqual(5, len(times))
+        self.assertEqual(
+            ImportTime('django.utils', 0.001, 0.003),
+            times[2],
+        )
+
+    def test_by_package(self) -> None:
+        packages = by_package(parse_import_times(REPORT.splitlines()))
+
+        self.assertEqual(['aioredis', 'django', '_io'], [
+            package for package, _ in packages
+        ])
+        self.assertAlmostEqual(0.0035, dict(packages)['django'])
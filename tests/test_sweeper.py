@@ -0,0 +1,100 @@
+from datetime import timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import IsolatedAsyncioTestCase
+from uuid import uuid4
+
+from PIL import Image as PillowImage
+
+from games.codec import encode_game
+from games.guesses import Guess, GuessesClosed, InMemoryGuessStore
+from games.images import DerivativeCache
+from games.metrics import FORGOTTEN_IMAGES, SWEPT_GAME_BYTES, SWEPT_GAMES
+from games.models import FINISHED, Game
+from games.stores import InMemoryGameStore
+from games.sweeper import Sweep, Sweeper
+
+
+class TestSweeper(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.now = 0.0
+        self.store = InMemoryGameStore(clock=lambda: self.now)
+        self.derivatives = DerivativeCache(
+            self.directory / 'cache',
+            10 * 1024 ** 2,
+            clock=lambda: self.now,
+        )
+        self.sweeper = Sweeper(self.store, self.derivatives, batch_size=2)
+
+    async def test_sweeps_expired_games_and_unused_originals(self) -> None:
+        games = [Game.create(30, False, 'Admin') for _ in range(3)]
+        games[0].move_to(FINISHED)
+        for game in games:
+            await self.store.put(game)
+        for number, colour in enumerate(('white', 'black', 'red')):
+            source = self.directory / f'{number}.jpg'
+            PillowImage.new('RGB', (10, 10), colour).save(source)
+            self.derivatives.digest(source)
+        live_game = Game.create(30, False, 'Admin')
+        self.now = 60 * 60
+        await self.store.put(live_game)
+        swept_bytes = SWEPT_GAME_BYTES.value()
+        swept_finished = SWEPT_GAMES.value('finished')
+        swept_idle = SWEPT_GAMES.value('idle')
+        forgotten = FORGOTTEN_IMAGES.value()
+
+        self.now += 60 * 60 + 1
+        sweep = await self.sweeper.sweep()
+
+        # As stored, without the sweeper encoding them again.
+        size = sum(len(encode_game(game)) for game in games)
+        self.assertEqual(Sweep(3, size, 3), sweep)
+        self.assertEqual(size, SWEPT_GAME_BYTES.value() - swept_bytes)
+        self.assertEqual(1, SWEPT_GAMES.value('finished') - swept_finished)
+        self.assertEqual(2, SWEPT_GAMES.value('idle') - swept_idle)
+        self.assertEqual(3, FORGOTTEN_IMAGES.value() - forgotten)
+        self.assertEqual(1, len(self.store))
+        self.assertEqual(Sweep(0, 0, 0), await self.sweeper.sweep())
+
+    async def test_forgets_guesses_of_swept_games(self) -> None:
+        # Kept longer than the games, to tell the sweeper's work apart.
+        guesses = InMemoryGuessStore(timedelta(days=1), lambda: self.now)
+        sweeper = Sweeper(self.store, self.derivatives, guesses=guesses)
+        expired_game = Game.create(30, False, 'Admin')
+        live_game = Game.create(30, False, 'Admin')
+        guess = Guess(uuid4(), 3, 'Smith', 4)
+        await self.store.put(expired_game)
+        for game in (expired_game, live_game):
+            await guesses.add_many(game.id, 2, [guess])
+            await guesses.collect(game.id, 1)
+        self.now = 60 * 60
+        await self.store.put(live_game)
+
+        self.now += 60 * 60 + 1
+        await sweeper.sweep()
+
+        self.assertEqual({}, await guesses.get_all(expired_game.id, 2))
+        await guesses.add_many(expired_game.id, 1, [guess])
+        self.assertEqual({guess.player_id: guess}, await guesses.get_all(
+            live_game.id,
+            2,
+        ))
+        with self.assertRaises(GuessesClosed):
+            await guesses.add_many(live_game.id, 1, [guess])
+
+    async def test_keeps_games_in_use(self) -> None:
+        game = Game.create(30, False, 'Admin')
+        await self.store.put(game)
+        sweeper = Sweeper(
+            self.store,
+            self.derivatives,
+            image_idle=timedelta(minutes=5),
+        )
+
+        self.now = 60 * 60
+
+        self.assertEqual(Sweep(0, 0, 0), await sweeper.sweep())
+        self.assertIsNotNone(await self.store.get(game.id))
@@ -0,0 +1,195 @@
+import shutil
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from PIL import Image as PillowImage
+
+from games.images import DerivativeCache
+from games.tiles import TileCache, pyramid_for
+from games.tones import Tone
+
+
+class TestPyramid(TestCase):
+    def test_levels_halve_down_to_a_pixel(self) -> None:
+        pyramid = pyramid_for(3000, 2000, 256)
+
+        self.assertEqual(12, pyramid.max_level)
+        self.assertEqual((3000, 2000), pyramid.level_size(12))
+        self.assertEqual((1500, 1000), pyramid.level_size(11))
+        self.assertEqual((375, 250), pyramid.level_size(9))
+        self.assertEqual((1, 1), pyramid.level_size(0))
+        self.assertEqual((12, 8), pyramid.grid(12))
+        self.assertEqual((2, 1), pyramid.grid(9))
+
+    def test_has_tile(self) -> None:
+        pyramid = pyramid_for(3000, 2000, 256)
+
+        self.assertTrue(pyramid.has_tile(12, 11, 7))
+        self.assertFalse(pyramid.has_tile(12, 12, 7))
+        self.assertFalse(pyramid.has_tile(13, 0, 0))
+        self.assertFalse(pyramid.has_tile(-1, 0, 0))
+
+    def test_level_for(self) -> None:
+        pyramid = pyramid_for(3000, 2000, 256)
+
+        self.assertEqual(12, pyramid.level_for(2000))
+        self.assertEqual(11, pyramid.level_for(1500))
+        self.assertEqual(12, pyramid.level_for(10_000))
+        self.assertEqual(0, pyramid.level_for(0.5))
+
+    def test_visible_tiles_scale_with_the_region(self) -> None:
+        pyramid = pyramid_for(3000, 2000, 256)
+
+        self.assertEqual(
+            [(0, 0), (1, 0), (0, 1), (1, 1)],
+            pyramid.visible_tiles(12, 0, 0, 512 / 3000, 512 / 2000),
+        )
+        self.assertEqual(
+            [(11, 7)],
+            pyramid.visible_tiles(12, 0.99, 0.99, 1, 1),
+        )
+        self.assertEqual(96, len(pyramid.visible_tiles(12, 0, 0, 1, 1)))
+
+
+class TestTileCache(TestCase):
+    def setUp(self) -> None:
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.source = self.directory / 'page.jpg'
+        PillowImage.new('RGB', (600, 300), 'white').save(self.source)
+        self.derivatives = DerivativeCache(
+            self.directory / 'cache',
+            10 * 1024 ** 2,
+        )
+        self.root = self.directory / 'tiles'
+
+    def test_builds_every_level(self) -> None:
+        cache = TileCache(self.root, self.derivatives, 10 * 1024 ** 2)
+        digest = self.derivatives.digest(self.source)
+
+        pyramid = cache.pyramid(digest)
+
+        assert pyramid
+        self.assertEqual((600, 300, 10), (
+            pyramid.width,
+            pyramid.height,
+            pyramid.max_level,
+        ))
+        for level in range(pyramid.max_level + 1):
+            columns, rows = pyramid.grid(level)
+            width, height = pyramid.level_size(level)
+            path = cache.path(digest, level, columns - 1, rows - 1)
+            assert path
+            with PillowImage.open(path) as tile:
+                self.assertEqual(
+                    (
+                        width - (columns - 1) * pyramid.tile_size,
+                        height - (rows - 1) * pyramid.tile_size,
+                    ),
+                    tile.size,
+                )
+        self.assertIsNone(cache.path(digest, 10, 3, 0))
+        self.assertIsNone(cache.path(digest, 11, 0, 0))
+
+    def test_unknown_originals_have_no_pyramid(self) -> None:
+        cache = TileCache(self.root, self.derivatives, 10 * 1024 ** 2)
+
+        self.assertIsNone(cache.pyramid('0' * 64))
+        self.assertIsNone(cache.descriptor('0' * 64))
+        self.assertIsNone(cache.path('0' * 64, 0, 0, 0))
+
+    def test_reuses_pyramids_on_disk(self) -> None:
+        digest = self.derivatives.digest(self.source)
+        pyramid = TileCache(
+            self.root,
+            self.derivatives,
+            10 * 1024 ** 2,
+        ).pyramid(digest)
+
+        cache = TileCache(
+            self.root,
+            DerivativeCache(self.directory / 'other', 10 * 1024 ** 2),
+            10 * 1024 ** 2,
+        )
+
+        self.assertEqual(pyramid, cache.pyramid(digest))
+        self.assertGreater(cache.size, 0)
+
+    def test_builds_pyramids_of_originals_other_processes_saw(self) -> None:
+        digest = self.derivatives.digest(self.source)
+
+        cache = TileCache(
+            self.root,
+            DerivativeCache(self.directory / 'cache', 10 * 1024 ** 2),
+            10 * 1024 ** 2,
+        )
+
+        pyramid = cache.pyramid(digest)
+        assert pyramid
+        self.assertEqual((600, 300), (pyramid.width, pyramid.height))
+        self.assertTrue(cache.path(digest, 10, 0, 0, Tone(brightness=50)))
+
+    def test_rebuilds_pyramids_another_process_evicted(self) -> None:
+        cache = TileCache(self.root, self.derivatives, 10 * 1024 ** 2)
+        digest = self.derivatives.digest(self.source)
+        cache.pyramid(digest)
+        size = cache.size
+
+        shutil.rmtree(self.root / digest)
+
+        path = cache.path(digest, 10, 0, 0)
+        assert path
+        self.assertTrue(path.exists())
+        self.assertEqual(size, cache.size)
+        shutil.rmtree(self.root / digest)
+        toned = cache.path(digest, 10, 0, 0, Tone(brightness=50))
+        assert toned
+        self.assertTrue(toned.exists())
+
+    def test_evicts_least_recently_used_pyramids(self) -> None:
+        other = self.directory / 'other.jpg'
+        PillowImage.new('RGB', (600, 300), 'black').save(other)
+        first = self.derivatives.digest(self.source)
+        second = self.derivatives.digest(other)
+        probe = TileCache(
+            self.directory / 'probe',
+            self.derivatives,
+            10 * 1024 ** 2,
+        )
+        probe.pyramid(first)
+        cache = TileCache(self.root, self.derivatives, probe.size + 1)
+
+        cache.pyramid(first)
+        cache.pyramid(second)
+
+        self.assertFalse((self.root / first).exists())
+        self.assertTrue((self.root / second).exists())
+        self.assertEqual([second], [
+            path.name for path in self.root.iterdir()
+        ])
+        self.assertTrue(cache.pyramid(first))
+        self.assertTrue((self.root / first).exists())
+
+    def test_makes_toned_tiles_on_demand(self) -> None:
+        cache = TileCache(self.root, self.derivatives, 10 * 1024 ** 2)
+        digest = self.derivatives.digest(self.source)
+        darker = Tone(brightness=50)
+        tile = cache.path(digest, 10, 0, 0)
+        assert tile
+        size = cache.size
+
+        path = cache.path(digest, 10, 0, 0, darker)
+
+        assert path
+        self.assertEqual(
+            self.root / digest / 'tones' / darker.name / '10' / '0_0.jpg',
+            path,
+        )
+        self.assertEqual(size + path.stat().st_size, cache.size)
+        with PillowImage.open(path) as image:
+            self.assertAlmostEqual(128, image.getpixel((10, 10))[0], delta=2)
+        self.assertEqual(path, cache.path(digest, 10, 0, 0, darker))
+        self.assertTrue(cache.path(digest, 10, 0, 0, Tone(equalize=True)))
+        self.assertIsNone(cache.path(digest, 10, 9, 0, darker))
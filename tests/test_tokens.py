@@ -0,0 +1,79 @@
+from datetime import timedelta
+from unittest import TestCase
+from uuid import uuid4
+
+from games.tokens import PlayerToken, PlayerTokens
+
+
+class TestPlayerTokens(TestCase):
+    def setUp(self) -> None:
+        self.now = 1_700_000_000.0
+        self.tokens = PlayerTokens(
+            'secret',
+            lifetime=timedelta(hours=2),
+            renew_within=timedelta(minutes=30),
+            clock=lambda: self.now,
+        )
+        self.game_id = uuid4()
+        self.token = self.tokens.issue(self.game_id, uuid4(), 'Zoë Smith')
+
+    def test_round_trip(self) -> None:
+        value = self.tokens.sign(self.token)
+
+        self.assertEqual(self.token, self.tokens.read(value, self.game_id))
+        self.assertEqual(int(self.now) + 2 * 60 * 60, self.token.expires)
+        self.assertLess(len(value), 120)
+
+    def test_rejects_tampered_tokens(self) -> None:
+        value = self.tokens.sign(self.token)
+        payload, signature = value.split(':')
+        other = self.tokens.sign(self.token._replace(name='Admin'))
+
+        for tampered in (
+                f'{other.split(":")[0]}:{signature}',
+                f'{payload}:{signature[:-2]}xx',
+                payload,
+                str(self.token.player_id),
+                '',
+        ):
+            with self.subTest(tampered=tampered):
+                self.assertIsNone(self.tokens.read(tampered, self.game_id))
+
+    def test_rejects_tokens_of_other_keys_and_games(self) -> None:
+        value = PlayerTokens('other secret').sign(self.token)
+
+        self.assertIsNone(self.tokens.read(value, self.game_id))
+        self.assertIsNone(
+            self.tokens.read(self.tokens.sign(self.token), uuid4()),
+        )
+
+    def test_accepts_tokens_of_fallback_keys(self) -> None:
+        value = PlayerTokens('old secret').sign(self.token)
+        tokens = PlayerTokens(
+            'secret',
+            ['old secret'],
+            clock=lambda: self.now,
+        )
+
+        self.assertEqual(self.token, tokens.read(value, self.game_id))
+
+    def test_expiry_and_renewal(self) -> None:
+        value = self.tokens.sign(self.token)
+
+        self.now += 60 * 60
+        self.assertFalse(self.tokens.needs_renewal(self.token))
+        self.now += 45 * 60
+        self.assertTrue(self.tokens.needs_renewal(self.token))
+        renewed = self.tokens.renew(self.token)
+        self.now += 15 * 60
+
+        self.assertIsNone(self.tokens.read(value, self.game_id))
+        self.assertEqual(
+            PlayerToken(
+                self.game_id,
+                self.token.player_id,
+                'Zoë Smith',
+                self.token.expires + 105 * 60,
+            ),
+            self.tokens.read(self.tokens.sign(renewed), self.game_id),
+        )
@@ -0,0 +1,70 @@
+from unittest import TestCase
+
+from PIL import Image as PillowImage
+from PIL import ImageOps
+
+from games.tones import (
+    ORIGINAL,
+    Tone,
+    apply_tone,
+    equalize_table,
+    parse_tone,
+    tone_table,
+)
+
+
+class TestToneNames(TestCase):
+    def test_round_trip(self) -> None:
+        tone = Tone(invert=True, equalize=False, brightness=75, contrast=150)
+
+        self.assertEqual('i1e0b075c150', tone.name)
+        self.assertEqual(tone, parse_tone(tone.name))
+        self.assertEqual(ORIGINAL, parse_tone('i0e0b100c100'))
+
+    def test_rejects_other_names(self) -> None:
+        for name in ('', 'i2e0b100c100', 'i0e0b110c100', 'i0e0b100c225',
+                     'i0e0b100c100.jpg', 'tiles'):
+            with self.subTest(name=name), self.assertRaises(ValueError):
+                parse_tone(name)
+
+
+class TestToneTable(TestCase):
+    def test_original_changes_nothing(self) -> None:
+        self.assertEqual(list(range(256)) * 3, tone_table(ORIGINAL))
+
+    def test_matches_css_filters(self) -> None:
+        table = tone_table(Tone(invert=True, brightness=50, contrast=200))
+
+        # Inverted to 255, contrast to 255, half as bright.
+        self.assertEqual(128, table[0])
+        # Inverted to 223, contrast past 255, half as bright.
+        self.assertEqual(128, table[32])
+        # Inverted to 191, contrast to 254, half as bright.
+        self.assertEqual(127, table[64])
+        # Inverted to 0, contrast to 0.
+        self.assertEqual(0, table[255])
+        self.assertEqual(table[:256], table[512:])
+
+    def test_equalizing_needs_a_histogram(self) -> None:
+        with self.assertRaises(ValueError):
+            tone_table(Tone(equalize=True))
+
+    def test_equalizes_like_pillow(self) -> None:
+        image = PillowImage.linear_gradient('L').resize((64, 64)).point(
+            lambda value: value // 4 + 100,
+        ).convert('RGB')
+
+        self.assertEqual(
+            list(ImageOps.equalize(image).getdata()),
+            list(apply_tone(
+                image,
+                Tone(equalize=True),
+                image.histogram(),
+            ).getdata()),
+        )
+
+    def test_flat_bands_stay(self) -> None:
+        histogram = [0] * 768
+        histogram[10] = histogram[256 + 10] = histogram[512 + 10] = 100
+
+        self.assertEqual(list(range(256)) * 3, equalize_table(histogram))